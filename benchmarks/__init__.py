@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+# EverJudge Benchmarks
+# @maintainer: Project EverJudge
+# @license: BSD 3-Clause License
+# @version: 0.1.0
+# Copyright Project EverJudge 2025, All Rights Reserved.
+
+# Benchmark suites for EverJudge, driven by "everlaunch bench".
+# Every suite returns a plain dict which can be saved as JSON and compared between commits.
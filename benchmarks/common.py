@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+# common.py
+# Shared helpers for the EverJudge benchmark suites
+# @maintainer: Project EverJudge
+# @license: BSD 3-Clause License
+# @version: 0.1.0
+# Copyright Project EverJudge 2025, All Rights Reserved.
+
+import datetime
+import json
+import os
+import platform
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+_SCRATCH_CONFIG = """\
+[server]
+debug = false
+
+[database]
+type = "sqlite"
+path = "{root}/everjudge.db"
+pool_size = {pool_size}
+pool_timeout = 30
+pool_recycle = 3600
+echo = false
+
+[judge]
+temp_dir = "{root}/temp"
+input_dir = "{root}/inputs"
+output_dir = "{root}/outputs"
+
+[upload]
+upload_dir = "{root}/uploads"
+
+[limits]
+enabled = false # The load generator is one client; it would only measure 429s.
+
+[security]
+secret_key = "everjudge-bench"
+"""
+
+
+def write_scratch_config(workdir: str, pool_size: int = 5) -> str:
+    # Benchmarks never touch the deployment config; everything lives under the working directory.
+    root = Path(workdir).resolve().as_posix()
+    config_path = os.path.join(workdir, "config.toml")
+    with open(config_path, "w", encoding="utf-8") as f:
+        f.write(_SCRATCH_CONFIG.format(root=root, pool_size=pool_size))
+    return config_path
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    if len(ordered) == 1:
+        return ordered[0]
+    # Linear interpolation between the closest ranks.
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize_latencies(samples: List[float], wall_time: Optional[float] = None) -> Dict[str, float]:
+    count = len(samples)
+    summary = {
+        "requests": count,
+        "mean_ms": round(sum(samples) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "max_ms": round(max(samples) * 1000, 3) if count else 0.0,
+    }
+    if wall_time:
+        summary["throughput_rps"] = round(count / wall_time, 2)
+    return summary
+
+
+def get_git_revision() -> Optional[str]:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+        if result.returncode == 0:
+            return result.stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        pass
+    return None
+
+
+def make_report(suite: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "suite": suite,
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "git_revision": get_git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": options,
+    }
+
+
+def default_output_path(suite: str) -> str:
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    return os.path.join("./data/bench", f"{suite}-{stamp}.json")
+
+
+def save_report(report: Dict[str, Any], path: Optional[str] = None) -> str:
+    path = path or default_output_path(report["suite"])
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def load_report(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_reports(old: Dict[str, Any], new: Dict[str, Any], section: str, metrics: List[str]) -> List[str]:
+    lines = [f"Comparing against {old.get('git_revision') or 'unknown'} ({old.get('timestamp', '?')})"]
+    old_rows = old.get(section, {})
+    for name, row in new.get(section, {}).items():
+        if name not in old_rows:
+            lines.append(f"  {name}: (new)")
+            continue
+        deltas = []
+        for metric in metrics:
+            before = old_rows[name].get(metric)
+            after = row.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before * 100
+            deltas.append(f"{metric} {before} -> {after} ({change:+.1f}%)")
+        lines.append(f"  {name}: " + ", ".join(deltas))
+    return lines
@@ -0,0 +1,365 @@
+# -*- coding: utf-8 -*-
+# http_bench.py
+# HTTP load-testing benchmark for the EverJudge Flask routes
+# @maintainer: Project EverJudge
+# @license: BSD 3-Clause License
+# @version: 0.1.0
+# Copyright Project EverJudge 2025, All Rights Reserved.
+
+# The benchmark seeds a scratch SQLite database, boots the application through the normal plugin path
+# and then drives the main views either in-process (Flask test client) or through a local HTTP server.
+
+import datetime
+import http.client
+import itertools
+import logging
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .common import make_report, summarize_latencies, write_scratch_config
+
+_logger = logging.getLogger("EverJudge Bench")
+
+_QUERY_HEADER = "X-Bench-Queries"
+
+_TAGS = ["dp", "graph", "greedy", "math", "string", "geometry", "data structures", "brute force", "binary search", "number theory"]
+_WORDS = ["Path", "Tree", "Sum", "Array", "Query", "Game", "Grid", "Matrix", "Interval", "Prime", "Palindrome", "Flow"]
+_LANGUAGES = ["c", "cpp", "python", "java"]
+
+def create_bench_application(config_path: str):
+    # The main plugin reads its configuration at import time, so point it at the scratch config first.
+    os.environ["EVERJUDGE_CONFIG"] = config_path
+
+    from everjudge.api import create_application, set_main_application, create_plugin_manager, set_plugin_manager, get_plugin_manager
+
+    app = create_application("EverJudge", "127.0.0.1", 0, False)
+    set_main_application(app)
+    set_plugin_manager(create_plugin_manager())
+    get_plugin_manager().load_plugins()
+    return app.get_flask_instance()
+
+
+def install_query_counter(flask_app) -> None:
+    from flask import g, has_app_context
+    from sqlalchemy import event
+    from plugins.main.database import db
+
+    with flask_app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count_query(*args, **kwargs):
+        if has_app_context():
+            g.bench_queries = g.get("bench_queries", 0) + 1
+
+    @flask_app.after_request
+    def _report_queries(response):
+        response.headers[_QUERY_HEADER] = str(g.get("bench_queries", 0))
+        return response
+
+
+def seed_database(flask_app, problems: int, users: int, submissions: int, seed: int = 0) -> Dict[str, Any]:
+    from sqlalchemy import insert, update
+    from plugins.main.database import (
+        db, User, ProblemSet, Problem, Submission, SubmissionSource, Contest, Discussion, Leaderboard,
+        JudgeStatus, ContestStatus, UserRole
+    )
+    from plugins.main.source_store import source_hash, compress_source
+    from plugins.main.db_init import init_database
+
+    rng = random.Random(seed)
+    now = datetime.datetime.utcnow()
+
+    with flask_app.app_context():
+        init_database(flask_app, drop_existing=True)
+        admin = User.query.filter_by(role=UserRole.ADMIN).first()
+
+        # Hashing a password per user would dominate seeding time, so every bench user shares the admin hash.
+        db.session.execute(insert(User), [
+            {
+                "username": f"bench_user_{i}",
+                "email": f"bench_user_{i}@everjudge.local",
+                "password_hash": admin.password_hash,
+                "role": UserRole.USER,
+                "created_at": now - datetime.timedelta(days=rng.randint(0, 720)),
+                "is_active": True,
+            }
+            for i in range(users)
+        ])
+        user_ids = [row[0] for row in db.session.query(User.id).all()]
+
+        problem_set = ProblemSet(name="Bench Set", description="Benchmark problem set", created_by=admin.id)
+        db.session.add(problem_set)
+        db.session.flush()
+
+        problem_rows = []
+        for i in range(problems):
+            problem_rows.append({
+                "title": f"{rng.choice(_WORDS)} {rng.choice(_WORDS)} {i}",
+                "description": "Statement. " * rng.randint(50, 400),
+                "input_format": "The first line contains n.",
+                "output_format": "Print the answer.",
+                "constraints": "1 <= n <= 100000",
+                "sample_input": "3\n1 2 3",
+                "sample_output": "6",
+                "hint": "",
+                "difficulty": rng.randint(0, 10),
+                "problem_set_id": problem_set.id,
+                "time_limit": 1000,
+                "memory_limit": 256,
+                "total_submissions": 0,
+                "accepted_submissions": 0,
+                "created_by": admin.id,
+                "created_at": now - datetime.timedelta(days=rng.randint(0, 365)),
+                "updated_at": now,
+                "is_visible": rng.random() > 0.05,
+                "tags": ",".join(rng.sample(_TAGS, rng.randint(1, 3))),
+            })
+        db.session.execute(insert(Problem), problem_rows)
+        problem_ids = [row[0] for row in db.session.query(Problem.id).order_by(Problem.id).all()]
+
+        statuses = list(JudgeStatus)
+        weights = [1 if s in (JudgeStatus.PENDING, JudgeStatus.RUNNING, JudgeStatus.SYSTEM_ERROR) else 10 for s in statuses]
+        weights[statuses.index(JudgeStatus.ACCEPTED)] = 40
+        totals = {pid: [0, 0] for pid in problem_ids}
+        sources: Dict[str, Dict[str, Any]] = {}
+        submission_rows = []
+        for _ in range(submissions):
+            pid = rng.choice(problem_ids)
+            status = rng.choices(statuses, weights)[0]
+            totals[pid][0] += 1
+            if status == JudgeStatus.ACCEPTED:
+                totals[pid][1] += 1
+            submitted_at = now - datetime.timedelta(seconds=rng.randint(0, 365 * 86400))
+            source = f"// {rng.randint(0, 999)}\n" + "int main() { return 0; }\n" * rng.randint(5, 80)
+            digest = source_hash(source)
+            if digest not in sources:
+                compression, data = compress_source(source)
+                sources[digest] = {"hash": digest, "compression": compression, "size": len(source), "data": data}
+            submission_rows.append({
+                "user_id": rng.choice(user_ids),
+                "problem_id": pid,
+                "language": rng.choice(_LANGUAGES),
+                "source_hash": digest,
+                "status": status,
+                "execution_time": rng.randint(0, 2000),
+                "memory_usage": rng.randint(1024, 262144),
+                "submitted_at": submitted_at,
+                "judged_at": submitted_at + datetime.timedelta(seconds=1),
+                "test_cases_passed": rng.randint(0, 20),
+                "total_test_cases": 20,
+            })
+        if sources:
+            db.session.execute(insert(SubmissionSource), list(sources.values()))
+        for start in range(0, len(submission_rows), 5000):
+            db.session.execute(insert(Submission), submission_rows[start:start + 5000])
+        db.session.execute(
+            update(Problem),
+            [{"id": pid, "total_submissions": t[0], "accepted_submissions": t[1]} for pid, t in totals.items()]
+        )
+
+        db.session.execute(insert(Contest), [
+            {
+                "title": f"Bench Contest {i}",
+                "description": "Benchmark contest",
+                "status": rng.choice(list(ContestStatus)),
+                "start_time": now + datetime.timedelta(days=rng.randint(-30, 30)),
+                "end_time": now + datetime.timedelta(days=31),
+                "duration_minutes": 300,
+                "created_by": admin.id,
+            }
+            for i in range(20)
+        ])
+        db.session.execute(insert(Discussion), [
+            {
+                "title": f"Bench Announcement {i}",
+                "content": "Announcement body.",
+                "user_id": admin.id,
+                "is_pinned": i < 5,
+                "created_at": now - datetime.timedelta(days=i),
+            }
+            for i in range(30)
+        ])
+        existing = {row[0] for row in db.session.query(Leaderboard.user_id).all()}
+        db.session.execute(insert(Leaderboard), [
+            {"user_id": uid, "total_score": rng.randint(0, 5000), "problems_solved": rng.randint(0, 500), "submissions_count": rng.randint(0, 2000)}
+            for uid in user_ids if uid not in existing
+        ])
+        db.session.commit()
+
+        visible_ids = [row[0] for row in db.session.query(Problem.id).filter_by(is_visible=True).all()]
+
+    return {"visible_problem_ids": visible_ids}
+
+
+def build_scenarios(visible_problem_ids: List[int]) -> List[Tuple[str, Callable[[random.Random], str]]]:
+    total_pages = max(1, (len(visible_problem_ids) + 9) // 10)
+    return [
+        ("index", lambda rng: "/"),
+        ("problems", lambda rng: "/problems"),
+        ("problems_search", lambda rng: f"/problems?search={rng.choice(_TAGS).split()[0]}"),
+        ("problems_difficulty", lambda rng: f"/problems?difficulty={rng.choice(['0-3', '4-6', '7-10'])}"),
+        ("problems_sort", lambda rng: f"/problems?sort={rng.choice(['difficulty', 'acceptance'])}"),
+        ("problems_deep_page", lambda rng: f"/problems?sort=acceptance&page={rng.randint(max(1, total_pages - 5), total_pages)}"),
+        ("problem_detail", lambda rng: f"/problems/{rng.choice(visible_problem_ids)}"),
+    ]
+
+
+class _TestClientDriver(object):
+    def __init__(self, flask_app):
+        self._client = flask_app.test_client()
+
+    def get(self, path: str) -> Tuple[int, int]:
+        response = self._client.get(path)
+        queries = int(response.headers.get(_QUERY_HEADER, 0))
+        response.close()
+        return response.status_code, queries
+
+    def close(self) -> None:
+        return
+
+
+class _HTTPDriver(object):
+    def __init__(self, host: str, port: int):
+        self._host = host
+        self._port = port
+        self._conn: Optional[http.client.HTTPConnection] = None
+
+    def get(self, path: str) -> Tuple[int, int]:
+        for attempt in range(2):
+            if self._conn is None:
+                self._conn = http.client.HTTPConnection(self._host, self._port, timeout=60)
+            try:
+                self._conn.request("GET", path)
+                response = self._conn.getresponse()
+                response.read()
+                return response.status, int(response.getheader(_QUERY_HEADER, 0))
+            except (http.client.HTTPException, ConnectionError):
+                # The development server may drop keep-alive connections; reconnect once.
+                self.close()
+                if attempt:
+                    raise
+        return 0, 0
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def drive(make_driver: Callable[[], Any], scenarios: List[Tuple[str, Callable[[random.Random], str]]],
+          total_requests: int, concurrency: int, warmup: int = 0, seed: int = 0) -> Dict[str, Any]:
+    samples: Dict[str, List[float]] = {name: [] for name, _ in scenarios}
+    queries: Dict[str, List[int]] = {name: [] for name, _ in scenarios}
+    errors: Dict[str, int] = {name: 0 for name, _ in scenarios}
+    counter = itertools.count()
+    lock = threading.Lock()
+
+    def worker(index: int) -> None:
+        rng = random.Random(seed * 1000 + index)
+        driver = make_driver()
+        try:
+            for i in range(warmup):
+                driver.get(scenarios[i % len(scenarios)][1](rng))
+            start_barrier.wait()
+            while True:
+                n = next(counter)
+                if n >= total_requests:
+                    break
+                name, make_path = scenarios[n % len(scenarios)]
+                path = make_path(rng)
+                began = time.perf_counter()
+                try:
+                    status, query_count = driver.get(path)
+                except Exception as e:
+                    _logger.warning(f"Request {path} failed: {e}")
+                    status, query_count = 0, 0
+                elapsed = time.perf_counter() - began
+                with lock:
+                    samples[name].append(elapsed)
+                    queries[name].append(query_count)
+                    if status == 0 or status >= 400:
+                        errors[name] += 1
+        finally:
+            driver.close()
+
+    start_barrier = threading.Barrier(concurrency + 1)
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    start_barrier.wait()
+    began = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    wall_time = time.perf_counter() - began
+
+    results: Dict[str, Any] = {"scenarios": {}, "total": {}}
+    for name, _ in scenarios:
+        row = summarize_latencies(samples[name])
+        row["errors"] = errors[name]
+        row["queries_per_request"] = round(sum(queries[name]) / len(queries[name]), 2) if queries[name] else 0.0
+        results["scenarios"][name] = row
+
+    all_samples = [s for rows in samples.values() for s in rows]
+    all_queries = [q for rows in queries.values() for q in rows]
+    total = summarize_latencies(all_samples, wall_time)
+    total["errors"] = sum(errors.values())
+    total["queries_per_request"] = round(sum(all_queries) / len(all_queries), 2) if all_queries else 0.0
+    total["wall_time_s"] = round(wall_time, 3)
+    results["total"] = {"all": total}
+    return results
+
+
+def run_http_benchmark(requests: int = 700, concurrency: int = 8, problems: int = 2000, users: int = 200,
+                       submissions: int = 20000, server: bool = False, warmup: int = 10, seed: int = 0,
+                       workdir: Optional[str] = None, keep: bool = False) -> Dict[str, Any]:
+    options = {
+        "requests": requests,
+        "concurrency": concurrency,
+        "problems": problems,
+        "users": users,
+        "submissions": submissions,
+        "mode": "server" if server else "in-process",
+        "warmup": warmup,
+        "seed": seed,
+    }
+    report = make_report("http", options)
+
+    created_workdir = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix="everjudge-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        flask_app = create_bench_application(write_scratch_config(workdir, pool_size=max(5, concurrency)))
+        install_query_counter(flask_app)
+
+        began = time.perf_counter()
+        seeded = seed_database(flask_app, problems, users, submissions, seed)
+        report["seed_time_s"] = round(time.perf_counter() - began, 3)
+
+        scenarios = build_scenarios(seeded["visible_problem_ids"])
+
+        if server:
+            from werkzeug.serving import make_server
+
+            http_server = make_server("127.0.0.1", 0, flask_app, threaded=True)
+            server_thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+            server_thread.start()
+            try:
+                port = http_server.server_port
+                report.update(drive(lambda: _HTTPDriver("127.0.0.1", port), scenarios, requests, concurrency, warmup, seed))
+            finally:
+                http_server.shutdown()
+        else:
+            report.update(drive(lambda: _TestClientDriver(flask_app), scenarios, requests, concurrency, warmup, seed))
+    finally:
+        if created_workdir and not keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+        else:
+            report["workdir"] = workdir
+
+    return report
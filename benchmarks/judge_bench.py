@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+# judge_bench.py
+# Judge throughput micro-benchmark for EverJudge
+# @maintainer: Project EverJudge
+# @license: BSD 3-Clause License
+# @version: 0.1.0
+# Copyright Project EverJudge 2025, All Rights Reserved.
+
+# The benchmark generates synthetic problems and reference solutions, then runs them through
+# create_language_provider/create_judger exactly like a real judging would.
+# The time a solution spends on the CPU is taken from the children's rusage, so everything
+# else the judge does per case (spawning, redirection, logging, bookkeeping) shows up as overhead.
+
+import logging
+import os
+import random
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .common import make_report, percentile, write_scratch_config
+
+try:
+    import resource
+except ImportError:
+    resource = None # Not available on Windows, overhead then includes the solution's own runtime.
+
+_logger = logging.getLogger("EverJudge Bench")
+
+# Every reference solution reads an opcode first:
+#   0 <n> <a1..an>  print the sum of a1..an
+#   1               spin forever (time limit exceeded)
+#   2 <n>           print the numbers 0..n-1, one per line
+_SOLUTIONS = {
+    "c": ("sol.c", "sol", r"""
+#include <stdio.h>
+int main(void) {
+    int op;
+    if (scanf("%d", &op) != 1) return 1;
+    if (op == 0) {
+        long long n, x, s = 0;
+        scanf("%lld", &n);
+        for (long long i = 0; i < n; i++) { scanf("%lld", &x); s += x; }
+        printf("%lld\n", s);
+    } else if (op == 1) {
+        volatile unsigned long long c = 0;
+        for (;;) c++;
+    } else {
+        long long n;
+        scanf("%lld", &n);
+        for (long long i = 0; i < n; i++) printf("%lld\n", i);
+    }
+    return 0;
+}
+"""),
+    "cpp": ("sol.cpp", "sol", r"""
+#include <cstdio>
+#include <iostream>
+int main() {
+    std::ios::sync_with_stdio(false);
+    std::cin.tie(nullptr);
+    int op;
+    if (!(std::cin >> op)) return 1;
+    if (op == 0) {
+        long long n, x, s = 0;
+        std::cin >> n;
+        for (long long i = 0; i < n; i++) { std::cin >> x; s += x; }
+        std::cout << s << '\n';
+    } else if (op == 1) {
+        volatile unsigned long long c = 0;
+        for (;;) c = c + 1;
+    } else {
+        long long n;
+        std::cin >> n;
+        for (long long i = 0; i < n; i++) std::cout << i << '\n';
+    }
+    return 0;
+}
+"""),
+    "python": ("sol.py", "sol", r"""
+import sys
+data = sys.stdin.buffer.read().split()
+op = int(data[0])
+if op == 0:
+    n = int(data[1])
+    sys.stdout.write(str(sum(map(int, data[2:2 + n]))) + "\n")
+elif op == 1:
+    while True:
+        pass
+else:
+    n = int(data[1])
+    sys.stdout.write("".join(f"{i}\n" for i in range(n)))
+"""),
+    "java": ("Main.java", "Main", r"""
+import java.io.*;
+public class Main {
+    public static void main(String[] args) throws IOException {
+        StreamTokenizer in = new StreamTokenizer(new BufferedInputStream(System.in));
+        PrintWriter out = new PrintWriter(new BufferedWriter(new OutputStreamWriter(System.out)));
+        in.nextToken();
+        int op = (int) in.nval;
+        if (op == 0) {
+            in.nextToken();
+            long n = (long) in.nval, s = 0;
+            for (long i = 0; i < n; i++) { in.nextToken(); s += (long) in.nval; }
+            out.println(s);
+        } else if (op == 1) {
+            long c = 0;
+            while (true) { c++; if (c == Long.MIN_VALUE) break; }
+        } else {
+            in.nextToken();
+            long n = (long) in.nval;
+            for (long i = 0; i < n; i++) out.println(i);
+        }
+        out.flush();
+    }
+}
+"""),
+}
+
+_TOOLCHAINS = {
+    "c": ["gcc"],
+    "cpp": ["g++"],
+    "python": ["python3"],
+    "java": ["javac", "java"],
+}
+
+WORKLOADS = ["many_tiny", "few_huge", "tle_heavy", "output_heavy"]
+
+
+def detect_toolchains() -> Dict[str, Optional[str]]:
+    found = {}
+    for language, tools in _TOOLCHAINS.items():
+        paths = [shutil.which(tool) for tool in tools]
+        found[language] = paths[0] if all(paths) else None
+    return found
+
+
+def _sum_case(rng: random.Random, n: int) -> Tuple[str, str]:
+    numbers = [rng.randint(-10 ** 9, 10 ** 9) for _ in range(n)]
+    return f"0 {n}\n" + " ".join(map(str, numbers)) + "\n", f"{sum(numbers)}\n"
+
+
+def _output_case(n: int) -> Tuple[str, str]:
+    return f"2 {n}\n", "".join(f"{i}\n" for i in range(n))
+
+
+def generate_workload(name: str, directory: str, scale: float = 1.0, seed: int = 0) -> int:
+    rng = random.Random(seed)
+    cases: List[Tuple[str, Optional[str]]] = []
+    if name == "many_tiny":
+        cases = [_sum_case(rng, 2) for _ in range(max(1, int(100 * scale)))]
+    elif name == "few_huge":
+        cases = [_sum_case(rng, max(1, int(1000000 * scale))) for _ in range(3)]
+    elif name == "tle_heavy":
+        # Every TLE case costs the full run timeout, so keep the count small.
+        cases = [_sum_case(rng, 10) for _ in range(3)] + [("1\n", None) for _ in range(max(1, int(2 * scale)))]
+    elif name == "output_heavy":
+        cases = [_output_case(max(1, int(200000 * scale))) for _ in range(5)]
+    else:
+        raise ValueError(f"Unknown workload: {name}")
+
+    os.makedirs(os.path.join(directory, "inputs"), exist_ok=True)
+    os.makedirs(os.path.join(directory, "expected"), exist_ok=True)
+    for group, (data_in, data_out) in enumerate(cases):
+        with open(os.path.join(directory, "inputs", f"{group}.in"), "w", encoding="utf-8") as f:
+            f.write(data_in)
+        if data_out is not None:
+            with open(os.path.join(directory, "expected", f"{group}.out"), "w", encoding="utf-8") as f:
+                f.write(data_out)
+    return len(cases)
+
+
+def _child_cpu_time() -> float:
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _outputs_match(produced: str, expected: str) -> bool:
+    if not os.path.exists(produced) or not os.path.exists(expected):
+        return False
+    with open(produced, "rb") as a, open(expected, "rb") as b:
+        return a.read().split() == b.read().split()
+
+
+def bench_submission(language: str, workload_dir: str, cases: int, run_dir: str) -> Dict[str, Any]:
+    from plugins.main.api import create_language_provider, create_judger, JudgeResult
+    from plugins.main.workspace import get_workspace_manager
+
+    file_name, exec_name, source = _SOLUTIONS[language]
+    shutil.rmtree(run_dir, ignore_errors=True)
+    outputs = os.path.join(run_dir, "outputs")
+    os.makedirs(outputs)
+    with open(os.path.join(run_dir, file_name), "w", encoding="utf-8") as f:
+        f.write(source.lstrip())
+
+    # Compiles and runs in a pooled workspace, like a real judging.
+    with get_workspace_manager().workspace() as workspace:
+        began = time.perf_counter()
+        provider = create_language_provider(language, os.path.join(run_dir, file_name), exec_name, os.path.join(workload_dir, "inputs"), outputs)
+        provider.attach_workspace(workspace)
+        judger = create_judger("standard")
+        judger.register_provider(language, provider)
+        setup_time = time.perf_counter() - began
+
+        began = time.perf_counter()
+        compiled, message = provider.compile()
+        compile_time = time.perf_counter() - began
+        if not compiled:
+            raise RuntimeError(f"Reference solution for {language} failed to compile: {message}")
+
+        walls, cpus, verdicts = [], [], {}
+        check_time = 0.0
+        for group in range(cases):
+            cpu_before = _child_cpu_time()
+            began = time.perf_counter()
+            result = judger.judge(language, group)
+            wall = time.perf_counter() - began
+            cpu = _child_cpu_time() - cpu_before
+
+            began = time.perf_counter()
+            expected = os.path.join(workload_dir, "expected", f"{group}.out")
+            if result == JudgeResult.AC and not _outputs_match(os.path.join(outputs, f"{group}.out"), expected):
+                result = JudgeResult.WA
+            check_time += time.perf_counter() - began
+
+            walls.append(wall)
+            cpus.append(cpu)
+            verdicts[result.name] = verdicts.get(result.name, 0) + 1
+
+    return {
+        "setup_time": setup_time,
+        "compile_time": compile_time,
+        "walls": walls,
+        "cpus": cpus,
+        "check_time": check_time,
+        "verdicts": verdicts,
+    }
+
+
+def _summarize(samples: List[Dict[str, Any]], cases: int) -> Dict[str, Any]:
+    walls = [w for s in samples for w in s["walls"]]
+    cpus = [c for s in samples for c in s["cpus"]]
+    overheads = [max(0.0, w - c) for w, c in zip(walls, cpus)]
+    totals = [s["setup_time"] + s["compile_time"] + sum(s["walls"]) + s["check_time"] for s in samples]
+    verdicts: Dict[str, int] = {}
+    for s in samples:
+        for verdict, count in s["verdicts"].items():
+            verdicts[verdict] = verdicts.get(verdict, 0) + count
+
+    return {
+        "submissions": len(samples),
+        "cases": cases,
+        "compile_ms": round(sum(s["compile_time"] for s in samples) / len(samples) * 1000, 3),
+        "case_wall_ms_p50": round(percentile(walls, 50) * 1000, 3),
+        "case_wall_ms_p95": round(percentile(walls, 95) * 1000, 3),
+        "overhead_ms_mean": round(sum(overheads) / len(overheads) * 1000, 3) if overheads else 0.0,
+        "overhead_ms_p50": round(percentile(overheads, 50) * 1000, 3),
+        "overhead_ms_p95": round(percentile(overheads, 95) * 1000, 3),
+        "submissions_per_s": round(len(totals) / sum(totals), 3) if sum(totals) > 0 else 0.0,
+        "phases_s": {
+            "setup": round(sum(s["setup_time"] for s in samples), 4),
+            "compile": round(sum(s["compile_time"] for s in samples), 4),
+            "execute": round(sum(cpus), 4),
+            "overhead": round(sum(overheads), 4),
+            "check": round(sum(s["check_time"] for s in samples), 4),
+        },
+        "verdicts": verdicts,
+    }
+
+
+def run_judge_benchmark(languages: Optional[List[str]] = None, workloads: Optional[List[str]] = None,
+                        repeat: int = 2, scale: float = 1.0, seed: int = 0,
+                        workdir: Optional[str] = None, keep: bool = False) -> Dict[str, Any]:
+    toolchains = detect_toolchains()
+    languages = languages or list(_SOLUTIONS)
+    workloads = workloads or list(WORKLOADS)
+    options = {"languages": languages, "workloads": workloads, "repeat": repeat, "scale": scale, "seed": seed}
+    report = make_report("judge", options)
+    report["toolchains"] = toolchains
+    report["results"] = {}
+    report["skipped"] = [language for language in languages if not toolchains.get(language)]
+
+    created_workdir = workdir is None
+    workdir = os.path.abspath(workdir or tempfile.mkdtemp(prefix="everjudge-bench-"))
+    os.makedirs(workdir, exist_ok=True)
+    # Importing the judge API loads the main plugin, which needs a configuration.
+    os.environ.setdefault("EVERJUDGE_CONFIG", write_scratch_config(workdir))
+    try:
+        for workload in workloads:
+            workload_dir = os.path.join(workdir, workload)
+            cases = generate_workload(workload, workload_dir, scale, seed)
+            for language in languages:
+                if not toolchains.get(language):
+                    continue
+                _logger.info(f"Benchmarking {workload} with {language}...")
+                samples = [
+                    bench_submission(language, workload_dir, cases, os.path.join(workload_dir, f"run-{language}"))
+                    for _ in range(repeat)
+                ]
+                report["results"][f"{workload}/{language}"] = _summarize(samples, cases)
+    finally:
+        if created_workdir and not keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+        else:
+            report["workdir"] = workdir
+
+    phases: Dict[str, float] = {}
+    for row in report["results"].values():
+        for phase, seconds in row["phases_s"].items():
+            phases[phase] = round(phases.get(phase, 0.0) + seconds, 4)
+    report["phases_s"] = phases
+    return report
@@ -10,10 +10,15 @@ from collections import deque # For topological sort while loading plugins.
 from flask import Blueprint, Flask # Flask.
 
 import everjudge_share # The global object.
+from everjudge.profiling import startup_phase # No-op unless "everlaunch --profile-startup" is used.
 import functools # For "wraps".
+import hashlib # For the plugin index content hashes.
 import importlib # For loading plugins.
+import json # For the plugin index.
 import logging # The logging library. We do not want to be silent, do we?
+import os # For replacing the plugin index atomically.
 import pathlib # The path & file library.
+import threading # For activating lazy plugins safely.
 try:
     import tomllib as toml # Using the built-in TOML parser.
 except ImportError:
@@ -25,6 +30,9 @@ except ImportError:
 _logger = logging.getLogger("EverJudge API") # Quite bad. Why can't we get rid of this?
 _logger.setLevel(logging.INFO)
 
+_PLUGIN_INDEX_VERSION = 1
+_LAZY_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE"]
+
 class Application(object):
     def __init__(self, name: str, host: str="0.0.0.0", port: int=80, debug: bool=False):
         self._flask_instance = Flask(name, template_folder="./templates/")
@@ -49,16 +57,45 @@ class Application(object):
         return _register
 
     def register_blueprint(self, blueprint: Blueprint) -> None:
-        self._flask_instance.register_blueprint(blueprint)
+        with startup_phase(f"blueprint registration ({blueprint.name})"):
+            self._flask_instance.register_blueprint(blueprint)
+        return
+
+    def register_lazy_route(self, prefix: str, activate: callable) -> None:
+        # The rules exist from startup like any other route, so the URL map never changes while requests
+        # are served; only the plugin behind them is imported on the first request, see _LazyView.
+        prefix = prefix.rstrip("/")
+        view = _LazyView(activate)
+        endpoint = f"lazy:{prefix}"
+        self._flask_instance.add_url_rule(prefix or "/", endpoint, view, defaults={"path": ""}, methods=_LAZY_METHODS)
+        self._flask_instance.add_url_rule(f"{prefix}/<path:path>", endpoint, view, methods=_LAZY_METHODS)
         return
 
     def get_flask_instance(self) -> Flask:
         return self._flask_instance
 
 
+class _LazyView(object):
+    # Imports the plugin on its first call; the plugin's "lazy_view(path)" then handles everything under the prefix.
+    def __init__(self, activate: callable):
+        self._activate = activate
+        self._view = None
+        self._lock = threading.Lock()
+
+    def __call__(self, path: str):
+        view = self._view
+        if view is None:
+            with self._lock:
+                if self._view is None:
+                    self._view = self._activate().lazy_view
+                view = self._view
+        return view(path)
+
+
 def create_application(name: str, host: str="0.0.0.0", port: int=80, debug: bool=False) -> Application:
     _logger.info(f"Creating application '{name}'")
-    return Application(name, host, port, debug)
+    with startup_phase("application creation"):
+        return Application(name, host, port, debug)
 
 def set_main_application(app_: Application) -> None: # DO NOT use it for no reason!!!
     # We've moved this bloody thing back in order to finish the EverLaunch.
@@ -75,7 +112,8 @@ def get_main_application() -> Application | None:
 
 def _load_plugin(name: str):
     try:
-        m = importlib.import_module(f"plugins.{name}")
+        with startup_phase(f"plugin import ({name})"):
+            m = importlib.import_module(f"plugins.{name}")
         _logger.info(f"Loaded plugin {name}.")
     except ImportError:
         raise ImportError(f"Unable to load plugin {name}.")
@@ -83,76 +121,171 @@ def _load_plugin(name: str):
 
 
 class PluginManager(object):
-    def __init__(self):
+    def __init__(self, plugins_dir: str = "./plugins", index_path: str = "./plugins/.plugin_index.json"):
         self._plugins: dict[str, str] = {}
         self._plugins_required: list[str] = []
+        self._plugins_dir = pathlib.Path(plugins_dir)
+        self._index_path = pathlib.Path(index_path)
+        self._manifests: dict[str, dict] = {}
+        self._order: list[str] = []
+        self._modules: dict = {}
+        self._lock = threading.RLock()
 
-    def load_plugins(self) -> None:
-        for plugin in pathlib.Path("./plugins").iterdir():
-            if plugin.is_dir():
-                # m = _load_plugin(plugin.name)
-                with open(f"./plugins/{plugin.name}/plugin.toml", "rb") as f:
-                    t=toml.load(f)
-                    # print(t) # A simple debug message.
-                    self._plugins[t["info"]["id"]] = plugin.name
-                    self._plugins_required.append(t["info"]["id"])
-                    self._plugins_required += t["dependencies"]["dependencies"]
-        # Build dependency graph and compute topological order
-        dep_graph: dict[str, set[str]] = {}
-        in_degree: dict[str, int] = {}
-        plugin_info: dict[str, dict] = {}
-
-        # Collect plugin metadata and build dependency graph
-        for plugin in pathlib.Path("./plugins").iterdir():
-            if plugin.is_dir():
+    @staticmethod
+    def _parse_manifest(content: bytes) -> dict:
+        t = toml.loads(content.decode("utf-8"))
+        activation = t.get("activation", {})
+        return {
+            "id": t["info"]["id"],
+            "deps": list(t["dependencies"]["dependencies"]),
+            "lazy": bool(activation.get("lazy", False)),
+            "routes": list(activation.get("routes", [])),
+        }
+
+    def _read_index(self) -> dict:
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") == _PLUGIN_INDEX_VERSION:
+                return index
+        except (OSError, ValueError):
+            pass
+        return {"version": _PLUGIN_INDEX_VERSION, "plugins": {}, "order": []}
+
+    def _write_index(self, index: dict) -> None:
+        try:
+            tmp_path = self._index_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(index, f, indent=2)
+            os.replace(tmp_path, self._index_path)
+        except OSError as e:
+            # A read-only deployment simply parses the manifests on every start.
+            _logger.debug(f"Unable to write plugin index: {e}")
+
+    def _scan(self) -> tuple[dict[str, dict], list[str]]:
+        index = self._read_index()
+        cached = index["plugins"]
+        entries: dict[str, dict] = {}
+        changed = False
+
+        for plugin in sorted(self._plugins_dir.iterdir()):
+            manifest_path = plugin / "plugin.toml"
+            if not plugin.is_dir() or not manifest_path.is_file():
+                continue
+            stat = manifest_path.stat()
+            entry = cached.get(plugin.name)
+            if entry is not None and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                entries[plugin.name] = entry
+                continue
+
+            # The cheap check failed; only a different content hash forces a re-parse.
+            content = manifest_path.read_bytes()
+            digest = hashlib.sha256(content).hexdigest()
+            if entry is not None and entry["sha256"] == digest:
+                entry = dict(entry, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            else:
                 try:
-                    with open(f"./plugins/{plugin.name}/plugin.toml", "rb") as f:
-                        t = toml.load(f)
-                        pid = t["info"]["id"]
-                        deps = t["dependencies"]["dependencies"]
-                        plugin_info[pid] = {"dir": plugin.name, "deps": deps}
-                        dep_graph[pid] = set(deps)
-                        in_degree[pid] = 0
+                    manifest = self._parse_manifest(content)
                 except Exception:
                     _logger.warning(f"Skip invalid plugin directory: {plugin.name}")
                     continue
+                entry = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": digest, "manifest": manifest}
+            entries[plugin.name] = entry
+            changed = True
+
+        if set(entries) != set(cached):
+            changed = True
+
+        manifests = {entry["manifest"]["id"]: dict(entry["manifest"], dir=name) for name, entry in entries.items()}
+        if changed or not index["order"]:
+            with startup_phase("topological sort"):
+                order = self._resolve_order(manifests)
+            self._write_index({"version": _PLUGIN_INDEX_VERSION, "plugins": entries, "order": order})
+            _logger.debug("Plugin index rebuilt")
+        else:
+            order = index["order"]
+            _logger.debug("Plugin order loaded from index")
+        return manifests, order
 
-        # Compute in-degrees
-        for pid, deps in dep_graph.items():
-            for d in deps:
-                if d in in_degree:
-                    in_degree[d] += 1
-                else:
-                    # Missing dependency will be caught later
-                    in_degree[d] = 1
+    @staticmethod
+    def _resolve_order(manifests: dict[str, dict]) -> list[str]:
+        missing = {d for m in manifests.values() for d in m["deps"] if d not in manifests}
+        if missing:
+            _logger.error(f"Missing plugin dependencies: {', '.join(sorted(missing))}")
+            raise ImportError(f"Missing plugin dependencies: {', '.join(sorted(missing))}")
 
-        # Topological sort using Kahn's algorithm
-        queue = deque([pid for pid, deg in in_degree.items() if deg == 0])
-        topo_order = []
+        # Kahn's algorithm; a plugin becomes ready once all of its dependencies are placed.
+        remaining = {pid: len(set(m["deps"])) for pid, m in manifests.items()}
+        dependents: dict[str, list[str]] = {pid: [] for pid in manifests}
+        for pid, m in manifests.items():
+            for d in set(m["deps"]):
+                dependents[d].append(pid)
 
+        queue = deque(sorted(pid for pid, count in remaining.items() if count == 0))
+        order = []
         while queue:
             cur = queue.popleft()
-            topo_order.append(cur)
-            for dep in dep_graph.get(cur, []):
-                in_degree[dep] -= 1
-                if in_degree[dep] == 0:
-                    queue.append(dep)
-
-        # Detect cycles or missing dependencies
-        if len(topo_order) != len(in_degree):
-            _logger.error("Circular or missing dependencies detected among plugins.")
-            raise ImportError("Circular or missing dependencies detected among plugins.")
-
-        # Load plugins in topological order
-        for pid in topo_order:
-            info = plugin_info[pid]
+            order.append(cur)
+            for dependent in sorted(dependents[cur]):
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    queue.append(dependent)
+
+        if len(order) != len(manifests):
+            _logger.error("Circular dependencies detected among plugins.")
+            raise ImportError("Circular dependencies detected among plugins.")
+        return order
+
+    def load_plugins(self) -> None:
+        with startup_phase("plugin discovery"):
+            manifests, order = self._scan()
+        self._manifests = manifests
+        self._order = order
+        for pid in order:
+            info = manifests[pid]
             self._plugins[pid] = info["dir"]
-            self._plugins_required.append(pid)
-            self._plugins_required.extend(info["deps"])
-            _load_plugin(info["dir"])
+            for required in [pid] + info["deps"]:
+                if required not in self._plugins_required:
+                    self._plugins_required.append(required)
 
+        app = everjudge_share.app
+        for pid in order:
+            info = manifests[pid]
+            if not info["lazy"]:
+                self.activate(pid)
+            elif info["routes"] and app is not None:
+                for prefix in info["routes"]:
+                    app.register_lazy_route(prefix, functools.partial(self.activate, pid))
+                _logger.info(f"Deferred plugin {info['dir']} until {', '.join(info['routes'])} is requested.")
+            else:
+                _logger.info(f"Deferred plugin {info['dir']} until first use.")
         return
 
+    def activate(self, pid: str):
+        module = self._modules.get(pid)
+        if module is not None:
+            return module
+        with self._lock:
+            if pid in self._modules:
+                return self._modules[pid]
+            if pid not in self._manifests:
+                raise ImportError(f"Plugin {pid} is not installed.")
+            info = self._manifests[pid]
+            for dep in info["deps"]:
+                self.activate(dep)
+            self._modules[pid] = _load_plugin(info["dir"])
+            return self._modules[pid]
+
+    def get_plugin(self, pid: str):
+        # Lazy plugins are imported on their first use.
+        return self.activate(pid)
+
+    def is_active(self, pid: str) -> bool:
+        return pid in self._modules
+
+    def get_load_order(self) -> list[str]:
+        return list(self._order)
+
     def check_dependencies(self) -> None:
         for plugin in self._plugins_required:
             if plugin not in self._plugins:
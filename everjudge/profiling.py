@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# profiling.py
+# Startup profiler for EverJudge.
+# @version: 0.1.0
+
+# "everlaunch --profile-startup" enables the profiler before anything heavy is imported.
+# While disabled, startup_phase() is a no-op, so the instrumented code paths cost nothing in production.
+
+import contextlib # For the phase context manager.
+import importlib._bootstrap as _bootstrap # Both "import" statements and importlib.import_module() go through it.
+import sys # For sys.modules.
+import threading # Imports and phases are only attributed on the thread that enabled the profiler.
+import time # For perf_counter.
+
+
+class StartupProfiler(object):
+    def __init__(self):
+        self.enabled = False
+        self._thread_id = None
+        self._started_at = 0.0
+        self._phases: list[dict] = []
+        self._phase_depth = 0
+        self._imports: dict[str, dict] = {}
+        self._import_stack: list[list] = []
+        self._find_and_load = None
+
+    def enable(self) -> None:
+        if self.enabled:
+            return
+        self.enabled = True
+        self._thread_id = threading.get_ident()
+        self._started_at = time.perf_counter()
+        # The same hook "python -X importtime" uses, but the results end up in our report.
+        self._find_and_load = _bootstrap._find_and_load
+        _bootstrap._find_and_load = self._timed_find_and_load
+
+    def disable(self) -> None:
+        if not self.enabled:
+            return
+        self.enabled = False
+        _bootstrap._find_and_load = self._find_and_load
+
+    def _timed_find_and_load(self, name, import_):
+        if threading.get_ident() != self._thread_id or name in sys.modules:
+            return self._find_and_load(name, import_)
+
+        frame = [name, 0.0] # Module name and time spent importing its children.
+        self._import_stack.append(frame)
+        began = time.perf_counter()
+        try:
+            return self._find_and_load(name, import_)
+        finally:
+            elapsed = time.perf_counter() - began
+            self._import_stack.pop()
+            if self._import_stack:
+                self._import_stack[-1][1] += elapsed
+            self._imports[name] = {
+                "cumulative_ms": round(elapsed * 1000, 3),
+                "self_ms": round((elapsed - frame[1]) * 1000, 3),
+                "depth": len(self._import_stack),
+            }
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        if not self.enabled or threading.get_ident() != self._thread_id:
+            yield
+            return
+        record = {"name": name, "depth": self._phase_depth, "start_ms": round((time.perf_counter() - self._started_at) * 1000, 3)}
+        self._phases.append(record)
+        self._phase_depth += 1
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            record["duration_ms"] = round((time.perf_counter() - began) * 1000, 3)
+            self._phase_depth -= 1
+
+    def report(self, top: int = 30) -> dict:
+        imports = sorted(self._imports.items(), key=lambda item: item[1]["self_ms"], reverse=True)
+        return {
+            "total_ms": round((time.perf_counter() - self._started_at) * 1000, 3),
+            "modules_imported": len(self._imports),
+            "import_ms": round(sum(i["self_ms"] for i in self._imports.values()), 3),
+            "phases": list(self._phases),
+            "slowest_imports": [dict(module=name, **timing) for name, timing in imports[:top]],
+            "top_level_imports": {
+                name: timing["cumulative_ms"] for name, timing in self._imports.items() if timing["depth"] == 0
+            },
+        }
+
+
+profiler = StartupProfiler()
+
+def startup_phase(name: str):
+    return profiler.phase(name)
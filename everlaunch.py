@@ -9,20 +9,13 @@
 # This is the main launcher of the whole EverJudge Project.
 # Please use this script to launch the EverJudge Project.
 
+# Flask, SQLAlchemy and the plugins are imported inside the commands that need them,
+# so "info", "status" and "--help" start without loading the web stack.
+
 import click
 import logging
 import sys
 
-from everjudge.api import (
-    create_application,
-    set_main_application,
-    get_main_application,
-    create_plugin_manager,
-    set_plugin_manager,
-    get_plugin_manager,
-    create_logger
-)
-
 _logger = logging.getLogger("EverJudge Launcher")
 
 
@@ -39,12 +32,76 @@ def setup_logging(verbose: bool = False) -> None:
 @click.group()
 @click.version_option(version='0.1.0', prog_name='EverJudge')
 @click.option('--verbose', '-v', is_flag=True, help='Enable verbose logging')
+@click.option('--profile-startup', is_flag=True, help='Record import and startup phase timings; "start" exits once the server is ready')
+@click.option('--profile-output', default=None, help='Where to save the startup profile (./data/bench/ by default)')
 @click.pass_context
-def cli(ctx: click.Context, verbose: bool) -> None:
+def cli(ctx: click.Context, verbose: bool, profile_startup: bool, profile_output: str) -> None:
     ctx.ensure_object(dict)
     ctx.obj['verbose'] = verbose
+    ctx.obj['profile_startup'] = profile_startup
     setup_logging(verbose)
 
+    if profile_startup:
+        from everjudge.profiling import profiler
+        profiler.enable()
+        ctx.call_on_close(lambda: _save_startup_profile(ctx.invoked_subcommand, profile_output))
+
+
+def _save_startup_profile(command: str, output: str) -> None:
+    from everjudge.profiling import profiler
+
+    profile = profiler.report()
+    profiler.disable()
+    from benchmarks.common import make_report, save_report
+
+    report = make_report("startup", {"command": command})
+    report.update(profile)
+
+    click.echo("Startup phases:")
+    for phase in report['phases']:
+        name = "  " * phase['depth'] + phase['name']
+        click.echo(f"  {name:<50}{phase.get('duration_ms', 0.0):>12.3f} ms")
+    click.echo("Slowest imports (self time):")
+    for row in report['slowest_imports'][:15]:
+        click.echo(f"  {row['module']:<50}{row['self_ms']:>12.3f} ms  (cumulative {row['cumulative_ms']:.3f} ms)")
+    click.echo(f"Imported {report['modules_imported']} modules in {report['import_ms']:.3f} ms, total {report['total_ms']:.3f} ms")
+
+    path = save_report(report, output)
+    click.echo(f"Startup profile saved to {path}")
+
+
+def _load_config():
+    # Config.load() is cached, so this costs nothing when the main plugin has already loaded it.
+    from plugins.main.config_loader import Config
+
+    Config.load()
+    return Config
+
+
+def _create_db_application(with_migrate: bool = False):
+    # Only what the database commands need: the config, a bare Flask app and the database extension.
+    # The plugins are not loaded, so none of their routes or background services are set up.
+    from everjudge.api import create_application, set_main_application
+
+    Config = _load_config()
+    app = create_application("EverJudge", "0.0.0.0", 8080, False)
+    set_main_application(app)
+
+    flask_app = app.get_flask_instance()
+    flask_config = Config.get_flask_config()
+    for key, value in flask_config.items():
+        flask_app.config[key] = value
+
+    from everjudge.profiling import startup_phase
+    from plugins.main.database import db, configure_engines
+    with startup_phase("database init"):
+        db.init_app(flask_app)
+        configure_engines(flask_app)
+        if with_migrate:
+            from plugins.main import migrate as migrate_obj
+            migrate_obj.init_app(flask_app, db)
+    return flask_app
+
 
 @cli.command()
 @click.option('--host', '-h', default='0.0.0.0', show_default=True, help='Host to bind to')
@@ -53,6 +110,15 @@ def cli(ctx: click.Context, verbose: bool) -> None:
 @click.option('--workers', '-w', default=1, type=int, help='Number of worker processes (not implemented yet)')
 @click.pass_context
 def start(ctx: click.Context, host: str, port: int, debug: bool, workers: int) -> None:
+    from everjudge.api import (
+        create_application,
+        set_main_application,
+        get_main_application,
+        create_plugin_manager,
+        set_plugin_manager,
+        get_plugin_manager
+    )
+
     verbose = ctx.obj.get('verbose', False)
     setup_logging(verbose or debug)
     
@@ -81,6 +147,10 @@ def start(ctx: click.Context, host: str, port: int, debug: bool, workers: int) -
         
         _logger.info("Loading plugins...")
         get_plugin_manager().load_plugins()
+
+        if ctx.obj.get('profile_startup', False):
+            _logger.info("Startup profiled, not entering the main loop")
+            return
         
         _logger.info("Starting main loop...")
         _logger.info("=" * 60)
@@ -119,12 +189,14 @@ def info(ctx: click.Context) -> None:
 @cli.command()
 @click.pass_context
 def status(ctx: click.Context) -> None:
+    import everjudge_share # The globals alone; importing everjudge.api would pull in Flask.
+
     click.echo("EverJudge Status:")
-    click.echo("  Application: " + ("Running" if get_main_application() else "Not running"))
-    click.echo("  Plugin Manager: " + ("Active" if get_plugin_manager() else "Not initialized"))
+    click.echo("  Application: " + ("Running" if everjudge_share.app else "Not running"))
+    click.echo("  Plugin Manager: " + ("Active" if everjudge_share.pluginmgr else "Not initialized"))
     
-    if get_plugin_manager():
-        supported_langs = get_plugin_manager().get_supported_languages()
+    if everjudge_share.pluginmgr:
+        supported_langs = everjudge_share.pluginmgr.get_supported_languages()
         click.echo(f"  Supported Languages: {', '.join(supported_langs) if supported_langs else 'None'}")
 
 
@@ -182,27 +254,16 @@ def db():
 @click.option('--sample-data', '-s', is_flag=True, help='Create sample data after initialization')
 @click.pass_context
 def init(ctx: click.Context, reset: bool, force: bool, sample_data: bool) -> None:
-    from everjudge.api import create_application, set_main_application
-    from plugins.main.config_loader import Config
     from plugins.main.db_init import init_database, create_sample_data, is_database_initialized
     
     try:
-        Config.load()
+        Config = _load_config()
         Config.ensure_directories()
         
         click.echo("Creating database if not exists...")
         Config.create_database_if_not_exists()
         
-        app = create_application("EverJudge", "0.0.0.0", 8080, False)
-        set_main_application(app)
-        
-        flask_app = app.get_flask_instance()
-        flask_config = Config.get_flask_config()
-        for key, value in flask_config.items():
-            flask_app.config[key] = value
-        
-        from plugins.main.database import db
-        db.init_app(flask_app)
+        flask_app = _create_db_application()
         
         is_initialized = is_database_initialized(flask_app)
         if is_initialized and not reset and not force:
@@ -227,26 +288,15 @@ def init(ctx: click.Context, reset: bool, force: bool, sample_data: bool) -> Non
 @db.command()
 @click.pass_context
 def reset(ctx: click.Context) -> None:
-    from everjudge.api import create_application, set_main_application
-    from plugins.main.config_loader import Config
     from plugins.main.db_init import reset_database
     
     try:
-        Config.load()
+        Config = _load_config()
         
         click.echo("Creating database if not exists...")
         Config.create_database_if_not_exists()
         
-        app = create_application("EverJudge", "0.0.0.0", 8080, False)
-        set_main_application(app)
-        
-        flask_app = app.get_flask_instance()
-        flask_config = Config.get_flask_config()
-        for key, value in flask_config.items():
-            flask_app.config[key] = value
-        
-        from plugins.main.database import db
-        db.init_app(flask_app)
+        flask_app = _create_db_application()
         
         if click.confirm("This will delete all data. Are you sure?"):
             click.echo("Resetting database...")
@@ -264,26 +314,15 @@ def reset(ctx: click.Context) -> None:
 @db.command()
 @click.pass_context
 def info(ctx: click.Context) -> None:
-    from everjudge.api import create_application, set_main_application
-    from plugins.main.config_loader import Config
     from plugins.main.db_init import get_database_info
     
     try:
-        Config.load()
+        Config = _load_config()
         
         click.echo("Creating database if not exists...")
         Config.create_database_if_not_exists()
         
-        app = create_application("EverJudge", "0.0.0.0", 8080, False)
-        set_main_application(app)
-        
-        flask_app = app.get_flask_instance()
-        flask_config = Config.get_flask_config()
-        for key, value in flask_config.items():
-            flask_app.config[key] = value
-        
-        from plugins.main.database import db
-        db.init_app(flask_app)
+        flask_app = _create_db_application()
         
         click.echo("Database Information:")
         click.echo("=" * 40)
@@ -302,25 +341,8 @@ def info(ctx: click.Context) -> None:
 @db.command()
 @click.pass_context
 def init(ctx: click.Context) -> None:
-    from everjudge.api import create_application, set_main_application
-    from plugins.main.config_loader import Config
-    
     try:
-        Config.load()
-        
-        app = create_application("EverJudge", "0.0.0.0", 8080, False)
-        set_main_application(app)
-        
-        flask_app = app.get_flask_instance()
-        flask_config = Config.get_flask_config()
-        for key, value in flask_config.items():
-            flask_app.config[key] = value
-        
-        from plugins.main.database import db
-        from plugins.main import migrate as migrate_obj
-        
-        db.init_app(flask_app)
-        migrate_obj.init_app(flask_app, db)
+        flask_app = _create_db_application(with_migrate=True)
         
         with flask_app.app_context():
             from flask_migrate import init
@@ -337,25 +359,8 @@ def init(ctx: click.Context) -> None:
 @click.option('--message', '-m', required=True, help='Migration message')
 @click.pass_context
 def migrate(ctx: click.Context, message: str) -> None:
-    from everjudge.api import create_application, set_main_application
-    from plugins.main.config_loader import Config
-    
     try:
-        Config.load()
-        
-        app = create_application("EverJudge", "0.0.0.0", 8080, False)
-        set_main_application(app)
-        
-        flask_app = app.get_flask_instance()
-        flask_config = Config.get_flask_config()
-        for key, value in flask_config.items():
-            flask_app.config[key] = value
-        
-        from plugins.main.database import db
-        from plugins.main import migrate as migrate_obj
-        
-        db.init_app(flask_app)
-        migrate_obj.init_app(flask_app, db)
+        flask_app = _create_db_application(with_migrate=True)
         
         with flask_app.app_context():
             from flask_migrate import upgrade, migrate as flask_migrate
@@ -371,25 +376,8 @@ def migrate(ctx: click.Context, message: str) -> None:
 @db.command()
 @click.pass_context
 def upgrade(ctx: click.Context) -> None:
-    from everjudge.api import create_application, set_main_application
-    from plugins.main.config_loader import Config
-    
     try:
-        Config.load()
-        
-        app = create_application("EverJudge", "0.0.0.0", 8080, False)
-        set_main_application(app)
-        
-        flask_app = app.get_flask_instance()
-        flask_config = Config.get_flask_config()
-        for key, value in flask_config.items():
-            flask_app.config[key] = value
-        
-        from plugins.main.database import db
-        from plugins.main import migrate as migrate_obj
-        
-        db.init_app(flask_app)
-        migrate_obj.init_app(flask_app, db)
+        flask_app = _create_db_application(with_migrate=True)
         
         with flask_app.app_context():
             from flask_migrate import upgrade
@@ -406,25 +394,8 @@ def upgrade(ctx: click.Context) -> None:
 @click.option('--revision', '-r', help='Specific revision to downgrade to')
 @click.pass_context
 def downgrade(ctx: click.Context, revision: str) -> None:
-    from everjudge.api import create_application, set_main_application
-    from plugins.main.config_loader import Config
-    
     try:
-        Config.load()
-        
-        app = create_application("EverJudge", "0.0.0.0", 8080, False)
-        set_main_application(app)
-        
-        flask_app = app.get_flask_instance()
-        flask_config = Config.get_flask_config()
-        for key, value in flask_config.items():
-            flask_app.config[key] = value
-        
-        from plugins.main.database import db
-        from plugins.main import migrate as migrate_obj
-        
-        db.init_app(flask_app)
-        migrate_obj.init_app(flask_app, db)
+        flask_app = _create_db_application(with_migrate=True)
         
         with flask_app.app_context():
             from flask_migrate import downgrade
@@ -440,5 +411,138 @@ def downgrade(ctx: click.Context, revision: str) -> None:
         sys.exit(1)
 
 
+@db.command()
+@click.option('--days', '-d', default=180, show_default=True, type=int, help='Archive judged submissions older than this many days')
+@click.option('--before', '-b', default=None, help='Archive judged submissions before this date (YYYY-MM-DD), overrides --days')
+@click.option('--batch-size', default=1000, show_default=True, type=int, help='Submissions moved per transaction')
+@click.option('--dry-run', is_flag=True, help='Only report how many submissions would be archived')
+@click.pass_context
+def archive(ctx: click.Context, days: int, before: str, batch_size: int, dry_run: bool) -> None:
+    import datetime
+
+    try:
+        if before:
+            cutoff = datetime.datetime.strptime(before, '%Y-%m-%d')
+        else:
+            cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=days)
+
+        flask_app = _create_db_application()
+
+        from plugins.main.database import db
+        from plugins.main.archive import archive_submissions, count_archivable
+
+        with flask_app.app_context():
+            db.create_all()
+            pending = count_archivable(cutoff)
+            click.echo(f"{pending} judged submissions before {cutoff.strftime('%Y-%m-%d %H:%M')} can be archived.")
+            if dry_run or pending == 0:
+                return
+            moved = archive_submissions(cutoff, batch_size)
+
+        click.echo(f"Archived {moved} submissions successfully!")
+
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+
+
+@cli.group()
+def bench():
+    """Benchmark suites"""
+    pass
+
+
+def _echo_bench_rows(title: str, rows: dict, columns: list) -> None:
+    click.echo(title)
+    widths = [max(10, len(c) + 2) for c in columns]
+    click.echo("  " + f"{'name':<22}" + "".join(f"{c:>{w}}" for c, w in zip(columns, widths)))
+    for name, row in rows.items():
+        click.echo("  " + f"{name:<22}" + "".join(f"{str(row.get(c, '-')):>{w}}" for c, w in zip(columns, widths)))
+
+
+@bench.command()
+@click.option('--requests', '-n', 'requests_', default=700, show_default=True, type=int, help='Number of measured requests')
+@click.option('--concurrency', '-c', default=8, show_default=True, type=int, help='Number of concurrent clients')
+@click.option('--problems', default=2000, show_default=True, type=int, help='Number of problems to seed')
+@click.option('--users', default=200, show_default=True, type=int, help='Number of users to seed')
+@click.option('--submissions', default=20000, show_default=True, type=int, help='Number of submissions to seed')
+@click.option('--server', is_flag=True, help='Drive a local HTTP server instead of the in-process test client')
+@click.option('--warmup', default=10, show_default=True, type=int, help='Unmeasured warmup requests per client')
+@click.option('--seed', default=0, show_default=True, type=int, help='Random seed for data and request mix')
+@click.option('--workdir', default=None, help='Directory for the scratch database (a temporary one by default)')
+@click.option('--keep', is_flag=True, help='Keep the temporary working directory')
+@click.option('--output', '-o', default=None, help='Where to save the JSON report (./data/bench/ by default)')
+@click.option('--compare', type=click.Path(exists=True, dir_okay=False), help='Previous JSON report to compare against')
+@click.pass_context
+def http(ctx: click.Context, requests_: int, concurrency: int, problems: int, users: int, submissions: int, server: bool,
+         warmup: int, seed: int, workdir: str, keep: bool, output: str, compare: str) -> None:
+    from benchmarks.common import save_report, load_report, compare_reports
+    from benchmarks.http_bench import run_http_benchmark
+
+    try:
+        click.echo(f"Running HTTP benchmark ({'server' if server else 'in-process'}, {concurrency} clients, {requests_} requests)...")
+        report = run_http_benchmark(requests_, concurrency, problems, users, submissions, server, warmup, seed, workdir, keep)
+
+        columns = ['p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request', 'errors']
+        _echo_bench_rows("Scenarios:", report['scenarios'], columns)
+        _echo_bench_rows("Total:", report['total'], columns + ['throughput_rps'])
+
+        path = save_report(report, output)
+        click.echo(f"Report saved to {path}")
+
+        if compare:
+            for line in compare_reports(load_report(compare), report, 'scenarios', ['p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request']):
+                click.echo(line)
+            for line in compare_reports(load_report(compare), report, 'total', ['throughput_rps'])[1:]:
+                click.echo(line)
+
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+
+
+@bench.command()
+@click.option('--language', '-l', 'languages', multiple=True, type=click.Choice(['c', 'cpp', 'python', 'java']), help='Languages to benchmark (all available by default)')
+@click.option('--workload', '-w', 'workloads', multiple=True, type=click.Choice(['many_tiny', 'few_huge', 'tle_heavy', 'output_heavy']), help='Workloads to run (all by default)')
+@click.option('--repeat', '-r', default=2, show_default=True, type=int, help='Submissions per workload and language')
+@click.option('--scale', default=1.0, show_default=True, type=float, help='Multiplier for case counts and sizes')
+@click.option('--seed', default=0, show_default=True, type=int, help='Random seed for generated data')
+@click.option('--workdir', default=None, help='Directory for generated problems (a temporary one by default)')
+@click.option('--keep', is_flag=True, help='Keep the temporary working directory')
+@click.option('--output', '-o', default=None, help='Where to save the JSON report (./data/bench/ by default)')
+@click.option('--compare', type=click.Path(exists=True, dir_okay=False), help='Previous JSON report to compare against')
+@click.pass_context
+def judge(ctx: click.Context, languages: tuple, workloads: tuple, repeat: int, scale: float, seed: int,
+          workdir: str, keep: bool, output: str, compare: str) -> None:
+    from benchmarks.common import save_report, load_report, compare_reports
+    from benchmarks.judge_bench import run_judge_benchmark
+
+    if not ctx.obj.get('verbose', False):
+        # Per-case INFO logs would drown the report and inflate the measured overhead.
+        logging.getLogger("EverJudge Main API").setLevel(logging.WARNING)
+
+    try:
+        click.echo("Running judge benchmark...")
+        report = run_judge_benchmark(list(languages) or None, list(workloads) or None, repeat, scale, seed, workdir, keep)
+
+        for language in report['skipped']:
+            click.echo(f"Skipped {language}: toolchain not found")
+
+        columns = ['compile_ms', 'case_wall_ms_p50', 'overhead_ms_p50', 'overhead_ms_p95', 'submissions_per_s']
+        _echo_bench_rows("Results:", report['results'], columns)
+        _echo_bench_rows("Phases (s):", {"all": report['phases_s']}, list(report['phases_s'].keys()))
+
+        path = save_report(report, output)
+        click.echo(f"Report saved to {path}")
+
+        if compare:
+            for line in compare_reports(load_report(compare), report, 'results', ['compile_ms', 'overhead_ms_p50', 'submissions_per_s']):
+                click.echo(line)
+
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+
+
 if __name__ == '__main__':
     cli()
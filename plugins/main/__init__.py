@@ -7,14 +7,28 @@
 # Copyright Project EverJudge 2025, All Rights Reserved.
 
 import datetime
+import json
 import logging
-from flask import render_template, request
+import queue
+import time
+from flask import Response, abort, jsonify, render_template, request
 from flask_migrate import Migrate
 
 from everjudge.api import *
+from everjudge.profiling import startup_phase
 from .config_loader import Config
-from .database import db
+from .database import db, configure_engines
+from .db_routing import init_routing, read_only
+from .fragment_cache import init_fragment_cache
+from .http_cache import conditional_response, make_etag
+from .compression import init_compression
+from .assets import assets_blueprint, init_assets
+from .rate_limit import init_rate_limits, rate_limited
+from .statement import refresh_statement
+from .json_api import api_blueprint
 from .db_init import init_database
+from .judge_events import broker, poller
+from .archive import submission_history, count_submission_history
 
 _logger = logging.getLogger("EverJudge Main")
 
@@ -23,8 +37,9 @@ migrate = Migrate()
 main_blueprint = create_blueprint("main", "/")
 
 @main_blueprint.route("/")
+@read_only
 def root():
-    from .database import User, Problem, Contest, Leaderboard, Submission, Discussion
+    from .database import User, Problem, Contest, Leaderboard, Discussion
 
     # 从数据库获取公告数据（使用置顶讨论作为公告）
     announcements = []
@@ -44,7 +59,7 @@ def root():
     }
     try:
         stats['total_users'] = User.query.count()
-        stats['total_submissions'] = Submission.query.count()
+        stats['total_submissions'] = count_submission_history()
     except Exception as e:
         _logger.error(f"Error fetching stats: {e}")
 
@@ -100,6 +115,8 @@ def root():
                            top_users=top_users)
 
 @main_blueprint.route("/problems")
+@rate_limited("search", when=lambda: bool(request.args.get('search')))
+@read_only
 def problems():
     from .database import Problem, ProblemSet, Submission, JudgeStatus, db
 
@@ -201,38 +218,156 @@ def problems():
 
 
 @main_blueprint.route("/problems/<int:problem_id>")
+@read_only
 def problem_detail(problem_id):
-    from .database import Problem, Submission, JudgeStatus, TestCase
+    from .database import Problem, JudgeStatus, TestCase
 
     problem = Problem.query.filter_by(id=problem_id, is_visible=True).first_or_404()
+    if refresh_statement(problem):
+        # Saved before statements were rendered on save; render once and keep the result.
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            _logger.error(f"Error storing rendered statement of problem {problem_id}: {e}")
     
     sample_cases = TestCase.query.filter_by(problem_id=problem.id, is_sample=True).all()
     
     acceptance_rate = round(problem.accepted_submissions / problem.total_submissions * 100, 1) if problem.total_submissions > 0 else 0.0
     
     recent_submissions = []
+    submissions = []
     try:
-        submissions = Submission.query.filter_by(problem_id=problem.id).order_by(Submission.submitted_at.desc()).limit(10).all()
+        submissions = submission_history(problem_id=problem.id, limit=10)
         recent_submissions = [
             {
-                'id': s.id,
-                'user_id': s.user_id,
-                'language': s.language,
-                'status': s.status.value,
-                'execution_time': s.execution_time,
-                'memory_usage': s.memory_usage,
-                'submitted_at': s.submitted_at.strftime('%Y-%m-%d %H:%M:%S')
+                'id': s['id'],
+                'user_id': s['user_id'],
+                'language': s['language'],
+                'status': s['status'].value,
+                'execution_time': s['execution_time'],
+                'memory_usage': s['memory_usage'],
+                'submitted_at': s['submitted_at'].strftime('%Y-%m-%d %H:%M:%S')
             }
             for s in submissions
         ]
     except Exception as e:
         _logger.error(f"Error fetching submissions: {e}")
 
-    return render_template('problem_detail.html',
-                           problem=problem,
-                           sample_cases=sample_cases,
-                           acceptance_rate=acceptance_rate,
-                           recent_submissions=recent_submissions)
+    # Everything the page shows, so a repeat visitor gets a 304 without the page being rendered.
+    etag = make_etag(
+        Config.get("cache.fragment_version", 0),
+        problem.id, problem.updated_at, problem.total_submissions, problem.accepted_submissions,
+        [(c.id, c.input_file, c.output_file) for c in sample_cases],
+        [(s['id'], s['status'].value, s['execution_time'], s['memory_usage']) for s in submissions]
+    )
+    last_modified = max([problem.updated_at] + [s['judged_at'] or s['submitted_at'] for s in submissions])
+
+    return conditional_response(etag, last_modified, lambda: render_template(
+        'problem_detail.html',
+        problem=problem,
+        sample_cases=sample_cases,
+        acceptance_rate=acceptance_rate,
+        recent_submissions=recent_submissions
+    ))
+
+
+def _current_submission_event(submission_id):
+    from .database import Submission, SubmissionArchive
+
+    event = broker.last_event(submission_id)
+    if event is not None and poller.is_fresh(event):
+        return event
+
+    # Nobody has published for this submission lately; a judge in another process only updates the row,
+    # so read it again and publish what changed.
+    for model in (Submission, SubmissionArchive):
+        row = model.query.with_entities(
+            model.id,
+            model.status,
+            model.execution_time,
+            model.memory_usage,
+            model.test_cases_passed,
+            model.total_test_cases
+        ).filter_by(id=submission_id).first()
+        if row is not None:
+            break
+    if row is None:
+        return event
+    return poller.refresh(row)
+
+
+def _format_sse(event) -> str:
+    return f"id: {event.sequence}\nevent: {event.kind}\ndata: {json.dumps(event.to_dict())}\n\n"
+
+
+@main_blueprint.route("/submissions/<int:submission_id>/events")
+def submission_events(submission_id):
+    # Subscribe before reading the current state so no event can slip in between.
+    subscription = broker.subscribe(submission_id)
+    try:
+        initial = _current_submission_event(submission_id)
+    except Exception:
+        broker.unsubscribe(submission_id, subscription)
+        raise
+    if initial is None:
+        broker.unsubscribe(submission_id, subscription)
+        abort(404)
+    poller.ensure_running()
+
+    stream_timeout = Config.get("judge.status_stream_timeout", 300)
+    keepalive = Config.get("judge.status_keepalive", 15)
+
+    def stream():
+        try:
+            yield _format_sse(initial)
+            if initial.final:
+                return
+            deadline = time.monotonic() + stream_timeout
+            while time.monotonic() < deadline:
+                try:
+                    event = subscription.get(timeout=keepalive)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _format_sse(event)
+                if event.final:
+                    return
+        finally:
+            broker.unsubscribe(submission_id, subscription)
+
+    return Response(stream(), mimetype="text/event-stream", headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+@main_blueprint.route("/submissions/<int:submission_id>/status")
+def submission_status(submission_id):
+    since = request.args.get('since', 0, type=int)
+    wait = min(request.args.get('wait', 0, type=float), Config.get("judge.status_max_wait", 30))
+
+    subscription = broker.subscribe(submission_id)
+    try:
+        event = _current_submission_event(submission_id)
+        if event is None:
+            abort(404)
+        if event.sequence <= since and not event.final and wait > 0:
+            poller.ensure_running()
+            try:
+                event = subscription.get(timeout=wait)
+            except queue.Empty:
+                pass
+    finally:
+        broker.unsubscribe(submission_id, subscription)
+
+    return jsonify(event.to_dict())
+
+
+def _apply_judge_config(flask_app, changed: set) -> None:
+    # Most [judge] settings are read per request or per submission, so they apply as soon as they change.
+    if "judge.status_poll_interval" in changed:
+        poller.init_app(flask_app, Config.get("judge.status_poll_interval", 1.0))
 
 
 def initialize_plugin():
@@ -257,10 +392,23 @@ def initialize_plugin():
 
         _logger.info("Flask configuration applied")
 
-        db.init_app(flask_app)
-        migrate.init_app(flask_app, db)
+        with startup_phase("database init"):
+            db.init_app(flask_app)
+            configure_engines(flask_app)
+            init_routing(flask_app)
+            migrate.init_app(flask_app, db)
         _logger.info("Database initialized with migration support")
 
+        poller.init_app(flask_app, Config.get("judge.status_poll_interval", 1.0))
+        init_fragment_cache(flask_app)
+        init_compression(flask_app)
+        init_assets(flask_app)
+        init_rate_limits(flask_app)
+
+        if Config.get("server.config_hot_reload", True):
+            Config.on_reload(lambda changed: _apply_judge_config(flask_app, changed))
+            Config.watch()
+
         _logger.info("EverJudge main plugin initialized successfully")
 
     except Exception as e:
@@ -273,6 +421,8 @@ def register_plugin():
     app = get_main_application()
     if app is not None:
         app.register_blueprint(main_blueprint)
+        app.register_blueprint(api_blueprint)
+        app.register_blueprint(assets_blueprint)
     else:
         _logger.warning("Main application not found, skipping blueprint registration")
 
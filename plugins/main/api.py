@@ -9,16 +9,22 @@
 # This is the main API of the whole EverJudge.
 # Due to security problems, please make sure you're using this API instead of using the EverJudge API directly.
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Callable
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 
 import abc
 import logging
+import shlex
+import shutil
 import subprocess
+import threading
 import os
 
+from .streams import OutputLimitExceeded, discard_output, output_exceeded, output_limit_bytes
+
 _logger = logging.getLogger("EverJudge Main API")
 
 
@@ -31,6 +37,7 @@ class JudgeResult(Enum):
     CE = "Compilation Error"
     SE = "System Error"
     PE = "Presentation Error"
+    OLE = "Output Limit Exceeded"
 
 
 @dataclass
@@ -42,6 +49,10 @@ class TestCase:
 
 
 class LanguageProvider(abc.ABC):
+    # Without a cgroup the sandbox limits memory with RLIMIT_AS, which runtimes that reserve
+    # a large heap up front (the JVM) do not survive.
+    limit_address_space = True
+
     def __init__(self, language: str, file_name: str, exec_name: str, input_folder: str, output_folder: str):
         self.lang = language
         self.file_name = file_name
@@ -49,6 +60,11 @@ class LanguageProvider(abc.ABC):
         self.input_ = input_folder
         self.output_ = output_folder
         self._compiled = False
+        self.workdir: Optional[str] = None # Compile and run in the process working directory unless a workspace is attached.
+        self.memory_limit: Optional[int] = None # MB, judge.default_memory_limit when unset; only enforced by the sandbox.
+        self.output_limit: Optional[int] = None # MB, judge.output_limit when unset, see streams.py.
+        self._running = set() # Processes cancel() ends.
+        self._running_lock = threading.Lock()
         _logger.debug(f"LanguageProvider initialized for language: {language}")
 
     @abc.abstractmethod
@@ -69,6 +85,126 @@ class LanguageProvider(abc.ABC):
     def get_run_command(self) -> str:
         return ""
 
+    def get_run_args(self) -> List[str]:
+        return shlex.split(self.get_run_command())
+
+    def get_memory_limit(self) -> int:
+        if self.memory_limit is None:
+            from .config_loader import Config
+            self.memory_limit = Config.get("judge.default_memory_limit", 256)
+        return self.memory_limit
+
+    def get_output_limit(self) -> int:
+        if self.output_limit is None:
+            from .config_loader import Config
+            self.output_limit = Config.get("judge.output_limit", 64)
+        return self.output_limit
+
+    def run_process(self, args: List[str], stdin, stdout, timeout: float) -> tuple[subprocess.CompletedProcess, Any]:
+        # stdin and stdout are binary files; stderr comes back decoded, see streams.py. Returns the RunStats
+        # along with the result, None without the sandbox; cases run in parallel share the provider.
+        from .sandbox import get_sandbox
+        from .streams import StderrReader
+
+        output_limit = output_limit_bytes(self.get_output_limit())
+        sandbox = get_sandbox()
+        if sandbox is None:
+            stats = None
+            stderr = StderrReader()
+            try:
+                process = subprocess.Popen(args, stdin=stdin, stdout=stdout, stderr=stderr, cwd=self.workdir,
+                                           preexec_fn=_limit_output(output_limit) if os.name != "nt" else None)
+            except Exception:
+                stderr.close()
+                raise
+            stderr.start()
+            self._track(process, True)
+            try:
+                process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+                # A "python3 <path>" run ignores SIGXFSZ and may retry failed writes until it times out.
+                if not output_exceeded(stdout, output_limit):
+                    raise
+            finally:
+                self._track(process, False)
+                errors = stderr.close()
+            result = subprocess.CompletedProcess(args, process.returncode, None, errors)
+        else:
+            process = sandbox.spawn(args, stdin, stdout, timeout, cwd=self.workdir, memory_limit=self.get_memory_limit(),
+                                    limit_address_space=self.limit_address_space, output_limit=output_limit)
+            self._track(process, True)
+            try:
+                result, stats = process.wait()
+            finally:
+                self._track(process, False)
+            # A solution whose writes fail may well spin until it times out; the output is what went wrong.
+            if stats.timed_out and not output_exceeded(stdout, output_limit):
+                raise subprocess.TimeoutExpired(args, timeout)
+        if output_exceeded(stdout, output_limit):
+            discard_output(stdout)
+            raise OutputLimitExceeded(output_limit)
+        return result, stats
+
+    def _track(self, process, running: bool) -> None:
+        with self._running_lock:
+            if running:
+                self._running.add(process)
+            else:
+                self._running.discard(process)
+
+    def cancel(self) -> None:
+        # Kills whatever this provider is running; used to abandon test cases still in flight.
+        with self._running_lock:
+            running = list(self._running)
+        for process in running:
+            try:
+                process.kill()
+            except OSError:
+                pass
+
+    def judge_interactive(self, group: int, interactor_args: List[str], timeout: float = 5):
+        # Returns the InteractionResult; its verdict is what judge() would have returned.
+        from .interactive import InteractionResult, run_interactive
+
+        _logger.debug(f"{type(self).__name__}: Judging group {group} interactively")
+        if not self.is_compiled():
+            success, message = self.compile()
+            if not success:
+                return InteractionResult(JudgeResult.CE, message=message)
+        args = self.get_run_args()
+        if not args:
+            return InteractionResult(JudgeResult.SE, message=f"{self.lang} cannot be judged interactively")
+
+        input_file = os.path.abspath(os.path.join(self.input_, f"{group}.in"))
+        output_file = os.path.abspath(os.path.join(self.output_, f"{group}.out"))
+        if not os.path.exists(input_file):
+            return InteractionResult(JudgeResult.SE, message=f"Input file {input_file} not found")
+        result = run_interactive(args, [*interactor_args, input_file, output_file], timeout, cwd=self.workdir,
+                                 memory_limit=self.get_memory_limit(), limit_address_space=self.limit_address_space)
+        _logger.info(f"{type(self).__name__}: Group {group} finished interactively: {result.verdict.value}")
+        return result
+
+    def judge_special(self, group: int, checker, answer_file: str):
+        # Runs the solution, then lets the checker (see checker.py) decide; returns its CheckerResult.
+        from .checker import CheckerResult
+
+        result = self.judge(group)
+        if result != JudgeResult.AC:
+            return CheckerResult(result)
+        input_file = os.path.join(self.input_, f"{group}.in")
+        output_file = os.path.join(self.output_, f"{group}.out")
+        checked = checker.check(input_file, output_file, answer_file)
+        _logger.info(f"{type(self).__name__}: Group {group} checked: {checked.verdict.value} ({checked.score:g})")
+        return checked
+
+    def attach_workspace(self, workspace) -> None:
+        # Stages the source into the workspace; everything after this compiles and runs inside it.
+        self.file_name = os.path.basename(workspace.stage(self.file_name))
+        self.workdir = workspace.path
+        self.set_compiled(False)
+
     def is_compiled(self) -> bool:
         return self._compiled
 
@@ -76,400 +212,296 @@ class LanguageProvider(abc.ABC):
         self._compiled = compiled
 
 
-class PureTextProvider(LanguageProvider):
-    def compile(self) -> tuple[bool, str]:
-        _logger.debug(f"PureTextProvider: Skipping compilation for {self.file_name}")
-        self.set_compiled(True)
-        return True, "No compilation needed for pure text"
+def _limit_output(output_limit: int):
+    def setup() -> None:
+        import resource
+        resource.setrlimit(resource.RLIMIT_FSIZE, (output_limit + 1, output_limit + 1))
+    return setup
 
-    def interpret(self, group: int = 0) -> tuple[bool, str]:
-        _logger.debug(f"PureTextProvider: Interpreting {self.file_name} with group {group}")
-        try:
-            input_file = os.path.join(self.input_, f"{group}.in")
-            output_file = os.path.join(self.output_, f"{group}.out")
-            
-            if not os.path.exists(input_file):
-                return False, f"Input file {input_file} not found"
-            
-            with open(input_file, 'r') as infile, open(output_file, 'w') as outfile:
-                content = infile.read()
-                outfile.write(content)
-            
-            _logger.info(f"PureTextProvider: Successfully interpreted group {group}")
-            return True, "Execution completed"
-        except Exception as e:
-            _logger.error(f"PureTextProvider: Error during interpretation: {e}")
-            return False, str(e)
 
-    def judge(self, group: int = 0) -> JudgeResult:
-        _logger.debug(f"PureTextProvider: Judging group {group}")
-        try:
-            success, message = self.interpret(group)
-            if success:
-                _logger.info(f"PureTextProvider: Group {group} accepted")
-                return JudgeResult.AC
-            else:
-                _logger.warning(f"PureTextProvider: Group {group} failed: {message}")
-                return JudgeResult.RE
-        except Exception as e:
-            _logger.error(f"PureTextProvider: Error during judging: {e}")
-            return JudgeResult.SE
+# Keyword arguments the providers took before they were configured by [language.*].
+_RENAMED_SETTINGS = {"python_cmd": "interpreter", "java_cmd": "compiler", "run_cmd": "runner"}
+
 
+class CommandProvider(LanguageProvider):
+    # Compiles and runs with the command templates of its [language.*] entry. Templates are formatted with
+    # the entry's own settings plus {source}, {exec}, {stem} (the source without its extension) and {flags}
+    # (compile_flags); an empty compile_command means there is nothing to build.
+    # Subclasses adjust the built-in languages through default_settings and the methods below.
+    default_settings: Dict[str, Any] = {}
+    build_step = "Compilation"
 
-class CProvider(LanguageProvider):
-    def __init__(self, language: str, file_name: str, exec_name: str, input_folder: str, output_folder: str, compiler: str = "gcc"):
+    def __init__(self, language: str, file_name: str, exec_name: str, input_folder: str, output_folder: str, **settings):
         super().__init__(language, file_name, exec_name, input_folder, output_folder)
-        self.compiler = compiler
-        self.compile_flags = ["-O2", "-Wall"]
+        for old, new in _RENAMED_SETTINGS.items():
+            if old in settings:
+                settings[new] = settings.pop(old)
+        self.settings: Dict[str, Any] = {**self.default_settings, **settings}
+        if "limit_address_space" in self.settings:
+            self.limit_address_space = bool(self.settings["limit_address_space"])
+        self.time_limit: Optional[float] = None # Seconds, judge.run_timeout when unset.
+
+    def format_command(self, template: str) -> str:
+        flags = self.settings.get("compile_flags", [])
+        values = {key: value for key, value in self.settings.items() if isinstance(value, (str, int, float))}
+        values.update(
+            flags=flags if isinstance(flags, str) else " ".join(shlex.quote(str(flag)) for flag in flags),
+            source=shlex.quote(self.file_name),
+            exec=shlex.quote(self.exec_name),
+            stem=shlex.quote(Path(self.file_name).stem),
+        )
+        return template.format(**values)
 
     def get_compile_command(self) -> str:
-        flags = " ".join(self.compile_flags)
-        return f"{self.compiler} {flags} {self.file_name} -o {self.exec_name}"
+        return self.format_command(self.settings.get("compile_command") or "")
+
+    def get_run_command(self) -> str:
+        return self.format_command(self.settings.get("run_command") or "")
+
+    def get_time_limit(self) -> float:
+        if self.time_limit is None:
+            from .config_loader import Config
+            self.time_limit = Config.get("judge.run_timeout", 5)
+        return self.time_limit
 
     def compile(self) -> tuple[bool, str]:
-        _logger.debug(f"CProvider: Compiling {self.file_name}")
+        name = type(self).__name__
+        command = self.get_compile_command()
+        if not command:
+            self.set_compiled(True)
+            return True, f"No {self.build_step.lower()} needed"
+
+        from .config_loader import Config
+        _logger.debug(f"{name}: {self.build_step} of {self.file_name}")
         try:
-            cmd = self.get_compile_command()
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=30)
-            
+            result = subprocess.run(shlex.split(command), capture_output=True, text=True,
+                                    timeout=Config.get("judge.compile_timeout", 30), cwd=self.workdir)
             if result.returncode == 0:
                 self.set_compiled(True)
-                _logger.info(f"CProvider: Successfully compiled {self.file_name}")
-                return True, "Compilation successful"
-            else:
-                error_msg = result.stderr or result.stdout
-                _logger.error(f"CProvider: Compilation failed: {error_msg}")
-                return False, error_msg
+                _logger.info(f"{name}: {self.build_step} of {self.file_name} succeeded")
+                return True, f"{self.build_step} succeeded"
+            error_msg = result.stderr or result.stdout
+            _logger.error(f"{name}: {self.build_step} failed: {error_msg}")
+            return False, error_msg
         except subprocess.TimeoutExpired:
-            _logger.error(f"CProvider: Compilation timeout for {self.file_name}")
-            return False, "Compilation timeout"
+            _logger.error(f"{name}: {self.build_step} timeout for {self.file_name}")
+            return False, f"{self.build_step} timeout"
         except Exception as e:
-            _logger.error(f"CProvider: Compilation error: {e}")
+            _logger.error(f"{name}: {self.build_step} error: {e}")
             return False, str(e)
 
-    def interpret(self, group: int = 0) -> tuple[bool, str]:
-        _logger.debug(f"CProvider: Interpreting {self.file_name} with group {group}")
+    def run_case(self, group: int = 0) -> tuple[JudgeResult, str]:
+        # The whole of judge() and interpret(): the verdict and what to tell about it.
+        name = type(self).__name__
         if not self.is_compiled():
             success, message = self.compile()
             if not success:
-                return False, f"Compilation failed: {message}"
+                return JudgeResult.CE, f"{self.build_step} failed: {message}"
 
+        input_file = os.path.join(self.input_, f"{group}.in")
+        output_file = os.path.join(self.output_, f"{group}.out")
+        if not os.path.exists(input_file):
+            return JudgeResult.SE, f"Input file {input_file} not found"
         try:
-            input_file = os.path.join(self.input_, f"{group}.in")
-            output_file = os.path.join(self.output_, f"{group}.out")
-            
-            if not os.path.exists(input_file):
-                return False, f"Input file {input_file} not found"
-            
-            with open(input_file, 'r') as infile, open(output_file, 'w') as outfile:
-                result = subprocess.run(
-                    f"./{self.exec_name}",
-                    stdin=infile,
-                    stdout=outfile,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    timeout=5
-                )
-            
-            if result.returncode != 0:
-                _logger.warning(f"CProvider: Execution failed with return code {result.returncode}")
-                return False, f"Runtime error: {result.stderr}"
-            
-            _logger.info(f"CProvider: Successfully interpreted group {group}")
-            return True, "Execution completed"
+            with open(input_file, 'rb') as infile, open(output_file, 'wb') as outfile:
+                result, stats = self.run_process(self.get_run_args(), infile, outfile, timeout=self.get_time_limit())
         except subprocess.TimeoutExpired:
-            _logger.warning(f"CProvider: Execution timeout for group {group}")
-            return False, "Time limit exceeded"
+            _logger.warning(f"{name}: Execution timeout for group {group}")
+            return JudgeResult.TLE, "Time limit exceeded"
+        except OutputLimitExceeded as e:
+            _logger.warning(f"{name}: Output limit exceeded for group {group}")
+            return JudgeResult.OLE, str(e)
         except Exception as e:
-            _logger.error(f"CProvider: Execution error: {e}")
-            return False, str(e)
+            _logger.error(f"{name}: Execution error: {e}")
+            return JudgeResult.SE, str(e)
 
-    def judge(self, group: int = 0) -> JudgeResult:
-        _logger.debug(f"CProvider: Judging group {group}")
-        try:
-            success, message = self.interpret(group)
-            if success:
-                _logger.info(f"CProvider: Group {group} accepted")
-                return JudgeResult.AC
-            else:
-                if "timeout" in message.lower():
-                    return JudgeResult.TLE
-                elif "compilation" in message.lower():
-                    return JudgeResult.CE
-                else:
-                    return JudgeResult.RE
-        except Exception as e:
-            _logger.error(f"CProvider: Error during judging: {e}")
-            return JudgeResult.SE
-
-
-class CppProvider(LanguageProvider):
-    def __init__(self, language: str, file_name: str, exec_name: str, input_folder: str, output_folder: str, compiler: str = "g++"):
-        super().__init__(language, file_name, exec_name, input_folder, output_folder)
-        self.compiler = compiler
-        self.compile_flags = ["-O2", "-Wall", "-std=c++17"]
-
-    def get_compile_command(self) -> str:
-        flags = " ".join(self.compile_flags)
-        return f"{self.compiler} {flags} {self.file_name} -o {self.exec_name}"
-
-    def compile(self) -> tuple[bool, str]:
-        _logger.debug(f"CppProvider: Compiling {self.file_name}")
-        try:
-            cmd = self.get_compile_command()
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=30)
-            
-            if result.returncode == 0:
-                self.set_compiled(True)
-                _logger.info(f"CppProvider: Successfully compiled {self.file_name}")
-                return True, "Compilation successful"
-            else:
-                error_msg = result.stderr or result.stdout
-                _logger.error(f"CppProvider: Compilation failed: {error_msg}")
-                return False, error_msg
-        except subprocess.TimeoutExpired:
-            _logger.error(f"CppProvider: Compilation timeout for {self.file_name}")
-            return False, "Compilation timeout"
-        except Exception as e:
-            _logger.error(f"CppProvider: Compilation error: {e}")
-            return False, str(e)
+        if stats is not None and stats.memory_exceeded:
+            return JudgeResult.MLE, "Memory limit exceeded"
+        if result.returncode != 0:
+            _logger.warning(f"{name}: Execution failed with return code {result.returncode}")
+            return JudgeResult.RE, f"Runtime error: {result.stderr}"
+        return JudgeResult.AC, "Execution completed"
 
     def interpret(self, group: int = 0) -> tuple[bool, str]:
-        _logger.debug(f"CppProvider: Interpreting {self.file_name} with group {group}")
-        if not self.is_compiled():
-            success, message = self.compile()
-            if not success:
-                return False, f"Compilation failed: {message}"
-
-        try:
-            input_file = os.path.join(self.input_, f"{group}.in")
-            output_file = os.path.join(self.output_, f"{group}.out")
-            
-            if not os.path.exists(input_file):
-                return False, f"Input file {input_file} not found"
-            
-            with open(input_file, 'r') as infile, open(output_file, 'w') as outfile:
-                result = subprocess.run(
-                    f"./{self.exec_name}",
-                    stdin=infile,
-                    stdout=outfile,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    timeout=5
-                )
-            
-            if result.returncode != 0:
-                _logger.warning(f"CppProvider: Execution failed with return code {result.returncode}")
-                return False, f"Runtime error: {result.stderr}"
-            
-            _logger.info(f"CppProvider: Successfully interpreted group {group}")
-            return True, "Execution completed"
-        except subprocess.TimeoutExpired:
-            _logger.warning(f"CppProvider: Execution timeout for group {group}")
-            return False, "Time limit exceeded"
-        except Exception as e:
-            _logger.error(f"CppProvider: Execution error: {e}")
-            return False, str(e)
+        _logger.debug(f"{type(self).__name__}: Interpreting {self.file_name} with group {group}")
+        result, message = self.run_case(group)
+        return result == JudgeResult.AC, message
 
     def judge(self, group: int = 0) -> JudgeResult:
-        _logger.debug(f"CppProvider: Judging group {group}")
+        name = type(self).__name__
+        _logger.debug(f"{name}: Judging group {group}")
         try:
-            success, message = self.interpret(group)
-            if success:
-                _logger.info(f"CppProvider: Group {group} accepted")
-                return JudgeResult.AC
-            else:
-                if "timeout" in message.lower():
-                    return JudgeResult.TLE
-                elif "compilation" in message.lower():
-                    return JudgeResult.CE
-                else:
-                    return JudgeResult.RE
+            result, message = self.run_case(group)
         except Exception as e:
-            _logger.error(f"CppProvider: Error during judging: {e}")
+            _logger.error(f"{name}: Error during judging: {e}")
             return JudgeResult.SE
-
-
-class PythonProvider(LanguageProvider):
-    def __init__(self, language: str, file_name: str, exec_name: str, input_folder: str, output_folder: str, python_cmd: str = "python3"):
-        super().__init__(language, file_name, exec_name, input_folder, output_folder)
-        self.python_cmd = python_cmd
-
-    def get_run_command(self) -> str:
-        return f"{self.python_cmd} {self.file_name}"
-
-    def compile(self) -> tuple[bool, str]:
-        _logger.debug(f"PythonProvider: Checking syntax for {self.file_name}")
+        if result == JudgeResult.AC:
+            _logger.info(f"{name}: Group {group} accepted")
+        else:
+            _logger.info(f"{name}: Group {group} failed: {result.value}")
+        return result
+
+
+class PureTextProvider(CommandProvider):
+    def run_case(self, group: int = 0) -> tuple[JudgeResult, str]:
+        input_file = os.path.join(self.input_, f"{group}.in")
+        output_file = os.path.join(self.output_, f"{group}.out")
+        if not os.path.exists(input_file):
+            return JudgeResult.SE, f"Input file {input_file} not found"
         try:
-            result = subprocess.run(
-                [self.python_cmd, "-m", "py_compile", self.file_name],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            
-            if result.returncode == 0:
-                self.set_compiled(True)
-                _logger.info(f"PythonProvider: Syntax check passed for {self.file_name}")
-                return True, "Syntax check passed"
-            else:
-                error_msg = result.stderr or result.stdout
-                _logger.error(f"PythonProvider: Syntax error: {error_msg}")
-                return False, error_msg
-        except subprocess.TimeoutExpired:
-            _logger.error(f"PythonProvider: Syntax check timeout for {self.file_name}")
-            return False, "Syntax check timeout"
+            # Copied by the kernel, never read into the judge.
+            shutil.copyfile(input_file, output_file)
         except Exception as e:
-            _logger.error(f"PythonProvider: Syntax check error: {e}")
-            return False, str(e)
-
-    def interpret(self, group: int = 0) -> tuple[bool, str]:
-        _logger.debug(f"PythonProvider: Interpreting {self.file_name} with group {group}")
-        if not self.is_compiled():
-            success, message = self.compile()
-            if not success:
-                return False, f"Syntax check failed: {message}"
+            _logger.error(f"PureTextProvider: Error during interpretation: {e}")
+            return JudgeResult.SE, str(e)
+        return JudgeResult.AC, "Execution completed"
 
-        try:
-            input_file = os.path.join(self.input_, f"{group}.in")
-            output_file = os.path.join(self.output_, f"{group}.out")
-            
-            if not os.path.exists(input_file):
-                return False, f"Input file {input_file} not found"
-            
-            with open(input_file, 'r') as infile, open(output_file, 'w') as outfile:
-                result = subprocess.run(
-                    [self.python_cmd, self.file_name],
-                    stdin=infile,
-                    stdout=outfile,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    timeout=5
-                )
-            
-            if result.returncode != 0:
-                _logger.warning(f"PythonProvider: Execution failed with return code {result.returncode}")
-                return False, f"Runtime error: {result.stderr}"
-            
-            _logger.info(f"PythonProvider: Successfully interpreted group {group}")
-            return True, "Execution completed"
-        except subprocess.TimeoutExpired:
-            _logger.warning(f"PythonProvider: Execution timeout for group {group}")
-            return False, "Time limit exceeded"
-        except Exception as e:
-            _logger.error(f"PythonProvider: Execution error: {e}")
-            return False, str(e)
 
-    def judge(self, group: int = 0) -> JudgeResult:
-        _logger.debug(f"PythonProvider: Judging group {group}")
-        try:
-            success, message = self.interpret(group)
-            if success:
-                _logger.info(f"PythonProvider: Group {group} accepted")
-                return JudgeResult.AC
-            else:
-                if "timeout" in message.lower():
-                    return JudgeResult.TLE
-                elif "syntax" in message.lower():
-                    return JudgeResult.CE
-                else:
-                    return JudgeResult.RE
-        except Exception as e:
-            _logger.error(f"PythonProvider: Error during judging: {e}")
-            return JudgeResult.SE
+class CProvider(CommandProvider):
+    default_settings = {
+        "compiler": "gcc",
+        "compile_flags": ["-O2", "-Wall"],
+        "compile_command": "{compiler} {flags} {source} -o {exec}",
+        "run_command": "./{exec}",
+    }
 
 
-class JavaProvider(LanguageProvider):
-    def __init__(self, language: str, file_name: str, exec_name: str, input_folder: str, output_folder: str, java_cmd: str = "javac", run_cmd: str = "java"):
-        super().__init__(language, file_name, exec_name, input_folder, output_folder)
-        self.java_cmd = java_cmd
-        self.run_cmd = run_cmd
-        self.class_name = None
+class CppProvider(CProvider):
+    default_settings = dict(CProvider.default_settings, compiler="g++", compile_flags=["-O2", "-Wall", "-std=c++17"])
 
-    def get_compile_command(self) -> str:
-        return f"{self.java_cmd} {self.file_name}"
 
-    def get_run_command(self) -> str:
-        if self.class_name:
-            return f"{self.run_cmd} {self.class_name}"
-        return f"{self.run_cmd} {self.exec_name}"
+class PythonProvider(CommandProvider):
+    default_settings = {
+        "interpreter": "python3",
+        "compile_command": "{interpreter} -m py_compile {source}",
+        "run_command": "{interpreter} {source}",
+        "zygote": False,
+    }
+    build_step = "Syntax check"
+
+    def get_zygote(self):
+        if not self.settings.get("zygote"):
+            return None
+        from .zygote import get_python_zygote
+        return get_python_zygote(self.settings["interpreter"])
+
+    def run_process(self, args: List[str], stdin, stdout, timeout: float) -> tuple[subprocess.CompletedProcess, Any]:
+        from .sandbox import get_sandbox
+
+        zygote = self.get_zygote()
+        if zygote is None:
+            return super().run_process(args, stdin, stdout, timeout)
+        # Memory is only ever limited in the sandbox, with or without the zygote.
+        memory_limit = self.get_memory_limit() if get_sandbox() is not None else None
+        output_limit = output_limit_bytes(self.get_output_limit())
+        run, wait = zygote.spawn(os.path.join(self.workdir or "", self.file_name), stdin, stdout, timeout,
+                                 cwd=self.workdir, memory_limit=memory_limit, output_limit=output_limit)
+        self._track(run, True)
+        try:
+            result, stats = wait()
+        finally:
+            self._track(run, False)
+        if output_exceeded(stdout, output_limit):
+            discard_output(stdout)
+            raise OutputLimitExceeded(output_limit)
+        if stats.timed_out:
+            raise subprocess.TimeoutExpired(args, timeout)
+        return result, stats
 
     def compile(self) -> tuple[bool, str]:
-        _logger.debug(f"JavaProvider: Compiling {self.file_name}")
         try:
-            cmd = self.get_compile_command()
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=30)
-            
-            if result.returncode == 0:
-                self.set_compiled(True)
-                self.class_name = Path(self.file_name).stem
-                _logger.info(f"JavaProvider: Successfully compiled {self.file_name}")
-                return True, "Compilation successful"
-            else:
-                error_msg = result.stderr or result.stdout
-                _logger.error(f"JavaProvider: Compilation failed: {error_msg}")
-                return False, error_msg
-        except subprocess.TimeoutExpired:
-            _logger.error(f"JavaProvider: Compilation timeout for {self.file_name}")
-            return False, "Compilation timeout"
+            zygote = self.get_zygote()
+            if zygote is None:
+                return super().compile()
+            ok, message = zygote.check(os.path.join(self.workdir or "", self.file_name))
         except Exception as e:
-            _logger.error(f"JavaProvider: Compilation error: {e}")
+            _logger.error(f"PythonProvider: Syntax check error: {e}")
             return False, str(e)
+        self.set_compiled(ok)
+        if not ok:
+            _logger.error(f"PythonProvider: Syntax error: {message}")
+            return False, message
+        return True, "Syntax check succeeded"
+
+
+class JavaProvider(CommandProvider):
+    limit_address_space = False
+    default_settings = {
+        "compiler": "javac",
+        "runner": "java",
+        "compile_command": "{compiler} {flags} {source}",
+        "run_command": "{runner} {stem}",
+    }
 
-    def interpret(self, group: int = 0) -> tuple[bool, str]:
-        _logger.debug(f"JavaProvider: Interpreting {self.file_name} with group {group}")
-        if not self.is_compiled():
-            success, message = self.compile()
-            if not success:
-                return False, f"Compilation failed: {message}"
-
-        try:
-            input_file = os.path.join(self.input_, f"{group}.in")
-            output_file = os.path.join(self.output_, f"{group}.out")
-            
-            if not os.path.exists(input_file):
-                return False, f"Input file {input_file} not found"
-            
-            with open(input_file, 'r') as infile, open(output_file, 'w') as outfile:
-                result = subprocess.run(
-                    self.get_run_command().split(),
-                    stdin=infile,
-                    stdout=outfile,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    timeout=5
-                )
-            
-            if result.returncode != 0:
-                _logger.warning(f"JavaProvider: Execution failed with return code {result.returncode}")
-                return False, f"Runtime error: {result.stderr}"
-            
-            _logger.info(f"JavaProvider: Successfully interpreted group {group}")
-            return True, "Execution completed"
-        except subprocess.TimeoutExpired:
-            _logger.warning(f"JavaProvider: Execution timeout for group {group}")
-            return False, "Time limit exceeded"
-        except Exception as e:
-            _logger.error(f"JavaProvider: Execution error: {e}")
-            return False, str(e)
 
-    def judge(self, group: int = 0) -> JudgeResult:
-        _logger.debug(f"JavaProvider: Judging group {group}")
-        try:
-            success, message = self.interpret(group)
-            if success:
-                _logger.info(f"JavaProvider: Group {group} accepted")
-                return JudgeResult.AC
-            else:
-                if "timeout" in message.lower():
-                    return JudgeResult.TLE
-                elif "compilation" in message.lower():
-                    return JudgeResult.CE
-                else:
-                    return JudgeResult.RE
-        except Exception as e:
-            _logger.error(f"JavaProvider: Error during judging: {e}")
-            return JudgeResult.SE
+# Languages by name, each a provider class and the settings its [language.*] entry starts from.
+_languages: Dict[str, tuple] = {}
+_language_aliases: Dict[str, str] = {}
+_languages_lock = threading.Lock()
+
+
+def register_language(name: str, provider: type = CommandProvider, aliases: tuple = (), **settings) -> None:
+    # For plugins: call it when the plugin is imported. The provider is created as
+    # provider(language, file_name, exec_name, input_folder, output_folder, **settings), with the
+    # [language.<name>] entry of the configuration applied over the settings given here.
+    name = name.lower()
+    with _languages_lock:
+        if name in _languages:
+            _logger.warning(f"Language {name} registered again, replacing {_languages[name][0].__name__}")
+        _languages[name] = (provider, settings)
+        for alias in aliases:
+            _language_aliases[alias.lower()] = name
+    _logger.debug(f"Registered language {name} ({provider.__name__})")
+
+
+def get_language(language: str) -> Optional[tuple]:
+    # Returns (provider class, settings) with the configuration applied, None for unknown languages.
+    # A configured language that is not registered may name another one with "extends" and inherit its
+    # provider and settings; otherwise it is a CommandProvider and needs its own templates.
+    from .config_loader import Config
+
+    name = language.lower()
+    name = _language_aliases.get(name, name)
+    seen = []
+    layers = []
+    provider = None
+    while name is not None:
+        if name in seen:
+            _logger.error(f"Circular extends in the configuration of language {language}: {' -> '.join(seen + [name])}")
+            return None
+        seen.append(name)
+        config = dict(Config.get_language_config(name) or {})
+        parent = config.pop("extends", None)
+        layers.append(config)
+        registered = _languages.get(name)
+        if registered is not None:
+            provider = registered[0]
+            layers.append(registered[1])
+            break
+        if parent is None:
+            if not config:
+                return None
+            provider = CommandProvider
+        name = _language_aliases.get(parent.lower(), parent.lower()) if parent is not None else None
+
+    settings: Dict[str, Any] = {}
+    for layer in reversed(layers):
+        settings.update(layer)
+    return provider, settings
+
+
+def get_supported_languages() -> List[str]:
+    from .config_loader import Config
+
+    names = set(_languages) | set(Config.get_languages_config())
+    return sorted(name for name in names if get_language(name) is not None)
+
+
+register_language("c", CProvider)
+register_language("cpp", CppProvider)
+register_language("python", PythonProvider, aliases=("python3",))
+register_language("java", JavaProvider)
+register_language("text", PureTextProvider)
 
 
 class Judger(abc.ABC):
@@ -491,7 +523,9 @@ class Judger(abc.ABC):
         pass
 
     @abc.abstractmethod
-    def judge_all(self, language: str, groups: List[int]) -> List[JudgeResult]:
+    def judge_all(self, language: str, groups: List[int], progress: Optional[Callable[[int, JudgeResult], None]] = None,
+                  stop_on_failure: bool = False, parallel: Optional[int] = None,
+                  problem_id: Optional[int] = None) -> List[Optional[JudgeResult]]:
         pass
 
     def get_supported_languages(self) -> List[str]:
@@ -532,35 +566,143 @@ class StandardJudger(Judger):
             _logger.error(f"Error during judging: {e}")
             return JudgeResult.SE
 
-    def judge_all(self, language: str, groups: List[int]) -> List[JudgeResult]:
-        _logger.info(f"Judging language: {language}, groups: {groups}")
-        results = []
-        for group in groups:
-            result = self.judge(language, group)
-            results.append(result)
-        _logger.info(f"Judging completed for language: {language}, results: {[r.value for r in results]}")
+    def judge_interactive(self, language: str, group: int, interactor_args: List[str]) -> JudgeResult:
+        _logger.info(f"Judging language: {language}, group: {group}, interactively")
+        provider = self.get_provider(language)
+        if not provider:
+            _logger.error(f"No provider found for language: {language}")
+            return JudgeResult.SE
+
+        try:
+            result = provider.judge_interactive(group, interactor_args).verdict
+            _logger.info(f"Judging completed for language: {language}, group: {group}, result: {result.value}")
+            return result
+        except Exception as e:
+            _logger.error(f"Error during interactive judging: {e}")
+            return JudgeResult.SE
+
+    def judge_special(self, language: str, group: int, checker, answer_file: str):
+        from .checker import CheckerResult
+
+        _logger.info(f"Judging language: {language}, group: {group}, with a checker")
+        provider = self.get_provider(language)
+        if not provider:
+            _logger.error(f"No provider found for language: {language}")
+            return CheckerResult(JudgeResult.SE)
+
+        try:
+            result = provider.judge_special(group, checker, answer_file)
+            _logger.info(f"Judging completed for language: {language}, group: {group}, result: {result.verdict.value}")
+            return result
+        except Exception as e:
+            _logger.error(f"Error during special judging: {e}")
+            return CheckerResult(JudgeResult.SE, message=str(e))
+
+    def judge_subtasks(self, language: str, subtasks: list, progress: Optional[Callable[[int, JudgeResult], None]] = None,
+                       judge_case: Optional[Callable[[int], tuple]] = None, problem_id: Optional[int] = None) -> list:
+        # Skips what can no longer change the score, see subtasks.py. judge_case(group) -> (JudgeResult, fraction)
+        # replaces plain judging, e.g. with a special judge. problem_id works as for judge_all, within each subtask.
+        from .subtasks import run_subtasks
+
+        _logger.info(f"Judging language: {language}, subtasks: {[subtask.number for subtask in subtasks]}")
+        if problem_id is not None:
+            from .ordering import order_groups
+            subtasks = [replace(subtask, cases=order_groups(problem_id, subtask.cases)) for subtask in subtasks]
+        if judge_case is None:
+            def judge_case(group: int) -> tuple:
+                result = self.judge(language, group)
+                return result, 1.0 if result == JudgeResult.AC else 0.0
+        results = run_subtasks(subtasks, judge_case, progress)
+        _logger.info(f"Judging completed for language: {language}, score: {sum(r.score for r in results):g}/{sum(r.full_score for r in results):g}")
+        if problem_id is not None:
+            from .ordering import record_case_results
+            verdicts: Dict[int, Optional[JudgeResult]] = {}
+            for result in results:
+                for case, verdict in result.cases.items():
+                    if verdicts.get(case) is None:
+                        verdicts[case] = verdict
+            record_case_results(problem_id, verdicts)
         return results
 
+    def judge_all(self, language: str, groups: List[int], progress: Optional[Callable[[int, JudgeResult], None]] = None,
+                  stop_on_failure: bool = False, parallel: Optional[int] = None,
+                  problem_id: Optional[int] = None) -> List[Optional[JudgeResult]]:
+        # With stop_on_failure (ICPC mode) the first failure ends the judging: cases after it, and cases
+        # still running next to it, are cancelled and reported as None. With problem_id the cases run in
+        # judge.case_order and their verdicts go into the failure rates of the problem's test cases, see
+        # ordering.py; results are in the order of groups either way.
+        if parallel is None:
+            from .config_loader import Config
+            parallel = Config.get("judge.parallel_cases", 1)
+        _logger.info(f"Judging language: {language}, groups: {groups}")
+        results: List[Optional[JudgeResult]] = [None] * len(groups)
+        order = list(range(len(groups)))
+        if problem_id is not None:
+            from .ordering import order_groups
+            rank = {group: index for index, group in enumerate(order_groups(problem_id, groups))}
+            order.sort(key=lambda index: rank[groups[index]])
+        failed = threading.Event()
+        lock = threading.Lock()
+
+        def run(index: int) -> None:
+            if failed.is_set():
+                return
+            result = self.judge(language, groups[index])
+            with lock:
+                if failed.is_set():
+                    return # Cancelled while running; whatever it reports now means nothing.
+                results[index] = result
+                if stop_on_failure and result != JudgeResult.AC:
+                    failed.set()
+                    provider = self.get_provider(language)
+                    if provider is not None:
+                        provider.cancel()
+            report(index, result)
+
+        def report(index: int, result: JudgeResult) -> None:
+            if progress is not None:
+                try:
+                    progress(groups[index], result)
+                except Exception as e:
+                    _logger.error(f"Error reporting progress for group {groups[index]}: {e}")
 
-def create_language_provider(language: str, file_name: str, exec_name: str, input_folder: str, output_folder: str, **kwargs) -> Optional[LanguageProvider]:
-    provider_map = {
-        "c": CProvider,
-        "cpp": CppProvider,
-        "python": PythonProvider,
-        "python3": PythonProvider,
-        "java": JavaProvider,
-        "text": PureTextProvider,
-    }
+        provider = self.get_provider(language)
+        if parallel > 1 and len(groups) > 1 and provider is not None and not provider.is_compiled():
+            # Built once up front rather than by every case at the same time; a failed build fails them all.
+            compiled, message = provider.compile()
+            if not compiled:
+                _logger.info(f"Compilation failed for language: {language}, all {len(groups)} test cases are CE")
+                results = [JudgeResult.CE] * len(groups)
+                for index in range(len(groups)):
+                    report(index, JudgeResult.CE)
+                return results
+        if parallel > 1 and len(groups) > 1 and provider is not None:
+            with ThreadPoolExecutor(max_workers=parallel, thread_name_prefix="EverJudge Case") as executor:
+                list(executor.map(run, order))
+        else:
+            for index in order:
+                run(index)
+                if failed.is_set():
+                    break
+        if failed.is_set():
+            _logger.info(f"Cancelled {results.count(None)} test cases after the first failure")
+        _logger.info(f"Judging completed for language: {language}, results: {[r.value if r else None for r in results]}")
+        if problem_id is not None:
+            from .ordering import record_case_results
+            record_case_results(problem_id, dict(zip(groups, results)))
+        return results
 
-    language_lower = language.lower()
-    provider_class = provider_map.get(language_lower)
 
-    if not provider_class:
+def create_language_provider(language: str, file_name: str, exec_name: str, input_folder: str, output_folder: str, **kwargs) -> Optional[LanguageProvider]:
+    # kwargs override the settings of the language, see get_language.
+    spec = get_language(language)
+    if spec is None:
         _logger.error(f"Unsupported language: {language}")
         return None
 
+    provider_class, settings = spec
     _logger.info(f"Creating language provider for: {language}")
-    return provider_class(language, file_name, exec_name, input_folder, output_folder, **kwargs)
+    return provider_class(language, file_name, exec_name, input_folder, output_folder, **{**settings, **kwargs})
 
 
 def create_judger(judger_type: str = "standard", languages: Optional[List[str]] = None) -> Optional[Judger]:
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+# archive.py
+# Submission archival for EverJudge
+# @author: Ayanami_404<jiyizhuo2011@hotmail.com>
+# @maintainer: Project EverJudge
+# @license: BSD 3-Clause License
+# @version: 0.1.0
+# Copyright Project EverJudge 2025, All Rights Reserved.
+
+# Judged submissions older than a cutoff are moved from "submissions" into "submissions_archive".
+# Problem and leaderboard counters are stored columns, so moving rows does not change them.
+# Pending and running submissions are never archived, whatever their age.
+# Ids are carried over, so the newest submission always stays hot: SQLite, and MySQL before 8.0 after a
+# restart, hand out max(id) + 1 of the hot table, which would otherwise reuse ids already in the archive.
+
+import datetime
+import logging
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, func, insert, literal, select
+
+from .database import db, Submission, SubmissionArchive, JudgeStatus
+
+_logger = logging.getLogger("EverJudge Archive")
+
+_ARCHIVED_COLUMNS = [
+    'id', 'user_id', 'problem_id', 'language', 'source_hash', 'status', 'execution_time', 'memory_usage',
+    'error_message', 'submitted_at', 'judged_at', 'test_cases_passed', 'total_test_cases'
+]
+
+_HISTORY_COLUMNS = [
+    'id', 'user_id', 'problem_id', 'language', 'status', 'execution_time', 'memory_usage',
+    'submitted_at', 'judged_at', 'test_cases_passed', 'total_test_cases'
+]
+
+_UNFINISHED = (JudgeStatus.PENDING, JudgeStatus.RUNNING)
+
+
+def _archivable(cutoff: datetime.datetime):
+    newest = select(func.max(Submission.id)).scalar_subquery()
+    return select(Submission.id).where(
+        Submission.submitted_at < cutoff,
+        Submission.status.notin_(_UNFINISHED),
+        Submission.id < newest
+    )
+
+
+def count_archivable(cutoff: datetime.datetime) -> int:
+    return db.session.execute(
+        select(func.count()).select_from(_archivable(cutoff).subquery())
+    ).scalar()
+
+
+def archive_submissions(cutoff: datetime.datetime, batch_size: int = 1000) -> int:
+    _logger.info(f"Archiving submissions judged before {cutoff.isoformat()}...")
+    hot_columns = [getattr(Submission, c) for c in _ARCHIVED_COLUMNS]
+    archived_at = datetime.datetime.utcnow()
+    moved = 0
+
+    while True:
+        ids = db.session.execute(_archivable(cutoff).order_by(Submission.id).limit(batch_size)).scalars().all()
+        if not ids:
+            break
+
+        # Copy and delete in one transaction per batch, so an interrupted run never loses or duplicates rows.
+        try:
+            db.session.execute(
+                insert(SubmissionArchive).from_select(
+                    _ARCHIVED_COLUMNS + ['archived_at'],
+                    select(*hot_columns, literal(archived_at)).where(Submission.id.in_(ids))
+                )
+            )
+            db.session.execute(delete(Submission).where(Submission.id.in_(ids)))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        moved += len(ids)
+        _logger.info(f"Archived {moved} submissions so far")
+
+    _logger.info(f"Archiving completed, {moved} submissions moved")
+    return moved
+
+
+def _history_query(model, problem_id: Optional[int], user_id: Optional[int]):
+    query = select(*[getattr(model, c) for c in _HISTORY_COLUMNS])
+    if problem_id is not None:
+        query = query.where(model.problem_id == problem_id)
+    if user_id is not None:
+        query = query.where(model.user_id == user_id)
+    return query
+
+
+def submission_history(problem_id: Optional[int] = None, user_id: Optional[int] = None,
+                       limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+    # Archived rows are all older than anything still hot (apart from stuck pending rows),
+    # so the hot table is read first and the archive only when a page reaches past it.
+    hot = db.session.execute(
+        _history_query(Submission, problem_id, user_id)
+        .order_by(Submission.submitted_at.desc(), Submission.id.desc())
+        .offset(offset).limit(limit)
+    ).mappings().all()
+    rows = [dict(row, archived=False) for row in hot]
+    if len(rows) >= limit:
+        return rows
+
+    if rows or offset == 0:
+        archive_offset = 0
+    else:
+        hot_total = db.session.execute(
+            select(func.count()).select_from(_history_query(Submission, problem_id, user_id).subquery())
+        ).scalar()
+        archive_offset = max(0, offset - hot_total)
+
+    cold = db.session.execute(
+        _history_query(SubmissionArchive, problem_id, user_id)
+        .order_by(SubmissionArchive.submitted_at.desc(), SubmissionArchive.id.desc())
+        .offset(archive_offset).limit(limit - len(rows))
+    ).mappings().all()
+    rows.extend(dict(row, archived=True) for row in cold)
+    return rows
+
+
+def count_submission_history(problem_id: Optional[int] = None, user_id: Optional[int] = None) -> int:
+    total = 0
+    for model in (Submission, SubmissionArchive):
+        total += db.session.execute(
+            select(func.count()).select_from(_history_query(model, problem_id, user_id).subquery())
+        ).scalar()
+    return total
+
+
+def get_submission(submission_id: int):
+    submission = db.session.get(Submission, submission_id)
+    if submission is None:
+        submission = db.session.get(SubmissionArchive, submission_id)
+    return submission
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+# assets.py
+# Fingerprinted static assets for EverJudge
+# @author: Ayanami_404<jiyizhuo2011@hotmail.com>
+# @maintainer: Project EverJudge
+# @license: BSD 3-Clause License
+# @version: 0.1.0
+# Copyright Project EverJudge 2025, All Rights Reserved.
+
+# Templates link shared CSS and JS with {{ asset_url('css/everjudge.css') }}, which yields
+# /assets/css/everjudge.<hash>.css. The hash changes with the content, so these URLs are cached by browsers
+# for a year and never revalidated. Every file is read and compressed once at startup and served from memory.
+
+import hashlib
+import logging
+import mimetypes
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from flask import Response, abort
+
+from everjudge.api import create_blueprint
+from .compression import COMPRESSIBLE_MIMETYPES, ENCODINGS, compress, negotiate_encoding
+
+_logger = logging.getLogger("EverJudge Assets")
+
+assets_blueprint = create_blueprint("assets", "/assets")
+
+_IMMUTABLE = "public, max-age=31536000, immutable"
+
+# Ahead of time the strongest settings are affordable.
+_PRECOMPRESS_LEVEL = {"br": 11, "gzip": 9}
+
+
+@dataclass
+class Asset:
+    name: str
+    fingerprinted: str
+    digest: str
+    mimetype: str
+    mtime: float
+    variants: Dict[Optional[str], bytes] = field(default_factory=dict)
+
+
+def _fingerprint(name: str, digest: str) -> str:
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{digest}{ext}"
+
+
+class AssetManifest(object):
+    def __init__(self):
+        self._directory: Optional[str] = None
+        self._assets: Dict[str, Asset] = {}
+        self._by_fingerprint: Dict[str, Asset] = {}
+        self._auto_reload = False
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app, directory: str) -> None:
+        self._directory = os.path.abspath(directory)
+        # Under the debug server edited files get a new fingerprint on the next page load.
+        self._auto_reload = app.debug
+        self.build()
+        app.jinja_env.globals["asset_url"] = self.url
+
+    def _load(self, name: str) -> Asset:
+        path = os.path.join(self._directory, name)
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()[:10]
+        mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        asset = Asset(name, _fingerprint(name, digest), digest, mimetype, os.path.getmtime(path), {None: data})
+        if mimetype in COMPRESSIBLE_MIMETYPES:
+            for encoding in ENCODINGS:
+                compressed = compress(data, encoding, _PRECOMPRESS_LEVEL[encoding])
+                if len(compressed) < len(data):
+                    asset.variants[encoding] = compressed
+        return asset
+
+    def _add(self, asset: Asset) -> None:
+        previous = self._assets.get(asset.name)
+        if previous is not None:
+            self._by_fingerprint.pop(previous.fingerprinted, None)
+        self._assets[asset.name] = asset
+        self._by_fingerprint[asset.fingerprinted] = asset
+        self._version = None
+
+    def build(self) -> None:
+        with self._lock:
+            self._assets.clear()
+            self._by_fingerprint.clear()
+            self._version = None
+            if not os.path.isdir(self._directory):
+                _logger.warning(f"Static directory {self._directory} not found, no assets to serve")
+                return
+            for root, _, files in os.walk(self._directory):
+                for filename in files:
+                    name = os.path.relpath(os.path.join(root, filename), self._directory).replace(os.sep, "/")
+                    try:
+                        self._add(self._load(name))
+                    except OSError as e:
+                        _logger.error(f"Unable to load asset {name}: {e}")
+        _logger.info(f"Loaded {len(self._assets)} static assets")
+
+    def _refresh(self, name: str) -> None:
+        asset = self._assets.get(name)
+        try:
+            mtime = os.path.getmtime(os.path.join(self._directory, name))
+        except OSError:
+            return
+        if asset is None or asset.mtime != mtime:
+            with self._lock:
+                self._add(self._load(name))
+
+    def url(self, name: str) -> str:
+        if self._auto_reload:
+            self._refresh(name)
+        asset = self._assets.get(name)
+        if asset is None:
+            raise KeyError(f"Unknown static asset: {name}")
+        return f"{assets_blueprint.url_prefix}/{asset.fingerprinted}"
+
+    def get(self, fingerprinted: str) -> Optional[Asset]:
+        return self._by_fingerprint.get(fingerprinted)
+
+    @property
+    def version(self) -> str:
+        # Changes whenever any asset URL does, so pages linking the old URLs can be told apart.
+        version = self._version
+        if version is None:
+            with self._lock:
+                names = "\n".join(sorted(self._by_fingerprint))
+            version = self._version = hashlib.sha1(names.encode("utf-8")).hexdigest()[:10]
+        return version
+
+
+manifest = AssetManifest()
+
+
+@assets_blueprint.route("/<path:filename>")
+def serve_asset(filename):
+    asset = manifest.get(filename)
+    if asset is None:
+        abort(404)
+
+    encoding = negotiate_encoding([e for e in asset.variants if e is not None])
+    response = Response(asset.variants[encoding], mimetype=asset.mimetype)
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+    if len(asset.variants) > 1:
+        response.vary.add("Accept-Encoding")
+    response.set_etag(f"{asset.digest}-{encoding}" if encoding else asset.digest)
+    response.headers["Cache-Control"] = _IMMUTABLE
+    return response
+
+
+def init_assets(flask_app) -> None:
+    from .config_loader import Config
+
+    manifest.init_app(flask_app, Config.get("server.static_dir", "./static"))
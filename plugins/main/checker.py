@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+# checker.py
+# Special judge (custom checker) support for EverJudge
+# @author: Ayanami_404<jiyizhuo2011@hotmail.com>
+# @maintainer: Project EverJudge
+# @license: BSD 3-Clause License
+# @version: 0.1.0
+# Copyright Project EverJudge 2025, All Rights Reserved.
+
+# A problem with Problem.checker_file is judged by its checker instead of by the solution's exit status.
+# Checkers are testlib style: "<checker> <input> <output> <answer>", with the verdict in the exit code:
+#   0 AC, 1 WA, 2 PE, 7 partial (the message starts with the score, 0 to 1),
+#   16 + n partial with n percent (testlib's _pc(n)), anything else is the checker failing (SE).
+# The score is a fraction of the test case's score.
+#
+# Sources are built once per version: the executable is cached under judge.checker_cache_dir, keyed by the
+# SHA-256 of the source and the command building it, so editing a checker builds it again and nothing else does.
+# The cache is shared by every judge process on the host; a build is moved into place in one rename.
+# C and C++ sources are compiled, Python sources are run as they are. Interactors are built the same way.
+#
+# Spawning a checker per test case is often more expensive than the check itself. A checker that speaks the
+# persistent protocol (Problem.checker_persistent) is started once with --persistent and kept for the next
+# test, and the next judging: it reads "<input>\t<output>\t<answer>\n" per test from stdin and answers
+# "<exit code> <message>\n" on stdout. Up to judge.checker_pool_size idle processes are kept per checker.
+
+import hashlib
+import logging
+import os
+import selectors
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from .api import JudgeResult
+
+_logger = logging.getLogger("EverJudge Checker")
+
+_BUILD_COMMANDS = {
+    ".c": ["gcc", "-O2", "-o", "{exec}", "{source}", "-lm"],
+    ".cpp": ["g++", "-O2", "-std=c++17", "-o", "{exec}", "{source}"],
+    ".cc": ["g++", "-O2", "-std=c++17", "-o", "{exec}", "{source}"],
+    ".cxx": ["g++", "-O2", "-std=c++17", "-o", "{exec}", "{source}"],
+}
+
+_TESTLIB_VERDICTS = {
+    0: JudgeResult.AC,
+    1: JudgeResult.WA,
+    2: JudgeResult.PE,
+}
+
+_POINTS = 7
+_PARTIALLY = 16
+
+
+@dataclass
+class CheckerResult:
+    verdict: JudgeResult
+    score: float = 0.0 # Fraction of the test case's score.
+    message: str = ""
+
+
+def parse_verdict(exit_code: int, message: str) -> CheckerResult:
+    message = message.strip()
+    if exit_code in _TESTLIB_VERDICTS:
+        verdict = _TESTLIB_VERDICTS[exit_code]
+        return CheckerResult(verdict, 1.0 if verdict == JudgeResult.AC else 0.0, message)
+
+    score = None
+    if exit_code == _POINTS:
+        points, _, rest = message.partition(" ")
+        try:
+            score, message = float(points), rest.strip()
+        except ValueError:
+            pass
+    elif _PARTIALLY <= exit_code <= _PARTIALLY + 100:
+        score = (exit_code - _PARTIALLY) / 100
+    if score is None:
+        _logger.error(f"Checker failed with exit code {exit_code}: {message}")
+        return CheckerResult(JudgeResult.SE, 0.0, message)
+
+    score = min(max(score, 0.0), 1.0)
+    return CheckerResult(JudgeResult.AC if score >= 1.0 else JudgeResult.WA, score, message)
+
+
+class CheckerCache(object):
+    def __init__(self, root: str):
+        self._root = os.path.abspath(root)
+        self._built: Dict[Tuple[str, int, int], List[str]] = {}
+        self._locks: Dict[str, threading.Lock] = {} # Per digest, created under _lock.
+        self._lock = threading.Lock()
+        os.makedirs(self._root, exist_ok=True)
+
+    @property
+    def root(self) -> str:
+        return self._root
+
+    def build(self, source: str) -> List[str]:
+        # Returns the command running the checker; an unchanged file is not even hashed again.
+        source = os.path.abspath(source)
+        stat = os.stat(source)
+        key = (source, stat.st_mtime_ns, stat.st_size)
+        args = self._built.get(key)
+        if args is not None:
+            return args
+
+        ext = os.path.splitext(source)[1].lower()
+        if ext == ".py":
+            args = [sys.executable, source]
+        elif ext in _BUILD_COMMANDS:
+            args = [self._compile(source, _BUILD_COMMANDS[ext])]
+        else:
+            # Anything else is taken to be a ready executable.
+            args = [source]
+        with self._lock:
+            self._built[key] = args
+        return args
+
+    def _compile(self, source: str, command: List[str]) -> str:
+        with open(source, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(" ".join(command).encode("utf-8") + b"\0" + data).hexdigest()
+        target = os.path.join(self._root, digest, "checker")
+        if os.path.exists(target):
+            return target
+
+        with self._lock:
+            lock = self._locks.setdefault(digest, threading.Lock())
+        with lock:
+            if os.path.exists(target):
+                return target
+            from .config_loader import Config
+
+            build_dir = tempfile.mkdtemp(prefix=f".build-{digest[:12]}-", dir=self._root)
+            try:
+                staged = os.path.join(build_dir, os.path.basename(source))
+                shutil.copyfile(source, staged)
+                executable = os.path.join(build_dir, "checker")
+                result = subprocess.run(
+                    [part.format(exec=executable, source=staged) for part in command],
+                    capture_output=True, text=True, timeout=Config.get("judge.compile_timeout", 30), cwd=build_dir
+                )
+                if result.returncode != 0:
+                    raise RuntimeError(f"Unable to compile checker {source}: {result.stderr or result.stdout}")
+                os.unlink(staged)
+                try:
+                    os.rename(build_dir, os.path.dirname(target))
+                except OSError:
+                    # Another judge process finished the same build first.
+                    shutil.rmtree(build_dir, ignore_errors=True)
+            except Exception:
+                shutil.rmtree(build_dir, ignore_errors=True)
+                raise
+        _logger.info(f"Compiled checker {source} ({digest[:12]})")
+        return target
+
+
+class _PersistentChecker(object):
+    def __init__(self, args: List[str]):
+        self.args = args
+        self.process = subprocess.Popen(
+            [*args, "--persistent"], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        self._pending = b""
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def check(self, input_file: str, output_file: str, answer_file: str, timeout: float) -> CheckerResult:
+        self.process.stdin.write(f"{input_file}\t{output_file}\t{answer_file}\n".encode("utf-8"))
+        self.process.stdin.flush()
+        line = self._read_line(timeout)
+        code, _, message = line.decode("utf-8", errors="replace").partition(" ")
+        return parse_verdict(int(code), message)
+
+    def _read_line(self, timeout: float) -> bytes:
+        deadline = time.monotonic() + timeout
+        fd = self.process.stdout.fileno()
+        with selectors.DefaultSelector() as selector:
+            selector.register(fd, selectors.EVENT_READ)
+            while b"\n" not in self._pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not selector.select(remaining):
+                    raise subprocess.TimeoutExpired(self.args, timeout)
+                data = os.read(fd, 65536)
+                if not data:
+                    raise EOFError("Checker exited")
+                self._pending += data
+        line, _, self._pending = self._pending.partition(b"\n")
+        return line
+
+    def close(self) -> None:
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=1)
+        except Exception:
+            self.process.kill()
+            self.process.wait()
+
+
+class Checker(object):
+    def __init__(self, args: List[str], persistent: bool = False, timeout: Optional[float] = None):
+        from .config_loader import Config
+
+        self.args = args
+        self.persistent = persistent
+        self.timeout = timeout if timeout is not None else Config.get("judge.checker_timeout", 10)
+
+    def check(self, input_file: str, output_file: str, answer_file: str) -> CheckerResult:
+        paths = [os.path.abspath(path) for path in (input_file, output_file, answer_file)]
+        if self.persistent:
+            return self._check_persistent(*paths)
+        return self._check_once(*paths)
+
+    def _check_once(self, input_file: str, output_file: str, answer_file: str) -> CheckerResult:
+        from .sandbox import get_runner
+
+        try:
+            result, stats = get_runner(trusted=True).run([*self.args, input_file, output_file, answer_file],
+                                                         subprocess.DEVNULL, subprocess.DEVNULL, self.timeout)
+        except Exception as e:
+            _logger.error(f"Unable to run checker {self.args[-1]}: {e}")
+            return CheckerResult(JudgeResult.SE, message=str(e))
+        if stats.timed_out:
+            _logger.error(f"Checker {self.args[-1]} timed out")
+            return CheckerResult(JudgeResult.SE, message="Checker timed out")
+        return parse_verdict(result.returncode, result.stderr)
+
+    def _check_persistent(self, input_file: str, output_file: str, answer_file: str) -> CheckerResult:
+        process = None
+        try:
+            process = _pool.acquire(self.args)
+            result = process.check(input_file, output_file, answer_file, self.timeout)
+        except Exception as e:
+            _logger.error(f"Persistent checker {self.args[-1]} failed: {e}")
+            if process is not None:
+                process.process.kill()
+                process.close()
+            return CheckerResult(JudgeResult.SE, message=str(e))
+        _pool.release(process)
+        return result
+
+
+class _CheckerPool(object):
+    def __init__(self):
+        self._idle: Dict[Tuple[str, ...], List[_PersistentChecker]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def acquire(self, args: List[str]) -> _PersistentChecker:
+        with self._lock:
+            idle = self._idle[tuple(args)]
+            while idle:
+                process = idle.pop()
+                if process.alive():
+                    return process
+                process.close()
+        return _PersistentChecker(args)
+
+    def release(self, process: _PersistentChecker) -> None:
+        from .config_loader import Config
+
+        with self._lock:
+            idle = self._idle[tuple(process.args)]
+            if process.alive() and len(idle) < Config.get("judge.checker_pool_size", 2):
+                idle.append(process)
+                return
+        process.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, defaultdict(list)
+        for processes in idle.values():
+            for process in processes:
+                process.close()
+
+
+_pool = _CheckerPool()
+
+_cache: Optional[CheckerCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_checker_cache() -> CheckerCache:
+    global _cache
+    if _cache is None:
+        from .config_loader import Config
+
+        with _cache_lock:
+            if _cache is None:
+                root = Config.get("judge.checker_cache_dir", "") or os.path.join(Config.get("judge.temp_dir", "./temp"), "checkers")
+                _cache = CheckerCache(root)
+    return _cache
+
+
+def load_checker(source: str, persistent: bool = False) -> Checker:
+    return Checker(get_checker_cache().build(source), persistent)
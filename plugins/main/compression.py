@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# compression.py
+# Response compression for EverJudge
+# @author: Ayanami_404<jiyizhuo2011@hotmail.com>
+# @maintainer: Project EverJudge
+# @license: BSD 3-Clause License
+# @version: 0.1.0
+# Copyright Project EverJudge 2025, All Rights Reserved.
+
+# Text responses of at least server.compression_min_size bytes are compressed with brotli when it is
+# installed and the client accepts it, otherwise with gzip. Streams (the judge event stream), 304s and
+# responses that are already encoded, like the precompressed static assets, are left alone.
+
+import gzip
+import logging
+from typing import Optional
+
+from flask import request
+
+try:
+    import brotli # Optional, only gzip is offered without it.
+except ImportError:
+    brotli = None
+
+_logger = logging.getLogger("EverJudge Compression")
+
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+COMPRESSIBLE_MIMETYPES = {
+    "text/html",
+    "text/css",
+    "text/plain",
+    "text/javascript",
+    "application/javascript",
+    "application/json",
+    "image/svg+xml",
+}
+
+
+def negotiate_encoding(available=ENCODINGS) -> Optional[str]:
+    return request.accept_encodings.best_match(available)
+
+
+def compress(data: bytes, encoding: str, level: int) -> bytes:
+    # level follows gzip (1-9); brotli's quality goes up to 11, which is only worth it ahead of time.
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    elif encoding == "gzip":
+        return gzip.compress(data, compresslevel=min(level, 9), mtime=0)
+    else:
+        raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def _compress_response(response, min_size: int, level: int):
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or "Content-Encoding" in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    # The body depends on Accept-Encoding from here on, whether or not this client gets it compressed.
+    response.vary.add("Accept-Encoding")
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return response
+
+    compressed = compress(data, encoding, level)
+    if len(compressed) >= len(data):
+        return response
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+
+    # The compressed bytes differ from the uncompressed ones, so a strong validator no longer holds.
+    etag, weak = response.get_etag()
+    if etag is not None and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(flask_app) -> None:
+    from .config_loader import Config
+
+    if not Config.get("server.compression_enabled", True):
+        return
+    min_size = Config.get("server.compression_min_size", 1024)
+    level = Config.get("server.compression_level", 6)
+
+    @flask_app.after_request
+    def _compress(response):
+        try:
+            return _compress_response(response, min_size, level)
+        except Exception as e:
+            _logger.error(f"Error compressing response: {e}")
+            return response
+
+    _logger.info(f"Response compression enabled ({', '.join(ENCODINGS)})")
@@ -7,9 +7,18 @@
 # @version: 0.1.0
 # Copyright Project EverJudge 2025, All Rights Reserved.
 
+# The TOML file is parsed once, checked against _SCHEMA and flattened into a read-only table,
+# so Config.get() is a single dictionary lookup. With server.config_hot_reload enabled, edits to
+# the sections in HOT_RELOAD_SECTIONS are applied to the running process; anything else needs a restart.
+
+import logging
 import os
+import threading
 from pathlib import Path
-from typing import Any, Dict, Optional
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Set
+
+from everjudge.profiling import startup_phase
 
 try:
     import tomllib as toml
@@ -19,10 +28,174 @@ except ImportError:
     except ImportError:
         raise ImportError("tomllib or tomli is required for parsing TOML files")
 
+_logger = logging.getLogger("EverJudge Config")
+
+HOT_RELOAD_SECTIONS = ("judge", "limits")
+
+_NUMBER = (int, float)
+
+# Expected types of the known keys. Sections listed in _OPEN_SECTIONS accept any keys.
+_SCHEMA: Dict[str, Any] = {
+    "server.host": str,
+    "server.port": int,
+    "server.debug": bool,
+    "server.workers": int,
+    "server.config_hot_reload": bool,
+    "server.compression_enabled": bool,
+    "server.compression_min_size": int,
+    "server.compression_level": int,
+    "server.static_dir": str,
+    "database.type": str,
+    "database.path": str,
+    "database.username": str,
+    "database.password": str,
+    "database.host": str,
+    "database.port": int,
+    "database.database_name": str,
+    "database.pool_size": int,
+    "database.pool_timeout": _NUMBER,
+    "database.pool_recycle": int,
+    "database.echo": bool,
+    "database.source_compression": str,
+    "database.pool_pre_ping": bool,
+    "database.max_overflow": int,
+    "database.replica_stickiness": _NUMBER,
+    "database.mysql.charset": str,
+    "database.postgresql.sslmode": str,
+    "database.sqlite.journal_mode": str,
+    "database.sqlite.synchronous": str,
+    "database.sqlite.busy_timeout": int,
+    "database.sqlite.mmap_size": int,
+    "database.sqlite.cache_size": int,
+    "database.replica.type": str,
+    "database.replica.path": str,
+    "database.replica.username": str,
+    "database.replica.password": str,
+    "database.replica.host": str,
+    "database.replica.port": int,
+    "database.replica.database_name": str,
+    "judge.default_time_limit": int,
+    "judge.default_memory_limit": int,
+    "judge.max_time_limit": int,
+    "judge.max_memory_limit": int,
+    "judge.compile_timeout": _NUMBER,
+    "judge.run_timeout": _NUMBER,
+    "judge.output_limit": _NUMBER,
+    "judge.sandbox_enabled": bool,
+    "judge.sandbox_namespaces": bool,
+    "judge.sandbox_cgroup": str,
+    "judge.sandbox_uid": int,
+    "judge.sandbox_gid": int,
+    "judge.sandbox_max_processes": int,
+    "judge.sandbox_cpus": _NUMBER,
+    "judge.interactor_timeout": _NUMBER,
+    "judge.interactive_transcript": int,
+    "judge.checker_timeout": _NUMBER,
+    "judge.checker_cache_dir": str,
+    "judge.checker_pool_size": int,
+    "judge.case_order": str,
+    "judge.parallel_cases": int,
+    "judge.temp_dir": str,
+    "judge.workspace_dir": str,
+    "judge.workspace_pool_size": int,
+    "judge.input_dir": str,
+    "judge.output_dir": str,
+    "judge.status_poll_interval": _NUMBER,
+    "judge.status_stream_timeout": _NUMBER,
+    "judge.status_keepalive": _NUMBER,
+    "judge.status_max_wait": _NUMBER,
+    "cache.fragment_backend": str,
+    "cache.fragment_max_bytes": int,
+    "cache.fragment_dir": str,
+    "cache.fragment_version": int,
+    "logging.level": str,
+    "logging.format": str,
+    "logging.file_enabled": bool,
+    "logging.file_path": str,
+    "logging.max_bytes": int,
+    "logging.backup_count": int,
+    "security.secret_key": str,
+    "security.session_lifetime": int,
+    "security.csrf_enabled": bool,
+    "security.max_content_length": int,
+    "upload.max_file_size": int,
+    "upload.allowed_extensions": list,
+    "upload.upload_dir": str,
+    "features.registration_enabled": bool,
+    "features.guest_access": bool,
+    "features.problem_visibility": str,
+    "features.submission_history": bool,
+    "features.leaderboard_enabled": bool,
+    "admin.default_username": str,
+    "admin.default_email": str,
+    "admin.default_password": str,
+}
+
+_CHOICES: Dict[str, tuple] = {
+    "database.type": ("sqlite", "mysql", "mariadb", "postgresql"),
+    "database.source_compression": ("zlib", "zstd", "none"),
+    "database.sqlite.journal_mode": ("delete", "truncate", "persist", "memory", "wal", "off"),
+    "database.sqlite.synchronous": ("off", "normal", "full", "extra"),
+    "database.replica.type": ("sqlite", "mysql", "mariadb", "postgresql"),
+    "cache.fragment_backend": ("memory", "file", "none"),
+    "judge.case_order": ("given", "sample_first", "failure_rate"),
+    "logging.level": ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"),
+}
+
+_OPEN_SECTIONS = ("language", "limits")
+
+
+def _validate(config: Dict[str, Any], prefix: str = "", errors: Optional[List[str]] = None) -> List[str]:
+    errors = [] if errors is None else errors
+    for name, value in config.items():
+        key = f"{prefix}.{name}" if prefix else name
+        if key.split(".")[0] in _OPEN_SECTIONS:
+            continue
+        if isinstance(value, dict):
+            _validate(value, key, errors)
+            continue
+        expected = _SCHEMA.get(key)
+        if expected is None:
+            _logger.warning(f"Unknown configuration key: {key}")
+            continue
+        # bool is an int subclass, but "port = true" is still a mistake.
+        if not isinstance(value, expected) or (isinstance(value, bool) and expected is not bool):
+            errors.append(f"{key} has an invalid value {value!r}")
+            continue
+        if key in _CHOICES and isinstance(value, str) and all(choice.islower() for choice in _CHOICES[key]):
+            # "WAL" means "wal" to SQLite too; stored lowercase, so readers only compare one spelling.
+            value = config[name] = value.lower()
+        if key in _CHOICES and value not in _CHOICES[key]:
+            errors.append(f"{key} must be one of {', '.join(_CHOICES[key])}, got {value!r}")
+    return errors
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _flatten(node: Mapping[str, Any], prefix: str, table: Dict[str, Any]) -> None:
+    for name, value in node.items():
+        key = f"{prefix}.{name}" if prefix else name
+        table[key] = value
+        if isinstance(value, Mapping):
+            _flatten(value, key, table)
+
 
 class Config:
     _instance: Optional['Config'] = None
-    _config: Dict[str, Any] = {}
+    _config: Mapping[str, Any] = MappingProxyType({})
+    _flat: Mapping[str, Any] = MappingProxyType({})
+    _raw: Dict[str, Any] = {}
+    _path: Optional[str] = None
+    _mtime_ns: Optional[int] = None
+    _lock = threading.RLock()
+    _listeners: List[Callable[[Set[str]], None]] = []
+    _observer = None
 
     def __new__(cls) -> 'Config':
         if cls._instance is None:
@@ -30,66 +203,185 @@ class Config:
         return cls._instance
 
     @classmethod
-    def load(cls, config_path: str = "./plugins/main/config.toml") -> None:
+    def load(cls, config_path: Optional[str] = None, force: bool = False) -> None:
+        # EVERJUDGE_CONFIG lets tools such as "everlaunch bench" point the plugins at a scratch config.
+        if config_path is None:
+            config_path = os.environ.get("EVERJUDGE_CONFIG", "./plugins/main/config.toml")
         if not os.path.exists(config_path):
             raise FileNotFoundError(f"Configuration file not found: {config_path}")
 
+        config_path = os.path.abspath(config_path)
+        mtime_ns = os.stat(config_path).st_mtime_ns
+        with cls._lock:
+            if not force and config_path == cls._path and mtime_ns == cls._mtime_ns:
+                return # Plugin init and the CLI both call load(); parse the file only once.
+            with startup_phase("config load"):
+                raw = cls._read(config_path)
+            cls._install(raw, config_path, mtime_ns)
+
+    @classmethod
+    def _read(cls, config_path: str) -> Dict[str, Any]:
         with open(config_path, "rb") as f:
-            cls._config = toml.load(f)
+            raw = toml.load(f)
+        errors = _validate(raw)
+        if errors:
+            raise ValueError(f"Invalid configuration {config_path}: " + "; ".join(errors))
+        return raw
 
     @classmethod
-    def get(cls, key: str, default: Any = None) -> Any:
-        keys = key.split(".")
-        value = cls._config
+    def _install(cls, raw: Dict[str, Any], config_path: str, mtime_ns: int) -> None:
+        config = _freeze(raw)
+        flat: Dict[str, Any] = {}
+        _flatten(config, "", flat)
+        # Readers never lock; they see either the old or the new table, never a mix.
+        cls._raw = raw
+        cls._config = config
+        cls._flat = MappingProxyType(flat)
+        cls._path = config_path
+        cls._mtime_ns = mtime_ns
 
-        for k in keys:
-            if isinstance(value, dict) and k in value:
-                value = value[k]
-            else:
-                return default
+    @classmethod
+    def reload(cls) -> Set[str]:
+        with cls._lock:
+            if cls._path is None:
+                return set()
+            try:
+                mtime_ns = os.stat(cls._path).st_mtime_ns
+                if mtime_ns == cls._mtime_ns:
+                    return set()
+                raw = cls._read(cls._path)
+            except Exception as e:
+                _logger.error(f"Failed to reload configuration, keeping the current one: {e}")
+                return set()
+
+            updated = dict(cls._raw)
+            for section in HOT_RELOAD_SECTIONS:
+                if section in raw:
+                    updated[section] = raw[section]
+                else:
+                    updated.pop(section, None)
+            ignored = sorted(s for s in set(raw) | set(cls._raw) if s not in HOT_RELOAD_SECTIONS and raw.get(s) != cls._raw.get(s))
+            if ignored:
+                _logger.warning(f"Changes to [{'], ['.join(ignored)}] take effect after a restart")
+
+            previous = cls._flat
+            cls._install(updated, cls._path, mtime_ns)
+            changed = {k for k in set(previous) | set(cls._flat) if previous.get(k) != cls._flat.get(k)}
+            listeners = list(cls._listeners)
+
+        if changed:
+            _logger.info(f"Configuration reloaded, changed: {', '.join(sorted(changed))}")
+        for listener in listeners:
+            try:
+                listener(changed)
+            except Exception as e:
+                _logger.error(f"Error applying reloaded configuration: {e}")
+        return changed
+
+    @classmethod
+    def on_reload(cls, listener: Callable[[Set[str]], None]) -> None:
+        with cls._lock:
+            if listener not in cls._listeners:
+                cls._listeners.append(listener)
+
+    @classmethod
+    def watch(cls) -> bool:
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            _logger.warning("watchdog is not installed, configuration hot reload is disabled")
+            return False
+
+        with cls._lock:
+            if cls._observer is not None:
+                return True
+            if cls._path is None:
+                raise RuntimeError("Configuration must be loaded before it can be watched")
+            config_path = cls._path
+            timer: List[Optional[threading.Timer]] = [None]
+
+            class _ConfigFileHandler(FileSystemEventHandler):
+                def on_any_event(self, event):
+                    # Reloading opens the file too, so only react to events that can change its content.
+                    if event.event_type not in ("modified", "created", "moved", "closed"):
+                        return
+                    paths = {getattr(event, "src_path", None), getattr(event, "dest_path", None)}
+                    if config_path not in {os.path.abspath(p) for p in paths if p}:
+                        return
+                    # Editors often truncate, write and rename in quick succession; reload once it settles.
+                    if timer[0] is not None:
+                        timer[0].cancel()
+                    timer[0] = threading.Timer(0.2, cls.reload)
+                    timer[0].daemon = True
+                    timer[0].start()
+
+            observer = Observer()
+            # Watching the directory also catches editors that replace the file instead of writing to it.
+            observer.schedule(_ConfigFileHandler(), os.path.dirname(config_path), recursive=False)
+            observer.daemon = True
+            observer.start()
+            cls._observer = observer
+        _logger.info(f"Watching {config_path} for changes to [{'], ['.join(HOT_RELOAD_SECTIONS)}]")
+        return True
 
-        return value
+    @classmethod
+    def stop_watching(cls) -> None:
+        with cls._lock:
+            observer, cls._observer = cls._observer, None
+        if observer is not None:
+            observer.stop()
+            observer.join()
+
+    @classmethod
+    def get(cls, key: str, default: Any = None) -> Any:
+        return cls._flat.get(key, default)
 
     @classmethod
-    def get_server_config(cls) -> Dict[str, Any]:
+    def get_server_config(cls) -> Mapping[str, Any]:
         return cls._config.get("server", {})
 
     @classmethod
-    def get_database_config(cls) -> Dict[str, Any]:
+    def get_database_config(cls) -> Mapping[str, Any]:
         return cls._config.get("database", {})
 
     @classmethod
-    def get_judge_config(cls) -> Dict[str, Any]:
+    def get_judge_config(cls) -> Mapping[str, Any]:
         return cls._config.get("judge", {})
 
     @classmethod
-    def get_logging_config(cls) -> Dict[str, Any]:
+    def get_logging_config(cls) -> Mapping[str, Any]:
         return cls._config.get("logging", {})
 
     @classmethod
-    def get_security_config(cls) -> Dict[str, Any]:
+    def get_security_config(cls) -> Mapping[str, Any]:
         return cls._config.get("security", {})
 
     @classmethod
-    def get_language_config(cls, language: str) -> Optional[Dict[str, Any]]:
+    def get_language_config(cls, language: str) -> Optional[Mapping[str, Any]]:
         languages = cls._config.get("language", {})
         return languages.get(language)
 
     @classmethod
-    def get_upload_config(cls) -> Dict[str, Any]:
+    def get_languages_config(cls) -> Mapping[str, Any]:
+        return cls._config.get("language", {})
+
+    @classmethod
+    def get_upload_config(cls) -> Mapping[str, Any]:
         return cls._config.get("upload", {})
 
     @classmethod
-    def get_features_config(cls) -> Dict[str, Any]:
+    def get_features_config(cls) -> Mapping[str, Any]:
         return cls._config.get("features", {})
 
     @classmethod
-    def get_admin_config(cls) -> Dict[str, Any]:
+    def get_admin_config(cls) -> Mapping[str, Any]:
         return cls._config.get("admin", {})
 
     @classmethod
-    def get_database_uri(cls) -> str:
-        db_config = cls.get_database_config()
+    def get_database_uri(cls, db_config: Optional[Mapping[str, Any]] = None) -> str:
+        if db_config is None:
+            db_config = cls.get_database_config()
         db_type = db_config.get("type", "sqlite")
 
         if db_type == "sqlite":
@@ -120,6 +412,46 @@ class Config:
         else:
             raise ValueError(f"Unsupported database type: {db_type}")
 
+    @classmethod
+    def get_replica_config(cls) -> Optional[Dict[str, Any]]:
+        # [database.replica] only lists what differs from the primary, e.g. the host or the SQLite path.
+        replica = cls.get("database.replica")
+        if not replica:
+            return None
+        db_config = {k: v for k, v in cls.get_database_config().items() if k != "replica"}
+        db_config.update(replica)
+        return db_config
+
+    @classmethod
+    def get_engine_options(cls, db_config: Optional[Mapping[str, Any]] = None) -> Dict[str, Any]:
+        if db_config is None:
+            db_config = cls.get_database_config()
+        options = {
+            "pool_size": db_config.get("pool_size", 5),
+            "pool_timeout": db_config.get("pool_timeout", 30),
+            "pool_recycle": db_config.get("pool_recycle", 3600),
+            "max_overflow": db_config.get("max_overflow", 10),
+        }
+        if db_config.get("type", "sqlite") == "sqlite":
+            # A local file never drops idle connections; the busy timeout is set as a pragma instead.
+            options["connect_args"] = {"check_same_thread": False}
+        else:
+            # Servers close idle connections, and a failover leaves dead ones in the pool.
+            options["pool_pre_ping"] = db_config.get("pool_pre_ping", True)
+        return options
+
+    @classmethod
+    def get_sqlite_pragmas(cls) -> Dict[str, Any]:
+        # WAL lets web requests read while a judge writes; NORMAL only syncs at checkpoints in WAL mode.
+        sqlite_config = cls.get_database_config().get("sqlite", {})
+        return {
+            "journal_mode": sqlite_config.get("journal_mode", "wal"),
+            "synchronous": sqlite_config.get("synchronous", "normal"),
+            "busy_timeout": sqlite_config.get("busy_timeout", 5000),
+            "mmap_size": sqlite_config.get("mmap_size", 268435456),
+            "cache_size": sqlite_config.get("cache_size", -65536),
+        }
+
     @classmethod
     def create_database_if_not_exists(cls) -> None:
         db_config = cls.get_database_config()
@@ -161,11 +493,14 @@ class Config:
         flask_config["SQLALCHEMY_DATABASE_URI"] = cls.get_database_uri()
         flask_config["SQLALCHEMY_TRACK_MODIFICATIONS"] = db_config.get("echo", False)
         flask_config["SQLALCHEMY_ECHO"] = db_config.get("echo", False)
-        flask_config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-            "pool_size": db_config.get("pool_size", 5),
-            "pool_timeout": db_config.get("pool_timeout", 30),
-            "pool_recycle": db_config.get("pool_recycle", 3600),
-        }
+        flask_config["SQLALCHEMY_ENGINE_OPTIONS"] = cls.get_engine_options()
+        flask_config["EVERJUDGE_SQLITE_PRAGMAS"] = cls.get_sqlite_pragmas()
+
+        replica_config = cls.get_replica_config()
+        if replica_config is not None:
+            flask_config["SQLALCHEMY_BINDS"] = {
+                "replica": {"url": cls.get_database_uri(replica_config), **cls.get_engine_options(replica_config)}
+            }
 
         security_config = cls.get_security_config()
         flask_config["SECRET_KEY"] = security_config.get("secret_key", "dev-secret-key")
@@ -12,9 +12,41 @@ from enum import Enum
 from typing import Optional
 
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from werkzeug.security import generate_password_hash, check_password_hash
 
-db = SQLAlchemy()
+from .db_routing import RoutingSession
+from .statement import load_statement, refresh_statement
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+
+def configure_engines(flask_app) -> None:
+    # Engine options come from Config.get_engine_options(); pragmas have to be set on every new connection.
+    pragmas = flask_app.config.get("EVERJUDGE_SQLITE_PRAGMAS", {})
+    if not pragmas:
+        return
+    with flask_app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == "sqlite" and engine.url.database not in (None, "", ":memory:"):
+                event.listen(engine, "connect", _sqlite_pragma_listener(pragmas))
+
+
+def _sqlite_pragma_listener(pragmas: dict):
+    def _set_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            # busy_timeout first, so switching the journal mode waits for other connections instead of failing.
+            cursor.execute(f"PRAGMA busy_timeout = {int(pragmas['busy_timeout'])}")
+            cursor.execute(f"PRAGMA journal_mode = {pragmas['journal_mode']}")
+            cursor.execute(f"PRAGMA synchronous = {pragmas['synchronous']}")
+            cursor.execute(f"PRAGMA mmap_size = {int(pragmas['mmap_size'])}")
+            cursor.execute(f"PRAGMA cache_size = {int(pragmas['cache_size'])}")
+        finally:
+            cursor.close()
+    return _set_pragmas
 
 
 class UserRole(Enum):
@@ -34,6 +66,7 @@ class JudgeStatus(Enum):
     COMPILATION_ERROR = "compilation_error"
     SYSTEM_ERROR = "system_error"
     PRESENTATION_ERROR = "presentation_error"
+    OUTPUT_LIMIT_EXCEEDED = "output_limit_exceeded"
 
 
 class ContestStatus(Enum):
@@ -63,6 +96,7 @@ class User(db.Model):
     is_active = db.Column(db.Boolean, default=True, nullable=False)
 
     submissions = db.relationship('Submission', backref='user', lazy=True, cascade='all, delete-orphan')
+    archived_submissions = db.relationship('SubmissionArchive', backref='user', lazy=True, cascade='all, delete-orphan')
     comments = db.relationship('Comment', backref='author', lazy=True, cascade='all, delete-orphan')
 
     def set_password(self, password: str) -> None:
@@ -105,6 +139,7 @@ class Problem(db.Model):
     problem_set_id = db.Column(db.Integer, db.ForeignKey('problem_sets.id'), nullable=False)
     time_limit = db.Column(db.Integer, default=1000, nullable=False)
     memory_limit = db.Column(db.Integer, default=256, nullable=False)
+    output_limit = db.Column(db.Integer) # MB, judge.output_limit when unset.
     total_submissions = db.Column(db.Integer, default=0, nullable=False)
     accepted_submissions = db.Column(db.Integer, default=0, nullable=False)
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -112,18 +147,38 @@ class Problem(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     is_visible = db.Column(db.Boolean, default=True, nullable=False)
     tags = db.Column(db.String(500))
+    rendered_statement = db.Column(db.Text) # JSON of the rendered statement fields, see statement.py.
+    statement_hash = db.Column(db.String(64))
+    statement_has_math = db.Column(db.Boolean, default=False, nullable=False) # Whether the page needs KaTeX.
+    checker_file = db.Column(db.String(255)) # Special judge source, see checker.py.
+    checker_persistent = db.Column(db.Boolean, default=False, nullable=False)
 
     problem_set = db.relationship('ProblemSet', backref='problems', lazy=True)
     test_cases = db.relationship('TestCase', backref='problem', lazy=True, cascade='all, delete-orphan')
+    subtasks = db.relationship('Subtask', backref='problem', lazy=True, cascade='all, delete-orphan')
     submissions = db.relationship('Submission', backref='problem', lazy=True, cascade='all, delete-orphan')
+    archived_submissions = db.relationship('SubmissionArchive', backref='problem', lazy=True, cascade='all, delete-orphan')
     comments = db.relationship('Comment', back_populates='problem', lazy=True, cascade='all, delete-orphan')
 
+    @property
+    def statement(self) -> dict:
+        # Parsed at most once per instance, and only when the template's fragment cache misses.
+        cached = self.__dict__.get('_statement')
+        if cached is None or cached[0] != self.statement_hash:
+            cached = (self.statement_hash, load_statement(self))
+            self.__dict__['_statement'] = cached
+        return cached[1]
+
     def update_statistics(self) -> None:
-        self.total_submissions = Submission.query.filter_by(problem_id=self.id).count()
-        self.accepted_submissions = Submission.query.filter_by(
-            problem_id=self.id,
-            status=JudgeStatus.ACCEPTED
-        ).count()
+        # Archived submissions still count towards the problem's statistics.
+        self.total_submissions = (
+            Submission.query.filter_by(problem_id=self.id).count()
+            + SubmissionArchive.query.filter_by(problem_id=self.id).count()
+        )
+        self.accepted_submissions = (
+            Submission.query.filter_by(problem_id=self.id, status=JudgeStatus.ACCEPTED).count()
+            + SubmissionArchive.query.filter_by(problem_id=self.id, status=JudgeStatus.ACCEPTED).count()
+        )
 
     def to_dict(self) -> dict:
         return {
@@ -140,19 +195,29 @@ class Problem(db.Model):
             'problem_set_id': self.problem_set_id,
             'time_limit': self.time_limit,
             'memory_limit': self.memory_limit,
+            'output_limit': self.output_limit,
             'total_submissions': self.total_submissions,
             'accepted_submissions': self.accepted_submissions,
             'created_by': self.created_by,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
             'is_visible': self.is_visible,
-            'tags': self.tags.split(',') if self.tags else []
+            'tags': self.tags.split(',') if self.tags else [],
+            'checker_file': self.checker_file,
+            'checker_persistent': self.checker_persistent
         }
 
     def __repr__(self) -> str:
         return f'<Problem {self.id}: {self.title}>'
 
 
+@event.listens_for(Problem, "before_insert")
+@event.listens_for(Problem, "before_update")
+def _render_problem_statement(mapper, connection, target) -> None:
+    # Cheap when nothing changed: only the hash of the sources is compared.
+    refresh_statement(target)
+
+
 class ProblemSet(db.Model):
     __tablename__ = 'problem_sets'
 
@@ -192,6 +257,9 @@ class TestCase(db.Model):
     input_file = db.Column(db.String(255), nullable=False)
     output_file = db.Column(db.String(255), nullable=False)
     interactor_file = db.Column(db.String(255))
+    subtask = db.Column(db.Integer) # Subtask.number within the problem, see subtasks.py.
+    judged_count = db.Column(db.Integer, default=0, nullable=False) # For judge.case_order = "failure_rate".
+    failed_count = db.Column(db.Integer, default=0, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
     def to_dict(self) -> dict:
@@ -204,6 +272,9 @@ class TestCase(db.Model):
             'input_file': self.input_file,
             'output_file': self.output_file,
             'interactor_file': self.interactor_file,
+            'subtask': self.subtask,
+            'judged_count': self.judged_count,
+            'failed_count': self.failed_count,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
@@ -211,6 +282,83 @@ class TestCase(db.Model):
         return f'<TestCase {self.test_number} for Problem {self.problem_id}>'
 
 
+class Subtask(db.Model):
+    __tablename__ = 'subtasks'
+
+    id = db.Column(db.Integer, primary_key=True)
+    problem_id = db.Column(db.Integer, db.ForeignKey('problems.id'), nullable=False)
+    number = db.Column(db.Integer, nullable=False)
+    scoring = db.Column(db.String(8), default="min", nullable=False) # "min" or "sum".
+    score = db.Column(db.Integer, default=0, nullable=False)
+    dependencies = db.Column(db.String(255)) # Comma-separated subtask numbers.
+
+    __table_args__ = (db.UniqueConstraint('problem_id', 'number', name='unique_problem_subtask'),)
+
+    @property
+    def dependency_numbers(self) -> list:
+        return [int(n) for n in self.dependencies.split(',') if n.strip()] if self.dependencies else []
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'problem_id': self.problem_id,
+            'number': self.number,
+            'scoring': self.scoring,
+            'score': self.score,
+            'dependencies': self.dependency_numbers
+        }
+
+    def __repr__(self) -> str:
+        return f'<Subtask {self.number} for Problem {self.problem_id}>'
+
+
+class SubmissionSource(db.Model):
+    __tablename__ = 'submission_sources'
+
+    hash = db.Column(db.String(64), primary_key=True)
+    compression = db.Column(db.String(16), nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    data = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    @classmethod
+    def get_or_create(cls, source: str) -> 'SubmissionSource':
+        from .source_store import source_hash, compress_source
+
+        digest = source_hash(source)
+        with db.session.no_autoflush:
+            existing = db.session.get(cls, digest)
+        if existing is not None:
+            return existing
+
+        compression, data = compress_source(source)
+        values = {'hash': digest, 'compression': compression, 'size': len(source.encode("utf-8")), 'data': data,
+                  'created_at': datetime.utcnow()}
+        # Another session may store the same code between the lookup and the insert; then the insert does
+        # nothing and the row is read back. A locking read sees it even inside an older snapshot (MySQL).
+        # Runs without autoflush, as the setter of Submission.source_code calls it on a half-built row.
+        with db.session.no_autoflush:
+            db.session.execute(_insert_ignore(cls.__table__, values))
+            return db.session.get(cls, digest, with_for_update={'read': True})
+
+    def decode(self) -> str:
+        from .source_store import decompress_source
+        return decompress_source(self.compression, self.data)
+
+    def __repr__(self) -> str:
+        return f'<SubmissionSource {self.hash[:12]} ({self.compression}, {self.size} bytes)>'
+
+
+def _insert_ignore(table, values: dict):
+    statement = insert(table)
+    dialect = db.session.get_bind(clause=statement).dialect.name
+    if dialect == "postgresql":
+        return postgresql_insert(table).values(**values).on_conflict_do_nothing()
+    if dialect == "sqlite":
+        return sqlite_insert(table).values(**values).on_conflict_do_nothing()
+    return statement.values(**values).prefix_with("IGNORE") # MySQL and MariaDB.
+
+
 class Submission(db.Model):
     __tablename__ = 'submissions'
 
@@ -218,7 +366,7 @@ class Submission(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     problem_id = db.Column(db.Integer, db.ForeignKey('problems.id'), nullable=False)
     language = db.Column(db.String(50), nullable=False)
-    source_code = db.Column(db.Text, nullable=False)
+    source_hash = db.Column(db.String(64), db.ForeignKey('submission_sources.hash'), nullable=False, index=True)
     status = db.Column(db.Enum(JudgeStatus), default=JudgeStatus.PENDING, nullable=False)
     execution_time = db.Column(db.Integer)
     memory_usage = db.Column(db.Integer)
@@ -228,6 +376,24 @@ class Submission(db.Model):
     test_cases_passed = db.Column(db.Integer, default=0)
     total_test_cases = db.Column(db.Integer, default=0)
 
+    # Source blobs live in their own table and are only loaded when source_code is read.
+    source = db.relationship('SubmissionSource', lazy='select')
+
+    __table_args__ = (
+        db.Index('ix_submissions_problem_submitted', 'problem_id', 'submitted_at'),
+        db.Index('ix_submissions_user_submitted', 'user_id', 'submitted_at'),
+        # Archiving deletes old rows; SQLite must not hand their ids out again.
+        {'sqlite_autoincrement': True},
+    )
+
+    @property
+    def source_code(self) -> Optional[str]:
+        return self.source.decode() if self.source is not None else None
+
+    @source_code.setter
+    def source_code(self, value: str) -> None:
+        self.source = SubmissionSource.get_or_create(value)
+
     def to_dict(self) -> dict:
         return {
             'id': self.id,
@@ -248,6 +414,57 @@ class Submission(db.Model):
         return f'<Submission {self.id} by User {self.user_id} for Problem {self.problem_id}>'
 
 
+class SubmissionArchive(db.Model):
+    __tablename__ = 'submissions_archive'
+
+    # Same columns as Submission; ids are carried over so links to old submissions keep working.
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    problem_id = db.Column(db.Integer, db.ForeignKey('problems.id'), nullable=False)
+    language = db.Column(db.String(50), nullable=False)
+    source_hash = db.Column(db.String(64), db.ForeignKey('submission_sources.hash'), nullable=False)
+    status = db.Column(db.Enum(JudgeStatus), nullable=False)
+    execution_time = db.Column(db.Integer)
+    memory_usage = db.Column(db.Integer)
+    error_message = db.Column(db.Text)
+    submitted_at = db.Column(db.DateTime, nullable=False)
+    judged_at = db.Column(db.DateTime)
+    test_cases_passed = db.Column(db.Integer, default=0)
+    total_test_cases = db.Column(db.Integer, default=0)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    source = db.relationship('SubmissionSource', lazy='select')
+
+    __table_args__ = (
+        db.Index('ix_submissions_archive_problem_submitted', 'problem_id', 'submitted_at'),
+        db.Index('ix_submissions_archive_user_submitted', 'user_id', 'submitted_at'),
+    )
+
+    @property
+    def source_code(self) -> Optional[str]:
+        return self.source.decode() if self.source is not None else None
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'problem_id': self.problem_id,
+            'language': self.language,
+            'status': self.status.value,
+            'execution_time': self.execution_time,
+            'memory_usage': self.memory_usage,
+            'error_message': self.error_message,
+            'submitted_at': self.submitted_at.isoformat() if self.submitted_at else None,
+            'judged_at': self.judged_at.isoformat() if self.judged_at else None,
+            'test_cases_passed': self.test_cases_passed,
+            'total_test_cases': self.total_test_cases,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None
+        }
+
+    def __repr__(self) -> str:
+        return f'<SubmissionArchive {self.id} by User {self.user_id} for Problem {self.problem_id}>'
+
+
 class Comment(db.Model):
     __tablename__ = 'comments'
 
@@ -444,3 +661,16 @@ class Leaderboard(db.Model):
 
     def __repr__(self) -> str:
         return f'<Leaderboard User {self.user_id}>'
+
+
+class RateLimitBucket(db.Model):
+    __tablename__ = 'rate_limit_buckets'
+
+    # "<rule>:<user:id|ip:address>"; only used by the "database" rate limit backend.
+    key = db.Column(db.String(191), primary_key=True)
+    tokens = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.BigInteger, nullable=False, index=True) # Milliseconds since the epoch.
+    version = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self) -> str:
+        return f'<RateLimitBucket {self.key}: {self.tokens:.2f}>'
@@ -11,7 +11,7 @@ import logging
 import os
 from typing import Optional
 
-from .database import db, User, Problem, TestCase, Submission, Comment, Leaderboard, UserRole, ProblemSet, Contest, ContestType, ContestStatus, Discussion
+from .database import db, User, Problem, TestCase, Submission, SubmissionArchive, Comment, Leaderboard, UserRole, ProblemSet, Contest, ContestType, ContestStatus, Discussion
 from .config_loader import Config
 
 _logger = logging.getLogger("EverJudge Database")
@@ -124,6 +124,7 @@ def get_database_info(app) -> dict:
                 "problems": Problem.query.count(),
                 "test_cases": TestCase.query.count(),
                 "submissions": Submission.query.count(),
+                "archived_submissions": SubmissionArchive.query.count(),
                 "comments": Comment.query.count(),
                 "discussions": Discussion.query.count(),
                 "contests": Contest.query.count(),
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# db_routing.py
+# Read/write session routing for EverJudge
+# @author: Ayanami_404<jiyizhuo2011@hotmail.com>
+# @maintainer: Project EverJudge
+# @license: BSD 3-Clause License
+# @version: 0.1.0
+# Copyright Project EverJudge 2025, All Rights Reserved.
+
+# Views decorated with @read_only send their queries to the "replica" bind configured in [database.replica].
+# Everything else, including flushes made from a read-only view, goes to the primary.
+# A client whose request wrote to the primary is pinned to the primary for database.replica_stickiness seconds,
+# so it sees its own submission even if the replica lags behind.
+
+import functools
+import time
+
+from flask import current_app, g, has_request_context, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_BIND = "replica"
+
+_ROUTING_KEY = "everjudge.db_routing"
+
+_STICKY_KEY = "_primary_until"
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or self._flushing or isinstance(clause, UpdateBase) or not _reading_from_replica():
+            return engine
+
+        engines = self._db.engines
+        # Models with their own bind key keep it; only the default bind has a replica.
+        if engine is engines.get(None) and REPLICA_BIND in engines:
+            return engines[REPLICA_BIND]
+        return engine
+
+
+def _reading_from_replica() -> bool:
+    return has_request_context() and g.get("_everjudge_read_only", False)
+
+
+def _after_flush(db_session, flush_context) -> None:
+    if has_request_context():
+        g._everjudge_wrote = True
+
+
+event.listen(RoutingSession, "after_flush", _after_flush)
+
+
+def is_pinned_to_primary() -> bool:
+    until = session.get(_STICKY_KEY)
+    return until is not None and until > time.time()
+
+
+def pin_to_primary(seconds: float = None) -> None:
+    from .config_loader import Config
+
+    if seconds is None:
+        seconds = Config.get("database.replica_stickiness", 10)
+    session[_STICKY_KEY] = time.time() + seconds
+
+
+def read_only(view):
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        # Without a replica the sticky cookie is never read, so these views do not vary on Cookie.
+        if current_app.extensions.get(_ROUTING_KEY, False) and not is_pinned_to_primary():
+            g._everjudge_read_only = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def init_routing(flask_app) -> None:
+    if REPLICA_BIND not in flask_app.config.get("SQLALCHEMY_BINDS", {}):
+        return # Without a replica every query already goes to the primary, and no cookie is needed.
+    flask_app.extensions[_ROUTING_KEY] = True
+
+    @flask_app.after_request
+    def _pin_writers(response):
+        if g.get("_everjudge_wrote", False):
+            pin_to_primary()
+        return response
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+# fragment_cache.py
+# Template fragment cache for EverJudge
+# @author: Ayanami_404<jiyizhuo2011@hotmail.com>
+# @maintainer: Project EverJudge
+# @license: BSD 3-Clause License
+# @version: 0.1.0
+# Copyright Project EverJudge 2025, All Rights Reserved.
+
+# Templates cache a block with:
+#     {% cache "problem-statement", problem.id, problem.updated_at %} ... {% endcache %}
+# The arguments form the key, so passing whatever changes with the content (usually updated_at)
+# means entries never have to be invalidated, only evicted. Bumping cache.fragment_version
+# (or calling invalidate_all()) orphans every entry at once, e.g. after a template change.
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+_logger = logging.getLogger("EverJudge Fragment Cache")
+
+
+class MemoryFragmentStore(object):
+    def __init__(self, max_bytes: int):
+        self._max_bytes = max_bytes
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        size = len(value.encode("utf-8"))
+        if size > self._max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous.encode("utf-8"))
+            self._entries[key] = value
+            self._size += size
+            while self._size > self._max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.encode("utf-8"))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def size(self) -> int:
+        return self._size
+
+
+class FileFragmentStore(object):
+    # Shared by every worker on the host. Each process keeps its own LRU index, and a file evicted
+    # by another worker is simply a miss.
+    def __init__(self, directory: str, max_bytes: int):
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        entries = []
+        for name in os.listdir(directory):
+            if name.endswith(".html"):
+                stat = os.stat(os.path.join(directory, name))
+                entries.append((stat.st_mtime, name[:-5], stat.st_size))
+        for _, digest, size in sorted(entries):
+            self._index[digest] = size
+            self._size += size
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self._directory, f"{digest}.html")
+
+    def get(self, key: str) -> Optional[str]:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        try:
+            with open(self._path(digest), "r", encoding="utf-8") as f:
+                value = f.read()
+        except OSError:
+            return None
+        with self._lock:
+            if digest in self._index:
+                self._index.move_to_end(digest)
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        data = value.encode("utf-8")
+        if len(data) > self._max_bytes:
+            return
+        path = self._path(digest)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            _logger.warning(f"Unable to write fragment {digest}: {e}")
+            return
+
+        with self._lock:
+            self._size += len(data) - self._index.pop(digest, 0)
+            self._index[digest] = len(data)
+            while self._size > self._max_bytes and self._index:
+                evicted, size = self._index.popitem(last=False)
+                self._size -= size
+                try:
+                    os.remove(self._path(evicted))
+                except OSError:
+                    pass
+
+    def clear(self) -> None:
+        with self._lock:
+            for digest in self._index:
+                try:
+                    os.remove(self._path(digest))
+                except OSError:
+                    pass
+            self._index.clear()
+            self._size = 0
+
+    def size(self) -> int:
+        return self._size
+
+
+class FragmentCache(object):
+    def __init__(self, store, version: int = 0):
+        self._store = store
+        self._version = version
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, name: str, *parts) -> str:
+        return ":".join([str(self._version), name] + [str(part) for part in parts])
+
+    def get(self, key: str) -> Optional[str]:
+        if self._store is None:
+            return None
+        value = self._store.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        if self._store is not None:
+            self._store.set(key, value)
+
+    def invalidate_all(self) -> None:
+        self._version += 1
+
+    def stats(self) -> dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'bytes': self._store.size() if self._store is not None else 0
+        }
+
+
+class FragmentCacheExtension(Extension):
+    tags = {"cache"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(self.call_method("_cache_support", [nodes.List(args)]), [], [], body).set_lineno(lineno)
+
+    def _cache_support(self, args: list, caller) -> str:
+        cache = getattr(self.environment, "fragment_cache", None)
+        if cache is None:
+            return caller()
+        key = cache.make_key(*args)
+        value = cache.get(key)
+        if value is None:
+            value = caller()
+            cache.set(key, str(value))
+        return Markup(value)
+
+
+def create_fragment_cache(backend: str, max_bytes: int, directory: str, version: int = 0) -> FragmentCache:
+    if backend == "memory":
+        return FragmentCache(MemoryFragmentStore(max_bytes), version)
+    elif backend == "file":
+        return FragmentCache(FileFragmentStore(directory, max_bytes), version)
+    elif backend == "none":
+        return FragmentCache(None, version)
+    else:
+        raise ValueError(f"Unsupported fragment cache backend: {backend}")
+
+
+def init_fragment_cache(flask_app) -> FragmentCache:
+    from .config_loader import Config
+
+    cache = create_fragment_cache(
+        Config.get("cache.fragment_backend", "memory"),
+        Config.get("cache.fragment_max_bytes", 33554432),
+        Config.get("cache.fragment_dir", "./data/cache/fragments"),
+        Config.get("cache.fragment_version", 0)
+    )
+    flask_app.jinja_env.add_extension(FragmentCacheExtension)
+    flask_app.jinja_env.fragment_cache = cache
+    return cache
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+# http_cache.py
+# Conditional GET helpers for EverJudge
+# @author: Ayanami_404<jiyizhuo2011@hotmail.com>
+# @maintainer: Project EverJudge
+# @license: BSD 3-Clause License
+# @version: 0.1.0
+# Copyright Project EverJudge 2025, All Rights Reserved.
+
+# Views compute a validator from the few columns their page depends on, and only render when the
+# client's copy is stale. Responses carry "Cache-Control: no-cache", so browsers revalidate every time
+# and never show a page that is out of date. Every validator also covers the templates and the static asset
+# fingerprints, so a deploy that changes either never answers 304 for a page linking assets that are gone.
+
+import datetime
+import hashlib
+import threading
+from typing import Callable, Optional
+
+from flask import Response, current_app, make_response, request
+
+from .assets import manifest
+
+_template_version: Optional[str] = None
+_template_lock = threading.Lock()
+
+
+def _templates_digest() -> str:
+    # Templates only change with a deploy, so they are hashed once, on the first conditional GET.
+    global _template_version
+    if _template_version is None:
+        with _template_lock:
+            if _template_version is None:
+                env = current_app.jinja_env
+                digest = hashlib.sha1()
+                for name in sorted(env.loader.list_templates()):
+                    source = env.loader.get_source(env, name)[0]
+                    digest.update(f"{name}\x1f{source}\x1e".encode("utf-8"))
+                _template_version = digest.hexdigest()[:10]
+    return _template_version
+
+
+def make_etag(*parts) -> str:
+    parts = (_templates_digest(), manifest.version) + parts
+    return hashlib.sha1("\x1f".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+
+def _as_utc(value: Optional[datetime.datetime]) -> Optional[datetime.datetime]:
+    # The database stores naive UTC timestamps; HTTP dates have a one second resolution.
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.replace(microsecond=0)
+
+
+def is_not_modified(etag: str, last_modified: Optional[datetime.datetime] = None) -> bool:
+    # If-None-Match wins over If-Modified-Since when both are sent (RFC 9110, 13.2.2).
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified is not None:
+        return _as_utc(last_modified) <= request.if_modified_since
+    return False
+
+
+def conditional_response(etag: str, last_modified: Optional[datetime.datetime], render: Callable[[], str]) -> Response:
+    if is_not_modified(etag, last_modified):
+        response = Response(status=304)
+    else:
+        response = make_response(render())
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = _as_utc(last_modified)
+    response.cache_control.no_cache = True
+    return response
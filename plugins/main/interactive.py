@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+# interactive.py
+# Interactive judging for EverJudge
+# @author: Ayanami_404<jiyizhuo2011@hotmail.com>
+# @maintainer: Project EverJudge
+# @license: BSD 3-Clause License
+# @version: 0.1.0
+# Copyright Project EverJudge 2025, All Rights Reserved.
+
+# The solution and the interactor run side by side, each one's stdout piped into the other's stdin.
+# The interactor is called testlib style, "<interactor> <input> <output> [<answer>]", and reports its
+# verdict through the exit code: 0 AC, 1 WA, 2 PE, anything else is its own failure.
+#
+# By default the two are joined by bare pipes: the kernel moves every byte, the pipe buffer (64 KiB) is the
+# bounded buffer, and a query-heavy problem costs a couple of context switches per round trip and nothing
+# in the judge. With judge.interactive_transcript > 0 the judge sits in between instead, relaying both
+# directions through non-blocking pipes with buffers of _BUFFER_SIZE and keeping that many bytes of each
+# direction for the submission's report; a writer whose buffer is full simply blocks until the reader catches up.
+#
+# Only the solution is timed: its CPU time against the time limit, as for ordinary runs. Time it spends blocked
+# on the interactor costs it nothing, so the wall clock limit is only there to end deadlocks.
+# The interactor is trusted and runs outside of the sandbox, under judge.interactor_timeout.
+
+import errno
+import logging
+import os
+import selectors
+import subprocess
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from .api import JudgeResult
+from .sandbox import RunStats, get_runner
+
+_logger = logging.getLogger("EverJudge Interactive")
+
+_BUFFER_SIZE = 65536
+
+_INTERACTOR_VERDICTS = {
+    0: JudgeResult.AC,
+    1: JudgeResult.WA,
+    2: JudgeResult.PE,
+}
+
+_SIGPIPE = -13
+
+
+@dataclass
+class InteractionResult:
+    verdict: JudgeResult
+    stats: Optional[RunStats] = None # The solution's.
+    exit_code: Optional[int] = None # The solution's.
+    interactor_exit_code: Optional[int] = None
+    message: str = "" # The interactor's stderr, or what went wrong.
+    transcript: Dict[str, bytes] = field(default_factory=dict) # "to_solution" and "to_interactor".
+
+
+class _Relay(object):
+    # Copies one pipe into another, holding at most _BUFFER_SIZE bytes in between.
+    def __init__(self, name: str, source: int, target: int, record: int):
+        self.name = name
+        self.source = source
+        self.target = target
+        self.buffer = bytearray()
+        self.eof = False
+        self.record = record
+        self.transcript = bytearray()
+
+    def done(self) -> bool:
+        return self.eof and not self.buffer
+
+    def read(self) -> None:
+        try:
+            data = os.read(self.source, _BUFFER_SIZE - len(self.buffer))
+        except BlockingIOError:
+            return
+        if not data:
+            self.eof = True
+            return
+        self.buffer += data
+        if len(self.transcript) < self.record:
+            self.transcript += data[:self.record - len(self.transcript)]
+
+    def write(self) -> None:
+        try:
+            written = os.write(self.target, self.buffer)
+        except BlockingIOError:
+            return
+        except BrokenPipeError:
+            # The reader is gone; what it did not take does not matter any more.
+            written = len(self.buffer)
+            self.eof = True
+        del self.buffer[:written]
+
+
+def _relay(relays: List[_Relay], stop: threading.Event) -> None:
+    selector = selectors.DefaultSelector()
+    interest: Dict[int, int] = {}
+    try:
+        while not stop.is_set() and not all(r.done() for r in relays):
+            wanted: Dict[int, int] = {}
+            for relay in relays:
+                if not relay.eof and len(relay.buffer) < _BUFFER_SIZE:
+                    wanted[relay.source] = selectors.EVENT_READ
+                if relay.buffer:
+                    wanted[relay.target] = selectors.EVENT_WRITE
+            # Registrations are only touched when they change, which is rarely once an interaction is going.
+            for fd in list(interest):
+                if fd not in wanted:
+                    selector.unregister(fd)
+                    del interest[fd]
+            for fd, events in wanted.items():
+                if fd not in interest:
+                    selector.register(fd, events)
+                elif interest[fd] != events:
+                    selector.modify(fd, events)
+                interest[fd] = events
+
+            ready = {key.fd for key, _ in selector.select(0.5)}
+            for relay in relays:
+                if relay.source in ready:
+                    relay.read()
+                # Pipes are mostly writable; trying right away saves a trip through select() per message.
+                if relay.buffer and (relay.target in ready or relay.source in ready):
+                    relay.write()
+                if relay.done() and relay.target >= 0:
+                    # Passing the EOF (or the broken pipe) on lets the other side finish.
+                    for fd in (relay.source, relay.target):
+                        if fd in interest:
+                            selector.unregister(fd)
+                            del interest[fd]
+                    _close(relay.source, relay.target)
+                    relay.source = relay.target = -1
+    except Exception as e:
+        _logger.error(f"Error relaying interaction: {e}")
+    finally:
+        selector.close()
+
+
+def _close(*fds: int) -> None:
+    for fd in fds:
+        try:
+            os.close(fd)
+        except OSError as e:
+            if e.errno != errno.EBADF:
+                raise
+
+
+def run_interactive(solution_args: List[str], interactor_args: List[str], timeout: float, cwd: Optional[str] = None,
+                    memory_limit: Optional[int] = None, limit_address_space: bool = True,
+                    interactor_timeout: Optional[float] = None, record: Optional[int] = None) -> InteractionResult:
+    from .config_loader import Config
+
+    if interactor_timeout is None:
+        interactor_timeout = Config.get("judge.interactor_timeout", 10)
+    if record is None:
+        record = Config.get("judge.interactive_transcript", 0)
+    # Generous: a solution blocked on reading costs no CPU time, and any deadlock ends here.
+    wall_timeout = max(timeout * 2 + 1, interactor_timeout)
+
+    to_solution = os.pipe() # (read, write)
+    to_interactor = os.pipe()
+    relays: List[_Relay] = []
+    pending = list(to_solution + to_interactor)
+    solution = interactor = None
+    try:
+        if record > 0:
+            from_solution = os.pipe()
+            from_interactor = os.pipe()
+            pending += from_solution + from_interactor
+            solution_io = (to_solution[0], from_solution[1])
+            interactor_io = (to_interactor[0], from_interactor[1])
+            relays = [
+                _Relay("to_solution", from_interactor[0], to_solution[1], record),
+                _Relay("to_interactor", from_solution[0], to_interactor[1], record),
+            ]
+            for relay in relays:
+                os.set_blocking(relay.source, False)
+                os.set_blocking(relay.target, False)
+        else:
+            solution_io = (to_solution[0], to_interactor[1])
+            interactor_io = (to_interactor[0], to_solution[1])
+
+        # The interactor first, so the solution never waits on a process that is not there.
+        interactor = get_runner(trusted=True).spawn(interactor_args, interactor_io[0], interactor_io[1],
+                                                    interactor_timeout, cwd=cwd)
+        solution = get_runner().spawn(solution_args, solution_io[0], solution_io[1], timeout, cwd=cwd,
+                                      memory_limit=memory_limit, limit_address_space=limit_address_space,
+                                      wall_timeout=wall_timeout)
+    except Exception as e:
+        for process in (interactor, solution):
+            if process is not None:
+                process.kill()
+                process.wait()
+        _close(*pending)
+        _logger.error(f"Unable to start interaction: {e}")
+        return InteractionResult(JudgeResult.SE, message=str(e))
+
+    # Only the children may hold the ends they use, or no side would ever see an EOF.
+    relay_fds = {fd for relay in relays for fd in (relay.source, relay.target)}
+    _close(*[fd for fd in pending if fd not in relay_fds])
+
+    stop = threading.Event()
+    relay_thread = None
+    if relays:
+        relay_thread = threading.Thread(target=_relay, args=(relays, stop), name="EverJudge Interaction Relay", daemon=True)
+        relay_thread.start()
+
+    outcome: Dict[str, Tuple[subprocess.CompletedProcess, RunStats]] = {}
+    waiter = threading.Thread(target=lambda: outcome.__setitem__("interactor", interactor.wait()), daemon=True)
+    waiter.start()
+    solution_result, stats = solution.wait()
+    waiter.join(interactor_timeout + 1)
+    if waiter.is_alive():
+        interactor.kill()
+        waiter.join()
+
+    if relay_thread is not None:
+        stop.set()
+        relay_thread.join()
+        _close(*[fd for relay in relays for fd in (relay.source, relay.target) if fd >= 0])
+
+    interactor_result, interactor_stats = outcome["interactor"]
+    result = InteractionResult(
+        JudgeResult.SE, stats, solution_result.returncode, interactor_result.returncode,
+        interactor_result.stderr.strip(), {relay.name: bytes(relay.transcript) for relay in relays}
+    )
+
+    if stats.timed_out:
+        result.verdict = JudgeResult.TLE
+    elif stats.memory_exceeded:
+        result.verdict = JudgeResult.MLE
+    elif solution_result.returncode not in (0, _SIGPIPE):
+        # Killed by SIGPIPE means the interactor stopped listening, which is the interactor's call.
+        result.verdict = JudgeResult.RE
+        result.message = solution_result.stderr.strip() or result.message
+    elif interactor_stats.timed_out:
+        _logger.error(f"Interactor {interactor_args[0]} timed out")
+        result.verdict = JudgeResult.SE
+        result.message = "Interactor timed out"
+    else:
+        result.verdict = _INTERACTOR_VERDICTS.get(interactor_result.returncode, JudgeResult.SE)
+        if result.verdict == JudgeResult.SE:
+            _logger.error(f"Interactor {interactor_args[0]} failed with exit code {interactor_result.returncode}: {result.message}")
+    return result
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+# json_api.py
+# JSON API (v1) for EverJudge
+# @author: Ayanami_404<jiyizhuo2011@hotmail.com>
+# @maintainer: Project EverJudge
+# @license: BSD 3-Clause License
+# @version: 0.1.0
+# Copyright Project EverJudge 2025, All Rights Reserved.
+
+# Every endpoint selects only the columns named in ?fields= and serializes the resulting tuples,
+# so no ORM objects are built. Lists are paginated with an opaque "after" cursor holding the sort key
+# of the last row, which costs the same on the last page as on the first.
+# Responses carry an ETag of their body, so unchanged data comes back as an empty 304.
+
+import base64
+import datetime
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from flask import jsonify, request
+from sqlalchemy import case, func, select
+
+from everjudge.api import create_blueprint
+from .database import db, Problem, Submission, SubmissionArchive
+from .db_routing import read_only
+from .rate_limit import rate_limited
+
+api_blueprint = create_blueprint("api_v1", "/api/v1")
+
+_DEFAULT_LIMIT = 50
+_MAX_LIMIT = 200
+
+
+class ApiError(Exception):
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+@api_blueprint.errorhandler(ApiError)
+def _api_error(e: ApiError):
+    return jsonify({'error': e.message}), e.status
+
+
+@api_blueprint.errorhandler(404)
+def _not_found(e):
+    return jsonify({'error': "Not found"}), 404
+
+
+def _iso(value: Optional[datetime.datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def _enum(value) -> Optional[str]:
+    return value.value if value is not None else None
+
+
+def _tags(value: Optional[str]) -> List[str]:
+    return value.split(',') if value else []
+
+
+# Field name -> (column expression, converter or None).
+def _problem_fields() -> Dict[str, Tuple[Any, Optional[Callable]]]:
+    return {
+        'id': (Problem.id, None),
+        'title': (Problem.title, None),
+        'difficulty': (Problem.difficulty, None),
+        'time_limit': (Problem.time_limit, None),
+        'memory_limit': (Problem.memory_limit, None),
+        'problem_set_id': (Problem.problem_set_id, None),
+        'total_submissions': (Problem.total_submissions, None),
+        'accepted_submissions': (Problem.accepted_submissions, None),
+        'acceptance_rate': (case(
+            (Problem.total_submissions == 0, 0.0),
+            else_=func.round(Problem.accepted_submissions * 100.0 / Problem.total_submissions, 1)
+        ), None),
+        'tags': (Problem.tags, _tags),
+        'created_at': (Problem.created_at, _iso),
+        'updated_at': (Problem.updated_at, _iso),
+        'description': (Problem.description, None),
+        'input_format': (Problem.input_format, None),
+        'output_format': (Problem.output_format, None),
+        'constraints': (Problem.constraints, None),
+        'hint': (Problem.hint, None),
+    }
+
+
+def _submission_fields(model) -> Dict[str, Tuple[Any, Optional[Callable]]]:
+    return {
+        'id': (model.id, None),
+        'user_id': (model.user_id, None),
+        'problem_id': (model.problem_id, None),
+        'language': (model.language, None),
+        'status': (model.status, _enum),
+        'execution_time': (model.execution_time, None),
+        'memory_usage': (model.memory_usage, None),
+        'test_cases_passed': (model.test_cases_passed, None),
+        'total_test_cases': (model.total_test_cases, None),
+        'submitted_at': (model.submitted_at, _iso),
+        'judged_at': (model.judged_at, _iso),
+    }
+
+
+_PROBLEM_LIST_DEFAULT = ['id', 'title', 'difficulty', 'acceptance_rate', 'tags']
+_PROBLEM_DETAIL_DEFAULT = [
+    'id', 'title', 'difficulty', 'time_limit', 'memory_limit', 'acceptance_rate', 'tags',
+    'description', 'input_format', 'output_format', 'constraints', 'hint'
+]
+_SUBMISSION_DEFAULT = ['id', 'user_id', 'problem_id', 'language', 'status', 'execution_time', 'memory_usage', 'submitted_at']
+
+
+def _selected_fields(available: Dict[str, Tuple[Any, Optional[Callable]]], default: List[str]) -> List[str]:
+    requested = request.args.get('fields')
+    if not requested:
+        return default
+    names = list(dict.fromkeys(name.strip() for name in requested.split(',') if name.strip()))
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ApiError(f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+
+def _serialize(rows, names: List[str], available: Dict[str, Tuple[Any, Optional[Callable]]]) -> List[Dict[str, Any]]:
+    converters = [available[name][1] for name in names]
+    return [
+        {name: (convert(value) if convert else value) for name, convert, value in zip(names, converters, row)}
+        for row in rows
+    ]
+
+
+def _limit() -> int:
+    limit = request.args.get('limit', _DEFAULT_LIMIT, type=int)
+    if limit is None or limit < 1:
+        raise ApiError("limit must be a positive integer")
+    return min(limit, _MAX_LIMIT)
+
+
+def _encode_cursor(values: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(expected: int) -> Optional[list]:
+    cursor = request.args.get('after')
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if isinstance(values, list) and len(values) == expected and all(isinstance(v, int) for v in values):
+            return values
+    except ValueError:
+        pass
+    raise ApiError("Invalid cursor")
+
+
+def _json_response(payload: dict):
+    response = jsonify(payload)
+    response.add_etag()
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+@api_blueprint.route("/problems")
+@rate_limited("search", when=lambda: bool(request.args.get('search')))
+@read_only
+def list_problems():
+    available = _problem_fields()
+    names = _selected_fields(available, _PROBLEM_LIST_DEFAULT)
+    limit = _limit()
+    sort = request.args.get('sort', 'id')
+    if sort not in ('id', 'difficulty'):
+        raise ApiError("sort must be 'id' or 'difficulty'")
+
+    # The sort key columns are always selected, after the requested ones, to build the next cursor.
+    keys = [Problem.id] if sort == 'id' else [Problem.difficulty, Problem.id]
+    query = select(*[available[name][0] for name in names], *keys).where(Problem.is_visible == True)
+
+    difficulty = request.args.get('difficulty')
+    if difficulty:
+        try:
+            low, high = map(int, difficulty.split('-')) if '-' in difficulty else (int(difficulty),) * 2
+        except ValueError:
+            raise ApiError("difficulty must look like '3' or '2-5'")
+        query = query.where(Problem.difficulty.between(low, high))
+    problem_set = request.args.get('set', type=int)
+    if problem_set is not None:
+        query = query.where(Problem.problem_set_id == problem_set)
+    search = request.args.get('search')
+    if search:
+        query = query.where(Problem.title.ilike(f"%{search}%") | Problem.tags.ilike(f"%{search}%"))
+
+    cursor = _decode_cursor(len(keys))
+    if cursor is not None:
+        query = query.where(Problem.id > cursor[0]) if sort == 'id' else query.where(
+            (Problem.difficulty > cursor[0]) | ((Problem.difficulty == cursor[0]) & (Problem.id > cursor[1]))
+        )
+
+    rows = db.session.execute(query.order_by(*keys).limit(limit + 1)).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    return _json_response({
+        'data': _serialize(rows, names, available),
+        'next': _encode_cursor(list(rows[-1][len(names):])) if more else None
+    })
+
+
+@api_blueprint.route("/problems/<int:problem_id>")
+@read_only
+def get_problem(problem_id: int):
+    available = _problem_fields()
+    names = _selected_fields(available, _PROBLEM_DETAIL_DEFAULT)
+    row = db.session.execute(
+        select(*[available[name][0] for name in names]).where(Problem.id == problem_id, Problem.is_visible == True)
+    ).first()
+    if row is None:
+        raise ApiError("Problem not found", 404)
+    return _json_response({'data': _serialize([row], names, available)[0]})
+
+
+def _submission_query(model, names: List[str], before: Optional[int], limit: int):
+    available = _submission_fields(model)
+    query = select(*[available[name][0] for name in names], model.id)
+    problem_id = request.args.get('problem_id', type=int)
+    if problem_id is not None:
+        query = query.where(model.problem_id == problem_id)
+    user_id = request.args.get('user_id', type=int)
+    if user_id is not None:
+        query = query.where(model.user_id == user_id)
+    if before is not None:
+        query = query.where(model.id < before)
+    return query.order_by(model.id.desc()).limit(limit)
+
+
+@api_blueprint.route("/submissions")
+@read_only
+def list_submissions():
+    available = _submission_fields(Submission)
+    names = _selected_fields(available, _SUBMISSION_DEFAULT)
+    limit = _limit()
+    cursor = _decode_cursor(1)
+    before = cursor[0] if cursor is not None else None
+
+    # Newest first across both tables; ids are never reused, so they order the merged stream.
+    # Stuck pending rows stay hot while newer ones get archived, so both tables are always read.
+    rows = db.session.execute(_submission_query(Submission, names, before, limit + 1)).all()
+    rows += db.session.execute(_submission_query(SubmissionArchive, names, before, limit + 1)).all()
+    rows.sort(key=lambda row: row[-1], reverse=True)
+    more = len(rows) > limit
+    rows = rows[:limit]
+    return _json_response({
+        'data': _serialize(rows, names, available),
+        'next': _encode_cursor([rows[-1][-1]]) if more else None
+    })
+
+
+@api_blueprint.route("/submissions/<int:submission_id>")
+@read_only
+def get_submission(submission_id: int):
+    names = _selected_fields(_submission_fields(Submission), _SUBMISSION_DEFAULT)
+    for model in (Submission, SubmissionArchive):
+        available = _submission_fields(model)
+        row = db.session.execute(select(*[available[name][0] for name in names]).where(model.id == submission_id)).first()
+        if row is not None:
+            return _json_response({'data': _serialize([row], names, available)[0]})
+    raise ApiError("Submission not found", 404)
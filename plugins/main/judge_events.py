@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+# judge_events.py
+# In-process judge status pub/sub for EverJudge
+# @author: Ayanami_404<jiyizhuo2011@hotmail.com>
+# @maintainer: Project EverJudge
+# @license: BSD 3-Clause License
+# @version: 0.1.0
+# Copyright Project EverJudge 2025, All Rights Reserved.
+
+# The judge publishes per-test progress and final verdicts here, and the streaming endpoints subscribe to them.
+# Judges running in another process cannot publish into this broker, so a single poller thread
+# fetches every watched submission in one query and publishes whatever changed.
+
+import itertools
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set
+
+_logger = logging.getLogger("EverJudge Judge Events")
+
+FINAL_STATUSES = {
+    "accepted",
+    "wrong_answer",
+    "time_limit_exceeded",
+    "memory_limit_exceeded",
+    "runtime_error",
+    "compilation_error",
+    "system_error",
+    "presentation_error",
+    "output_limit_exceeded",
+}
+
+
+@dataclass
+class JudgeEvent:
+    submission_id: int
+    kind: str # "status", "progress" or "verdict".
+    data: Dict[str, Any]
+    sequence: int
+    final: bool = False
+    created_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> dict:
+        return {
+            'submission_id': self.submission_id,
+            'kind': self.kind,
+            'sequence': self.sequence,
+            'final': self.final,
+            'data': self.data
+        }
+
+
+class JudgeEventBroker(object):
+    def __init__(self, queue_size: int = 256, retain_seconds: int = 600):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[int, Set[queue.Queue]] = {}
+        self._last_events: Dict[int, JudgeEvent] = {}
+        self._sequence = itertools.count(1)
+        self._queue_size = queue_size
+        self._retain_seconds = retain_seconds
+
+    def publish(self, submission_id: int, kind: str, data: Dict[str, Any], final: bool = False) -> JudgeEvent:
+        with self._lock:
+            event = JudgeEvent(submission_id, kind, data, next(self._sequence), final)
+            self._last_events[submission_id] = event
+            subscribers = list(self._subscribers.get(submission_id, ()))
+            if event.sequence % 1024 == 0:
+                self._prune()
+
+        for q in subscribers:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                # A slow client only ever needs the newest state, so drop its oldest event.
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
+                q.put_nowait(event)
+        return event
+
+    def subscribe(self, submission_id: int) -> queue.Queue:
+        q = queue.Queue(maxsize=self._queue_size)
+        with self._lock:
+            self._subscribers.setdefault(submission_id, set()).add(q)
+        return q
+
+    def unsubscribe(self, submission_id: int, q: queue.Queue) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(submission_id)
+            if subscribers is not None:
+                subscribers.discard(q)
+                if not subscribers:
+                    del self._subscribers[submission_id]
+
+    def last_event(self, submission_id: int) -> Optional[JudgeEvent]:
+        with self._lock:
+            return self._last_events.get(submission_id)
+
+    def watched_submissions(self) -> List[int]:
+        with self._lock:
+            return [
+                sid for sid in self._subscribers
+                if sid not in self._last_events or not self._last_events[sid].final
+            ]
+
+    def _prune(self) -> None:
+        deadline = time.time() - self._retain_seconds
+        for sid in [sid for sid, e in self._last_events.items() if e.created_at < deadline and sid not in self._subscribers]:
+            del self._last_events[sid]
+
+
+def submission_state(submission) -> Dict[str, Any]:
+    status = submission.status.value if hasattr(submission.status, "value") else submission.status
+    return {
+        'status': status,
+        'execution_time': submission.execution_time,
+        'memory_usage': submission.memory_usage,
+        'test_cases_passed': submission.test_cases_passed,
+        'total_test_cases': submission.total_test_cases
+    }
+
+
+def publish_submission(submission) -> JudgeEvent:
+    state = submission_state(submission)
+    final = state['status'] in FINAL_STATUSES
+    return broker.publish(submission.id, "verdict" if final else "status", state, final)
+
+
+def progress_callback(submission_id: int, total: int) -> Callable:
+    # Adapts Judger.judge_all(progress=...) to broker events.
+    done = itertools.count(1)
+
+    def _progress(group: int, result) -> None:
+        broker.publish(submission_id, "progress", {
+            'test': group,
+            'finished': next(done),
+            'total': total,
+            'result': result.value
+        })
+    return _progress
+
+
+class SubmissionPoller(object):
+    def __init__(self, broker_: JudgeEventBroker, interval: float = 1.0):
+        self._broker = broker_
+        self._interval = interval
+        self._app = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app, interval: Optional[float] = None) -> None:
+        self._app = app
+        if interval is not None:
+            self._interval = interval
+
+    def ensure_running(self) -> None:
+        if self._app is None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="EverJudge Submission Poller", daemon=True)
+                self._thread.start()
+
+    def poll_once(self) -> int:
+        from .database import Submission
+
+        watched = self._broker.watched_submissions()
+        if not watched:
+            return 0
+
+        rows = Submission.query.with_entities(
+            Submission.id,
+            Submission.status,
+            Submission.execution_time,
+            Submission.memory_usage,
+            Submission.test_cases_passed,
+            Submission.total_test_cases
+        ).filter(Submission.id.in_(watched)).all()
+
+        published = 0
+        for row in rows:
+            last = self._broker.last_event(row.id)
+            if self.refresh(row) is not last:
+                published += 1
+        return published
+
+    def refresh(self, row) -> JudgeEvent:
+        # Publishes the row's state unless the broker already has it; returns the current event.
+        state = submission_state(row)
+        last = self._broker.last_event(row.id)
+        if last is not None and last.kind != "progress" and last.data == state:
+            return last
+        if last is not None and last.kind == "progress" and state['status'] not in FINAL_STATUSES:
+            # The in-process judge is already streaming finer-grained progress.
+            return last
+        final = state['status'] in FINAL_STATUSES
+        return self._broker.publish(row.id, "verdict" if final else "status", state, final)
+
+    def is_fresh(self, event: JudgeEvent) -> bool:
+        # Anything newer than one polling round is as current as the poller could make it.
+        return event.final or time.time() - event.created_at < self._interval
+
+    def _run(self) -> None:
+        idle_rounds = 0
+        while True:
+            time.sleep(self._interval)
+            if not self._broker.watched_submissions():
+                idle_rounds += 1
+                if idle_rounds >= 60:
+                    with self._lock:
+                        # Re-check under the lock so a client arriving right now still gets a poller.
+                        if not self._broker.watched_submissions():
+                            self._thread = None
+                            _logger.debug("Submission poller idle, stopping")
+                            return
+                continue
+            idle_rounds = 0
+            try:
+                with self._app.app_context():
+                    self.poll_once()
+            except Exception as e:
+                _logger.error(f"Error polling submission status: {e}")
+
+
+broker = JudgeEventBroker()
+poller = SubmissionPoller(broker)
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# ordering.py
+# Test case ordering for EverJudge
+# @author: Ayanami_404<jiyizhuo2011@hotmail.com>
+# @maintainer: Project EverJudge
+# @license: BSD 3-Clause License
+# @version: 0.1.0
+# Copyright Project EverJudge 2025, All Rights Reserved.
+
+# Most wrong submissions fail on a sample or an early small case, and whenever judging stops at the first
+# failure (ICPC mode, "min" subtasks) the order decides how much is run for nothing.
+# judge.case_order picks the order:
+#   "given": by test number,
+#   "sample_first": samples (TestCase.is_sample) first, then by test number,
+#   "failure_rate": samples first, then the cases that failed most often for this problem.
+# StandardJudger.judge_all and judge_subtasks apply it when given a problem_id; results still come back in
+# the order the caller gave. Failure rates come from TestCase.judged_count and failed_count, which
+# record_case_results() updates after each of those judgings. They are smoothed, so a case judged a few times
+# does not jump ahead of everything else.
+
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from .api import JudgeResult
+
+_logger = logging.getLogger("EverJudge Ordering")
+
+CASE_ORDERS = ("given", "sample_first", "failure_rate")
+
+# A prior of one failure in ten judgings.
+_PRIOR_FAILED = 1
+_PRIOR_JUDGED = 10
+
+
+def failure_rate(case) -> float:
+    return (case.failed_count + _PRIOR_FAILED) / (case.judged_count + _PRIOR_JUDGED)
+
+
+def order_cases(cases: Iterable, strategy: Optional[str] = None) -> List:
+    # Takes and returns TestCase rows.
+    if strategy is None:
+        from .config_loader import Config
+        strategy = Config.get("judge.case_order", "sample_first")
+
+    cases = sorted(cases, key=lambda c: c.test_number)
+    if strategy == "given":
+        return cases
+    elif strategy == "sample_first":
+        return sorted(cases, key=lambda c: not c.is_sample)
+    elif strategy == "failure_rate":
+        return sorted(cases, key=lambda c: (not c.is_sample, -failure_rate(c)))
+    else:
+        raise ValueError(f"Unsupported case order: {strategy}")
+
+
+def order_groups(problem_id: int, groups: List[int], strategy: Optional[str] = None) -> List[int]:
+    # The same for groups (test numbers) of a problem. Groups without a test case row keep their place at the end.
+    from .database import TestCase
+
+    try:
+        cases = TestCase.query.filter(TestCase.problem_id == problem_id, TestCase.test_number.in_(groups)).all()
+    except Exception as e:
+        _logger.error(f"Error loading test cases of problem {problem_id}, judging them in the order given: {e}")
+        return list(groups)
+    ordered = [case.test_number for case in order_cases(cases, strategy)]
+    known = set(ordered)
+    return ordered + [group for group in groups if group not in known]
+
+
+def record_case_results(problem_id: int, results: Dict[int, Optional[JudgeResult]]) -> None:
+    # results maps test numbers to verdicts, None for cases that were skipped or cancelled. System and
+    # compilation errors say nothing about the case.
+    from .database import db, TestCase
+
+    judged = [number for number, result in results.items() if result not in (None, JudgeResult.SE, JudgeResult.CE)]
+    failed = [number for number in judged if results[number] != JudgeResult.AC]
+    if not judged:
+        return
+    try:
+        # Increments in SQL, so concurrent judges never lose each other's counts.
+        TestCase.query.filter(TestCase.problem_id == problem_id, TestCase.test_number.in_(judged)).update(
+            {TestCase.judged_count: TestCase.judged_count + 1}, synchronize_session=False)
+        if failed:
+            TestCase.query.filter(TestCase.problem_id == problem_id, TestCase.test_number.in_(failed)).update(
+                {TestCase.failed_count: TestCase.failed_count + 1}, synchronize_session=False)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        _logger.error(f"Error recording test case statistics for problem {problem_id}: {e}")
@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+# rate_limit.py
+# Rate limiting and admission control for EverJudge
+# @author: Ayanami_404<jiyizhuo2011@hotmail.com>
+# @maintainer: Project EverJudge
+# @license: BSD 3-Clause License
+# @version: 0.1.0
+# Copyright Project EverJudge 2025, All Rights Reserved.
+
+# Every rule is a token bucket: [limits.<rule>] rate tokens are added per second, up to burst.
+# Views are wrapped with @rate_limited("<rule>"); the submission path calls admit_submission(), which
+# also turns submissions away while more than limits.judge_queue_threshold of them wait to be judged.
+# Rejected requests get a 429 with Retry-After.
+#
+# Buckets are kept per signed-in user, and per IP address for everyone else, so a contest room
+# behind one NAT address does not share a single bucket.
+# limits.backend picks where buckets live: "memory" (per worker), "file" (a SQLite file shared by the
+# workers on a host) or "database" (the rate_limit_buckets table, shared by every host).
+# [limits] is hot-reloadable; rules apply to the next request, and a new backend is set up on the spot.
+
+import functools
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from flask import Response, jsonify, request, session
+from sqlalchemy import create_engine, delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+_logger = logging.getLogger("EverJudge Rate Limit")
+
+# (rate per second, burst) used when a rule is missing from [limits].
+_DEFAULT_RULES = {
+    "search": (2.0, 20),
+    "submit": (0.2, 6),
+}
+
+_MAX_ATTEMPTS = 5
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, rule: str, retry_after: float):
+        super().__init__(f"Rate limit '{rule}' exceeded, retry after {retry_after:.1f}s")
+        self.rule = rule
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    rate: float
+    burst: float
+
+    @property
+    def refill_time(self) -> float:
+        # Seconds for an empty bucket to fill up; an idle bucket this old is the same as no bucket.
+        return self.burst / self.rate
+
+
+def _take(tokens: float, elapsed: float, rule: Rule, cost: float):
+    tokens = min(rule.burst, tokens + max(elapsed, 0.0) * rule.rate)
+    if tokens >= cost:
+        return True, tokens - cost, 0.0
+    return False, tokens, (cost - tokens) / rule.rate
+
+
+class MemoryBucketStore(object):
+    # Buckets are kept least recently used first. At max_keys the oldest one is dropped, which is the one
+    # most likely to have refilled anyway, so a flood of new keys costs O(1) each and memory stays bounded.
+    def __init__(self, max_keys: int = 100000):
+        self._max_keys = max_keys
+        self._buckets: OrderedDict[str, List[float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rule: Rule, cost: float = 1.0, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                while len(self._buckets) >= self._max_keys:
+                    self._buckets.popitem(last=False)
+                bucket = self._buckets[key] = [rule.burst, now]
+            else:
+                self._buckets.move_to_end(key)
+            allowed, bucket[0], retry_after = _take(bucket[0], now - bucket[1], rule, cost)
+            bucket[1] = now
+            return allowed, retry_after
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class SqlBucketStore(object):
+    # Read, decide, then write back only if nobody else wrote in between (the version column),
+    # which needs nothing beyond plain UPDATE and works the same on SQLite, MySQL and PostgreSQL.
+    def __init__(self, engine, table, prune_every: int = 1000):
+        self._engine = engine
+        self._table = table
+        self._prune_every = prune_every
+        self._writes = 0
+
+    def take(self, key: str, rule: Rule, cost: float = 1.0, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        now_ms = int(now * 1000)
+        t = self._table
+        for _ in range(_MAX_ATTEMPTS):
+            try:
+                with self._engine.begin() as conn:
+                    row = conn.execute(select(t.c.tokens, t.c.updated_at, t.c.version).where(t.c.key == key)).first()
+                    if row is None:
+                        allowed, tokens, retry_after = _take(rule.burst, 0.0, rule, cost)
+                        conn.execute(insert(t).values(key=key, tokens=tokens, updated_at=now_ms, version=0))
+                        break
+                    allowed, tokens, retry_after = _take(row.tokens, (now_ms - row.updated_at) / 1000, rule, cost)
+                    if not allowed:
+                        # Nothing was spent, so a rejected request costs no write.
+                        return allowed, retry_after
+                    written = conn.execute(
+                        update(t).where(t.c.key == key, t.c.version == row.version)
+                        .values(tokens=tokens, updated_at=now_ms, version=row.version + 1)
+                    ).rowcount
+                    if written:
+                        break
+            except IntegrityError:
+                pass # Another worker created the bucket first.
+        else:
+            _logger.warning(f"Rate limit bucket {key} is contended, letting the request through")
+            return True, 0.0
+
+        self._writes += 1
+        if self._writes % self._prune_every == 0:
+            self._prune(rule, now_ms)
+        return allowed, retry_after
+
+    def _prune(self, rule: Rule, now_ms: int) -> None:
+        t = self._table
+        with self._engine.begin() as conn:
+            pruned = conn.execute(delete(t).where(
+                t.c.key.startswith(f"{rule.name}:"),
+                t.c.updated_at < now_ms - int(rule.refill_time * 1000)
+            )).rowcount
+        _logger.debug(f"Pruned {pruned} idle '{rule.name}' rate limit buckets")
+
+    def clear(self) -> None:
+        with self._engine.begin() as conn:
+            conn.execute(delete(self._table))
+
+
+def create_bucket_store(backend: str, file_path: str = "./data/rate_limits.db"):
+    from .database import db, RateLimitBucket
+
+    if backend == "memory":
+        return MemoryBucketStore()
+    elif backend == "file":
+        os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+        engine = create_engine(f"sqlite:///{file_path}", connect_args={"timeout": 5})
+        with engine.begin() as conn:
+            conn.exec_driver_sql("PRAGMA journal_mode = wal")
+    elif backend == "database":
+        engine = db.engine
+    else:
+        raise ValueError(f"Unsupported rate limit backend: {backend}")
+    # Databases created before this table existed get it here rather than on the first request.
+    RateLimitBucket.__table__.create(engine, checkfirst=True)
+    return SqlBucketStore(engine, RateLimitBucket.__table__)
+
+
+class RateLimiter(object):
+    def __init__(self):
+        self._store = None
+        self._app = None
+        self._queue_depth = (float("-inf"), 0)
+        self._lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        self._app = app
+        self._setup_store()
+
+    def _setup_store(self) -> None:
+        from .config_loader import Config
+
+        backend = Config.get("limits.backend", "memory")
+        with self._app.app_context():
+            self._store = create_bucket_store(backend, Config.get("limits.file_path", "./data/rate_limits.db"))
+        _logger.info(f"Rate limiting with the {backend} backend")
+
+    def apply_config(self, changed: set) -> None:
+        if self._app is not None and changed & {"limits.backend", "limits.file_path"}:
+            self._setup_store()
+
+    @staticmethod
+    def enabled() -> bool:
+        from .config_loader import Config
+        return Config.get("limits.enabled", True)
+
+    @staticmethod
+    def get_rule(name: str) -> Rule:
+        from .config_loader import Config
+
+        rate, burst = _DEFAULT_RULES.get(name, (1.0, 10))
+        return Rule(name, Config.get(f"limits.{name}.rate", rate), Config.get(f"limits.{name}.burst", burst))
+
+    def hit(self, name: str, identity: str, cost: float = 1.0) -> None:
+        if self._store is None or not self.enabled():
+            return
+        rule = self.get_rule(name)
+        try:
+            allowed, retry_after = self._store.take(f"{name}:{identity}", rule, cost)
+        except Exception as e:
+            # A broken limiter must not take the site down with it.
+            _logger.error(f"Error checking rate limit '{name}': {e}")
+            return
+        if not allowed:
+            raise RateLimitExceeded(name, retry_after)
+
+    def judge_queue_depth(self) -> int:
+        from .config_loader import Config
+        from .database import Submission, JudgeStatus
+
+        # Counted at most once per interval per worker; a burst of submits does not mean a burst of COUNTs.
+        interval = Config.get("limits.judge_queue_check_interval", 1.0)
+        checked_at, depth = self._queue_depth
+        if time.monotonic() - checked_at < interval:
+            return depth
+        with self._lock:
+            checked_at, depth = self._queue_depth
+            if time.monotonic() - checked_at >= interval:
+                depth = Submission.query.filter(
+                    Submission.status.in_((JudgeStatus.PENDING, JudgeStatus.RUNNING))
+                ).count()
+                self._queue_depth = (time.monotonic(), depth)
+        return depth
+
+
+limiter = RateLimiter()
+
+
+def client_identity() -> str:
+    user_id = session.get("user_id")
+    if user_id is not None:
+        return f"user:{user_id}"
+    return f"ip:{request.remote_addr}"
+
+
+def rate_limited(name: str, when: Optional[Callable[[], bool]] = None):
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if when is None or when():
+                limiter.hit(name, client_identity())
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def admit_submission() -> None:
+    from .config_loader import Config
+
+    limiter.hit("submit", client_identity())
+    threshold = Config.get("limits.judge_queue_threshold", 0)
+    if threshold > 0 and limiter.enabled() and limiter.judge_queue_depth() >= threshold:
+        raise RateLimitExceeded("judge queue", Config.get("limits.judge_queue_retry_after", 15))
+
+
+def _too_many_requests(e: RateLimitExceeded):
+    retry_after = max(1, math.ceil(e.retry_after))
+    if request.path.startswith("/api/") or request.accept_mimetypes.best == "application/json":
+        response = jsonify({'error': "Too many requests", 'retry_after': retry_after})
+    else:
+        response = Response(f"Too many requests, please retry in {retry_after} seconds.", mimetype="text/plain")
+    response.status_code = 429
+    response.headers["Retry-After"] = str(retry_after)
+    return response
+
+
+def init_rate_limits(flask_app) -> None:
+    from .config_loader import Config
+
+    limiter.init_app(flask_app)
+    flask_app.register_error_handler(RateLimitExceeded, _too_many_requests)
+    Config.on_reload(limiter.apply_config)
@@ -0,0 +1,541 @@
+# -*- coding: utf-8 -*-
+# sandbox.py
+# Namespace and cgroup sandbox for running submissions
+# @author: Ayanami_404<jiyizhuo2011@hotmail.com>
+# @maintainer: Project EverJudge
+# @license: BSD 3-Clause License
+# @version: 0.1.0
+# Copyright Project EverJudge 2025, All Rights Reserved.
+
+# With judge.sandbox_enabled every solution run by a LanguageProvider goes through Sandbox.run().
+# Between fork and exec the child:
+#   - joins a cgroup v2 group from the pool under judge.sandbox_cgroup (memory.max, pids.max, cpu.max),
+#   - gets RLIMIT_CPU (and RLIMIT_AS when there is no cgroup to limit memory),
+#   - moves into new mount, network, IPC, UTS and PID namespaces, and a user namespace unless the
+#     judge runs as root, in which case it drops to judge.sandbox_uid/gid instead,
+#   - sets no_new_privs and loads a seccomp filter denying syscalls a solution never needs
+#     (needs the libseccomp Python bindings, the filter is skipped without them).
+# The solution runs in its own PID namespace, under a small init and a waiting parent outside of it.
+# Compilers are trusted and run outside of the sandbox; interactors run with Sandbox(confine=False),
+# which only applies the rlimits and does the accounting.
+#
+# Cgroups are created once and reused: CPU time and OOM kills are read as differences of the
+# counters, and memory.peak is reset through a descriptor kept open (Linux 6.12+). Older kernels
+# cannot reset it, so there a group is replaced after each run.
+# Without a cgroup, CPU time and peak memory come from the child's rusage, and memory is capped by RLIMIT_AS.
+
+import ctypes
+import ctypes.util
+import errno
+import itertools
+import logging
+import math
+import os
+import resource
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional, Tuple
+
+from .streams import StderrReader
+
+try:
+    import seccomp # Optional, libseccomp's Python bindings.
+except ImportError:
+    try:
+        import pyseccomp as seccomp
+    except ImportError:
+        seccomp = None
+
+_logger = logging.getLogger("EverJudge Sandbox")
+
+CLONE_NEWNS = 0x00020000
+CLONE_NEWUTS = 0x04000000
+CLONE_NEWIPC = 0x08000000
+CLONE_NEWUSER = 0x10000000
+CLONE_NEWPID = 0x20000000
+CLONE_NEWNET = 0x40000000
+
+_MS_REC = 0x4000
+_MS_PRIVATE = 0x40000
+_PR_SET_PDEATHSIG = 1
+_PR_SET_NO_NEW_PRIVS = 38
+
+_DENIED_SYSCALLS = (
+    "ptrace", "process_vm_readv", "process_vm_writev",
+    "mount", "umount2", "pivot_root", "chroot", "setns", "unshare", "open_by_handle_at", "name_to_handle_at",
+    "kexec_load", "kexec_file_load", "reboot", "init_module", "finit_module", "delete_module",
+    "swapon", "swapoff", "acct", "syslog", "settimeofday", "clock_settime", "sethostname", "setdomainname",
+    "bpf", "perf_event_open", "userfaultfd", "keyctl", "add_key", "request_key", "iopl", "ioperm",
+)
+
+_libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True) if sys.platform.startswith("linux") else None
+
+
+@dataclass
+class RunStats:
+    wall_time: float # Seconds
+    cpu_time: float # Seconds
+    memory_peak: int # Bytes, 0 when unknown
+    memory_exceeded: bool
+    timed_out: bool
+
+
+def _check(result: int) -> None:
+    if result != 0:
+        code = ctypes.get_errno()
+        raise OSError(code, os.strerror(code))
+
+
+def _fork_namespace_init() -> None:
+    # After unshare(CLONE_NEWPID) the next child is the namespace's init. Once init exits nothing in the
+    # namespace can fork again, and the kernel drops the signals init has no handler for, SIGXCPU and
+    # SIGXFSZ among them. So neither the solution nor its parent may be init: this process forks the init,
+    # which forks the solution, reaps, and hands the solution's wait status back through a pipe.
+    status_r, status_w = os.pipe() # Not inherited by the solution's exec.
+    pid = os.fork()
+    if pid == 0:
+        _libc.prctl(_PR_SET_PDEATHSIG, signal.SIGKILL, 0, 0, 0)
+        os.close(status_r)
+        solution = os.fork()
+        if solution == 0:
+            os.close(status_w)
+            return
+        _close_all_but(status_w)
+        while True:
+            reaped, status = os.waitpid(-1, 0)
+            if reaped == solution:
+                break
+        os.write(status_w, status.to_bytes(4, "little"))
+        os._exit(0)
+    # Keep no other descriptor open, so the parent sees pipes close (and Popen its exec status) from the solution alone.
+    _close_all_but(status_r)
+    _, status = os.waitpid(pid, 0)
+    data = os.read(status_r, 4)
+    if len(data) == 4:
+        status = int.from_bytes(data, "little")
+    if os.WIFSIGNALED(status):
+        signal.signal(os.WTERMSIG(status), signal.SIG_DFL)
+        os.kill(os.getpid(), os.WTERMSIG(status))
+    os._exit(os.waitstatus_to_exitcode(status) if os.WIFEXITED(status) else 1)
+
+
+def _close_all_but(fd: int) -> None:
+    os.closerange(0, fd)
+    os.closerange(fd + 1, os.sysconf("SC_OPEN_MAX"))
+
+
+def _children(pid: int) -> List[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(child) for child in f.read().split()]
+    except (OSError, ValueError):
+        return []
+
+
+def _descendants(pid: int) -> List[int]:
+    found = []
+    pending = _children(pid)
+    while pending:
+        child = pending.pop()
+        found.append(child)
+        pending.extend(_children(child))
+    return found
+
+
+def _write_file(path: str, data: str) -> None:
+    with open(path, "w") as f:
+        f.write(data)
+
+
+class Cgroup(object):
+    def __init__(self, path: str):
+        self.path = path
+        self._peak_fd: Optional[int] = None
+        self._resettable = False
+        try:
+            self._peak_fd = os.open(os.path.join(path, "memory.peak"), os.O_RDWR)
+            self._resettable = True
+        except OSError:
+            try:
+                self._peak_fd = os.open(os.path.join(path, "memory.peak"), os.O_RDONLY)
+            except OSError:
+                pass # Before Linux 5.19 there is no memory.peak.
+
+    def _read(self, name: str) -> str:
+        with open(os.path.join(self.path, name), "r") as f:
+            return f.read()
+
+    def _stat(self, name: str, key: str) -> int:
+        for line in self._read(name).splitlines():
+            field, _, value = line.partition(" ")
+            if field == key:
+                return int(value)
+        return 0
+
+    def configure(self, memory_bytes: Optional[int], processes: int, cpus: float) -> None:
+        _write_file(os.path.join(self.path, "memory.max"), str(memory_bytes) if memory_bytes else "max")
+        try:
+            _write_file(os.path.join(self.path, "memory.swap.max"), "0")
+        except OSError:
+            pass # No swap accounting.
+        _write_file(os.path.join(self.path, "pids.max"), str(processes))
+        _write_file(os.path.join(self.path, "cpu.max"), f"{int(cpus * 100000)} 100000")
+
+    @property
+    def procs_path(self) -> str:
+        return os.path.join(self.path, "cgroup.procs")
+
+    def counters(self) -> Tuple[int, int]:
+        # (CPU time in microseconds, OOM kills), both only ever grow.
+        return self._stat("cpu.stat", "usage_usec"), self._stat("memory.events", "oom_kill")
+
+    def memory_peak(self) -> int:
+        if self._peak_fd is None:
+            return 0
+        return int(os.pread(self._peak_fd, 32, 0))
+
+    def kill(self) -> None:
+        try:
+            _write_file(os.path.join(self.path, "cgroup.kill"), "1")
+            return
+        except OSError:
+            pass # Before Linux 5.14.
+        for pid in self._read("cgroup.procs").split():
+            try:
+                os.kill(int(pid), 9)
+            except ProcessLookupError:
+                pass
+
+    def reset(self) -> bool:
+        if not self._resettable:
+            return False
+        try:
+            os.pwrite(self._peak_fd, b"reset", 0)
+            return True
+        except OSError:
+            self._resettable = False
+            return False
+
+    def remove(self) -> None:
+        if self._peak_fd is not None:
+            os.close(self._peak_fd)
+            self._peak_fd = None
+        # The kernel removes a group only once its last process is reaped, which can take a moment.
+        for _ in range(50):
+            try:
+                os.rmdir(self.path)
+                return
+            except OSError as e:
+                if e.errno != errno.EBUSY:
+                    raise
+                time.sleep(0.01)
+        _logger.warning(f"Cgroup {self.path} is still busy, leaving it")
+
+
+class CgroupPool(object):
+    def __init__(self, root: str):
+        self._root = root
+        self._idle: Deque[Cgroup] = deque()
+        self._counter = itertools.count()
+        self._prefix = f"run-{os.getpid()}-"
+        self._lock = threading.Lock()
+
+        os.makedirs(root, exist_ok=True)
+        available = set(self._read_root("cgroup.controllers").split())
+        missing = {"memory", "pids", "cpu"} - available
+        if missing:
+            raise RuntimeError(f"Cgroup {root} lacks the {', '.join(sorted(missing))} controller(s)")
+        _write_file(os.path.join(root, "cgroup.subtree_control"), "+memory +pids +cpu")
+        self._remove_stale()
+
+    def _read_root(self, name: str) -> str:
+        with open(os.path.join(self._root, name), "r") as f:
+            return f.read()
+
+    def _remove_stale(self) -> None:
+        for name in os.listdir(self._root):
+            parts = name.split("-")
+            if len(parts) == 3 and parts[0] == "run" and parts[1].isdigit() and int(parts[1]) != os.getpid():
+                try:
+                    os.kill(int(parts[1]), 0)
+                except ProcessLookupError:
+                    try:
+                        os.rmdir(os.path.join(self._root, name))
+                    except OSError:
+                        pass
+
+    def acquire(self) -> Cgroup:
+        with self._lock:
+            if self._idle:
+                return self._idle.popleft()
+        path = os.path.join(self._root, f"{self._prefix}{next(self._counter)}")
+        os.mkdir(path)
+        return Cgroup(path)
+
+    def release(self, cgroup: Cgroup) -> None:
+        if cgroup.reset():
+            with self._lock:
+                self._idle.append(cgroup)
+            return
+        try:
+            cgroup.remove()
+        except OSError as e:
+            _logger.warning(f"Unable to remove cgroup {cgroup.path}: {e}")
+
+
+def _build_seccomp_filter():
+    if seccomp is None:
+        return None
+    syscall_filter = seccomp.SyscallFilter(defaction=seccomp.ALLOW)
+    for name in _DENIED_SYSCALLS:
+        try:
+            syscall_filter.add_rule(seccomp.ERRNO(errno.EPERM), name)
+        except Exception:
+            pass # Not a syscall on this architecture.
+    return syscall_filter
+
+
+class SandboxedProcess(object):
+    def __init__(self, sandbox: 'Sandbox', args: List[str], stdin, stdout, timeout: float, wall_timeout: float,
+                 cwd: Optional[str], memory_bytes: Optional[int], limit_address_space: bool, output_bytes: Optional[int]):
+        self._sandbox = sandbox
+        self.args = args
+        self._timeout = timeout
+        self._cgroup = sandbox._cgroups.acquire() if sandbox._cgroups is not None else None
+        self._stderr = StderrReader()
+        try:
+            if self._cgroup is not None:
+                self._cgroup.configure(memory_bytes, sandbox._max_processes, sandbox._cpus)
+                self._counters = self._cgroup.counters()
+            self._began = time.perf_counter()
+            self.process = subprocess.Popen(
+                args, stdin=stdin, stdout=stdout, stderr=self._stderr, cwd=cwd, start_new_session=True,
+                preexec_fn=sandbox._preexec(self._cgroup, memory_bytes, math.ceil(timeout), limit_address_space, output_bytes)
+            )
+            self._stderr.start()
+        except Exception:
+            self._release()
+            raise
+        self._timed_out = threading.Event()
+        self._timer = threading.Timer(wall_timeout, self._on_timeout)
+        self._timer.daemon = True
+        self._timer.start()
+
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+
+    def _on_timeout(self) -> None:
+        self._timed_out.set()
+        self.kill()
+
+    def kill(self) -> None:
+        if self._cgroup is not None:
+            self._cgroup.kill()
+            return
+        if self._sandbox._namespace_flags & CLONE_NEWPID and self.process.returncode is None:
+            # Only below the namespace's init, which then reaps the solution and exits, so that
+            # the solution's CPU time still reaches wait4() through its parents.
+            victims = [pid for init in _children(self.process.pid) for pid in _descendants(init)]
+            for pid in victims:
+                try:
+                    os.kill(pid, 9)
+                except OSError:
+                    pass
+            if victims:
+                return
+        try:
+            os.killpg(self.process.pid, 9)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def _release(self) -> None:
+        self._stderr.close()
+        if self._cgroup is not None:
+            self._sandbox._cgroups.release(self._cgroup)
+            self._cgroup = None
+
+    def wait(self) -> Tuple[subprocess.CompletedProcess, RunStats]:
+        try:
+            try:
+                # wait4() rather than Popen.wait(), to get the child's rusage.
+                _, status, usage = os.wait4(self.process.pid, 0)
+            finally:
+                self._timer.cancel()
+            wall_time = time.perf_counter() - self._began
+            self.process.returncode = os.waitstatus_to_exitcode(status)
+            # Whatever it left running in the background goes too.
+            self.kill()
+
+            errors = self._stderr.close()
+
+            if self._cgroup is not None:
+                cpu_before, ooms_before = self._counters
+                cpu_after, ooms_after = self._cgroup.counters()
+                cpu_time = (cpu_after - cpu_before) / 1000000
+                memory_peak = self._cgroup.memory_peak() or usage.ru_maxrss * 1024
+                memory_exceeded = ooms_after > ooms_before
+            else:
+                # ru_maxrss also counts the judge's own pages the child had before exec, so it is only an
+                # upper bound, too coarse to call MLE on. Going over RLIMIT_AS fails an allocation instead.
+                cpu_time = usage.ru_utime + usage.ru_stime
+                memory_peak = usage.ru_maxrss * 1024
+                memory_exceeded = False
+            # RLIMIT_CPU ends a busy loop with SIGXCPU before the wall clock timer fires.
+            timed_out = self._timed_out.is_set() or self.process.returncode == -24 or cpu_time > self._timeout
+        finally:
+            self._release()
+
+        stats = RunStats(wall_time, cpu_time, memory_peak, memory_exceeded, timed_out)
+        return subprocess.CompletedProcess(self.args, self.process.returncode, None, errors), stats
+
+
+class Sandbox(object):
+    def __init__(self, namespaces: bool = True, cgroup_root: str = "", uid: int = 65534, gid: int = 65534,
+                 max_processes: int = 64, cpus: float = 1.0, confine: bool = True):
+        # confine=False keeps only the limits and the accounting, for trusted programs such as interactors.
+        if _libc is None:
+            raise RuntimeError("The sandbox needs Linux")
+        self._confine = confine
+        self._as_root = os.geteuid() == 0
+        self._uid = uid if self._as_root else os.getuid()
+        self._gid = gid if self._as_root else os.getgid()
+        self._max_processes = max_processes
+        self._cpus = cpus
+        self._filter = None
+        self._cgroups: Optional[CgroupPool] = None
+        self._namespace_flags = 0
+        if not confine:
+            return
+
+        self._filter = _build_seccomp_filter()
+        if self._filter is None:
+            _logger.warning("libseccomp Python bindings not found, running submissions without a seccomp filter")
+
+        if cgroup_root:
+            try:
+                self._cgroups = CgroupPool(cgroup_root)
+            except Exception as e:
+                _logger.warning(f"Cgroup {cgroup_root} unusable, falling back to rlimits: {e}")
+
+        if namespaces:
+            self._namespace_flags = CLONE_NEWNS | CLONE_NEWNET | CLONE_NEWIPC | CLONE_NEWUTS | CLONE_NEWPID
+            if not self._as_root:
+                self._namespace_flags |= CLONE_NEWUSER
+            if not self._probe():
+                self._namespace_flags = 0
+
+    def _probe(self) -> bool:
+        # Containers and some distributions forbid (unprivileged) namespaces; find out once.
+        probe = shutil.which("true") or sys.executable
+        try:
+            subprocess.run([probe], preexec_fn=self._preexec(None, None, 1, False), check=True, timeout=10)
+            return True
+        except Exception as e:
+            _logger.warning(f"Namespaces unavailable, running submissions without them: {e}")
+            return False
+
+    def _preexec(self, cgroup: Optional[Cgroup], memory_bytes: Optional[int], cpu_seconds: Optional[int],
+                 limit_address_space: bool, output_bytes: Optional[int] = None):
+        flags = self._namespace_flags
+        confine = self._confine
+        uid, gid = os.getuid(), os.getgid()
+        procs_path = cgroup.procs_path if cgroup is not None else None
+
+        def setup() -> None:
+            # Runs in the child between fork and exec; keep it to plain system calls.
+            if procs_path is not None:
+                _write_file(procs_path, "0")
+            resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+            if cpu_seconds is not None:
+                resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+            if output_bytes:
+                resource.setrlimit(resource.RLIMIT_FSIZE, (output_bytes + 1, output_bytes + 1))
+            if memory_bytes and procs_path is None and limit_address_space:
+                resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+            if not confine:
+                return
+            if flags:
+                _check(_libc.unshare(flags))
+                if flags & CLONE_NEWUSER:
+                    _write_file("/proc/self/setgroups", "deny")
+                    _write_file("/proc/self/uid_map", f"{uid} {uid} 1")
+                    _write_file("/proc/self/gid_map", f"{gid} {gid} 1")
+                # Nothing mounted in here may show up outside.
+                _check(_libc.mount(b"none", b"/", None, _MS_REC | _MS_PRIVATE, None))
+            if self._as_root:
+                os.setgroups([])
+                os.setgid(self._gid)
+                os.setuid(self._uid)
+            _check(_libc.prctl(_PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0))
+            if self._filter is not None:
+                self._filter.load()
+            if flags & CLONE_NEWPID:
+                _fork_namespace_init()
+        return setup
+
+    @property
+    def has_cgroups(self) -> bool:
+        return self._cgroups is not None
+
+    def popen(self, args: List[str], **kwargs) -> subprocess.Popen:
+        # Confined like a submission, but long-lived and without its limits, e.g. the Python zygote.
+        return subprocess.Popen(args, start_new_session=True, preexec_fn=self._preexec(None, None, None, False), **kwargs)
+
+    def spawn(self, args: List[str], stdin, stdout, timeout: float, cwd: Optional[str] = None,
+              memory_limit: Optional[int] = None, limit_address_space: bool = True,
+              wall_timeout: Optional[float] = None, output_limit: Optional[int] = None) -> SandboxedProcess:
+        # timeout limits CPU time; wall_timeout (timeout by default) is how long it may take at all.
+        # output_limit caps, in bytes, every file it writes, its stdout included.
+        memory_bytes = memory_limit * 1024 * 1024 if memory_limit else None
+        return SandboxedProcess(self, args, stdin, stdout, timeout, wall_timeout or timeout, cwd, memory_bytes,
+                                limit_address_space, output_limit)
+
+    def run(self, args: List[str], stdin, stdout, timeout: float, cwd: Optional[str] = None,
+            memory_limit: Optional[int] = None, limit_address_space: bool = True,
+            output_limit: Optional[int] = None) -> Tuple[subprocess.CompletedProcess, RunStats]:
+        return self.spawn(args, stdin, stdout, timeout, cwd, memory_limit, limit_address_space, output_limit=output_limit).wait()
+
+
+_sandbox: Optional[Sandbox] = None
+_unconfined: Optional[Sandbox] = None
+_sandbox_lock = threading.Lock()
+
+
+def get_sandbox() -> Optional[Sandbox]:
+    from .config_loader import Config
+
+    if not Config.get("judge.sandbox_enabled", False):
+        return None
+    global _sandbox
+    if _sandbox is None:
+        with _sandbox_lock:
+            if _sandbox is None:
+                _sandbox = Sandbox(
+                    namespaces=Config.get("judge.sandbox_namespaces", True),
+                    cgroup_root=Config.get("judge.sandbox_cgroup", ""),
+                    uid=Config.get("judge.sandbox_uid", 65534),
+                    gid=Config.get("judge.sandbox_gid", 65534),
+                    max_processes=Config.get("judge.sandbox_max_processes", 64),
+                    cpus=Config.get("judge.sandbox_cpus", 1.0)
+                )
+    return _sandbox
+
+
+def get_runner(trusted: bool = False) -> Sandbox:
+    # The sandbox when it is enabled and the program is a submission, otherwise limits and accounting only.
+    sandbox = None if trusted else get_sandbox()
+    if sandbox is not None:
+        return sandbox
+    global _unconfined
+    if _unconfined is None:
+        with _sandbox_lock:
+            if _unconfined is None:
+                _unconfined = Sandbox(confine=False)
+    return _unconfined
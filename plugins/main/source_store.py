@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# source_store.py
+# Content-addressed, compressed storage helpers for submission source code
+# @author: Ayanami_404<jiyizhuo2011@hotmail.com>
+# @maintainer: Project EverJudge
+# @license: BSD 3-Clause License
+# @version: 0.1.0
+# Copyright Project EverJudge 2025, All Rights Reserved.
+
+# Sources are keyed by the SHA-256 of their UTF-8 bytes, so resubmitting the same code stores nothing new.
+# The algorithm is recorded per blob, which keeps old blobs readable when the configured algorithm changes.
+
+import hashlib
+import zlib
+from typing import Optional
+
+try:
+    import zstandard # Optional, better ratio and faster than zlib.
+except ImportError:
+    zstandard = None
+
+_DEFAULT_ALGORITHM = "zlib"
+
+
+def source_hash(source: str) -> str:
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def get_compression_algorithm() -> str:
+    from .config_loader import Config
+
+    algorithm = Config.get("database.source_compression", _DEFAULT_ALGORITHM)
+    if algorithm == "zstd" and zstandard is None:
+        return _DEFAULT_ALGORITHM
+    return algorithm
+
+
+def compress_source(source: str, algorithm: Optional[str] = None) -> tuple[str, bytes]:
+    algorithm = algorithm or get_compression_algorithm()
+    raw = source.encode("utf-8")
+    if algorithm == "zstd":
+        return algorithm, zstandard.ZstdCompressor(level=9).compress(raw)
+    elif algorithm == "zlib":
+        return algorithm, zlib.compress(raw, 6)
+    elif algorithm == "none":
+        return algorithm, raw
+    else:
+        raise ValueError(f"Unsupported source compression: {algorithm}")
+
+
+def decompress_source(algorithm: str, data: bytes) -> str:
+    if algorithm == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed sources")
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    elif algorithm == "zlib":
+        return zlib.decompress(data).decode("utf-8")
+    elif algorithm == "none":
+        return data.decode("utf-8")
+    else:
+        raise ValueError(f"Unsupported source compression: {algorithm}")
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# statement.py
+# Problem statement rendering for EverJudge
+# @author: Ayanami_404<jiyizhuo2011@hotmail.com>
+# @maintainer: Project EverJudge
+# @license: BSD 3-Clause License
+# @version: 0.1.0
+# Copyright Project EverJudge 2025, All Rights Reserved.
+
+# Statements are rendered to HTML when a problem is saved and stored on the row together with a hash of
+# their sources, so a page view only reads the stored HTML. Rows saved before this existed are rendered on
+# their first view. Markdown is optional; without it the sources are used as HTML exactly as written, like they
+# always were. With Markdown, math ($...$, $$...$$, \(...\), \[...\]) is kept away from it and emitted with
+# \( \) / \[ \] delimiters for the page's KaTeX to typeset, since there is no Python-side TeX renderer; "\$" is
+# a literal dollar sign there. Whether the rendered HTML contains such delimiters is stored as well, and the
+# page only loads KaTeX for statements that do.
+
+import hashlib
+import html
+import json
+import re
+from typing import Dict
+
+try:
+    import markdown # Optional, statements are treated as HTML without it.
+except ImportError:
+    markdown = None
+
+STATEMENT_FIELDS = ("description", "input_format", "output_format", "constraints", "hint")
+
+# Bump when the rendering below changes, so stored statements are rendered again.
+_RENDERER_VERSION = 3
+
+_MATH = re.compile(r"\$\$(.+?)\$\$|\\\[(.+?)\\\]|(?<![\\$])\$(?!\s)([^$\n]+?)(?<!\s)\$|\\\((.+?)\\\)", re.S)
+_PLACEHOLDER = re.compile(r"EVERJUDGEMATH(\d+)X")
+_DELIMITED_MATH = re.compile(r"\\\(.+?\\\)|\\\[.+?\\\]", re.S) # What the page's KaTeX typesets.
+
+
+def _renderer_name() -> str:
+    return f"{'markdown' if markdown is not None else 'html'}-{_RENDERER_VERSION}"
+
+
+def statement_hash(problem) -> str:
+    digest = hashlib.sha256(_renderer_name().encode("utf-8"))
+    for name in STATEMENT_FIELDS:
+        digest.update(b"\x1f")
+        digest.update((getattr(problem, name) or "").encode("utf-8"))
+    return digest.hexdigest()
+
+
+def render_text(text: str) -> str:
+    if not text:
+        return ""
+    if markdown is None:
+        return text
+
+    formulas = []
+
+    def _stash(match) -> str:
+        display, display_brackets, inline, inline_parens = match.groups()
+        source = display if display is not None else display_brackets
+        if source is not None:
+            formulas.append(f'<span class="math display">\\[{html.escape(source.strip(), quote=False)}\\]</span>')
+        else:
+            source = inline if inline is not None else inline_parens
+            formulas.append(f'<span class="math inline">\\({html.escape(source.strip(), quote=False)}\\)</span>')
+        return f"EVERJUDGEMATH{len(formulas) - 1}X"
+
+    text = markdown.markdown(_MATH.sub(_stash, text), extensions=["extra", "sane_lists"])
+    return _PLACEHOLDER.sub(lambda m: formulas[int(m.group(1))], text.replace("\\$", "$"))
+
+
+def refresh_statement(problem) -> bool:
+    # Returns True when the stored HTML was out of date and has been rendered again.
+    digest = statement_hash(problem)
+    if problem.statement_hash == digest and problem.rendered_statement:
+        return False
+    rendered = {name: render_text(getattr(problem, name)) for name in STATEMENT_FIELDS}
+    problem.rendered_statement = json.dumps(rendered)
+    problem.statement_has_math = any(_DELIMITED_MATH.search(text) for text in rendered.values())
+    problem.statement_hash = digest
+    return True
+
+
+def load_statement(problem) -> Dict[str, str]:
+    if not problem.rendered_statement:
+        refresh_statement(problem)
+    return json.loads(problem.rendered_statement)
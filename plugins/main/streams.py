@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+# streams.py
+# Standard streams of solution runs for EverJudge
+# @author: Ayanami_404<jiyizhuo2011@hotmail.com>
+# @maintainer: Project EverJudge
+# @license: BSD 3-Clause License
+# @version: 0.1.0
+# Copyright Project EverJudge 2025, All Rights Reserved.
+
+# The run path never decodes anything. Test input is handed to the solution as an open file (the child
+# reads it straight from the page cache), stdout goes to a file capped with RLIMIT_FSIZE one byte above the
+# problem's output limit (judge.output_limit MB by default), and stderr goes through a pipe into a ring buffer
+# keeping its last _STDERR_LIMIT bytes, where the end of a traceback is. Bytes become text only for error
+# messages. Output of exactly the limit is accepted; a solution writing past it gets SIGXFSZ and ends on the
+# spot. A "python3 <path>" run ignores SIGXFSZ, so there the write fails with EFBIG instead and the solution
+# usually dies of the OSError; preforked runs reset it and are killed like compiled ones. Either way the file
+# has grown past the limit, its output is discarded and the test is judged OLE.
+
+import os
+import threading
+from typing import Optional
+
+_STDERR_LIMIT = 65536
+_READ_SIZE = 65536
+
+
+class OutputLimitExceeded(Exception):
+    def __init__(self, limit: int):
+        super().__init__(f"Output limit exceeded ({limit // (1024 * 1024)} MB)")
+        self.limit = limit
+
+
+class RingBuffer(object):
+    def __init__(self, size: int = _STDERR_LIMIT):
+        self._size = size
+        self._data = bytearray()
+        self.dropped = 0
+
+    def write(self, data: bytes) -> None:
+        self._data += data
+        excess = len(self._data) - self._size
+        if excess > 0:
+            del self._data[:excess]
+            self.dropped += excess
+
+    def getvalue(self) -> bytes:
+        return bytes(self._data)
+
+    def text(self) -> str:
+        text = self._data.decode("utf-8", errors="replace")
+        return f"[{self.dropped} bytes cut]\n{text}" if self.dropped else text
+
+
+class StderrReader(object):
+    # The write end goes to the child; a thread drains the read end into a RingBuffer.
+    def __init__(self, size: int = _STDERR_LIMIT):
+        self.buffer = RingBuffer(size)
+        self._read_fd, self.write_fd = os.pipe()
+        self._thread: Optional[threading.Thread] = None
+
+    def fileno(self) -> int:
+        return self.write_fd
+
+    def start(self) -> None:
+        # Called once the child has its copy of the write end.
+        os.close(self.write_fd)
+        self.write_fd = -1
+        self._thread = threading.Thread(target=self._drain, name="EverJudge Stderr Reader", daemon=True)
+        self._thread.start()
+
+    def _drain(self) -> None:
+        try:
+            while True:
+                data = os.read(self._read_fd, _READ_SIZE)
+                if not data:
+                    break
+                self.buffer.write(data)
+        except OSError:
+            pass
+        finally:
+            os.close(self._read_fd)
+
+    def close(self, timeout: float = 1.0) -> str:
+        # Anything the child left running in the background has been killed by now, so the pipe ends;
+        # the timeout only guards against a descriptor leaked somewhere else.
+        if self.write_fd >= 0:
+            os.close(self.write_fd)
+            self.write_fd = -1
+        if self._thread is not None:
+            self._thread.join(timeout)
+        elif self._read_fd >= 0:
+            os.close(self._read_fd)
+            self._read_fd = -1
+        return self.buffer.text()
+
+
+def output_limit_bytes(megabytes: Optional[float] = None) -> int:
+    if megabytes is None:
+        from .config_loader import Config
+        megabytes = Config.get("judge.output_limit", 64)
+    return int(megabytes * 1024 * 1024)
+
+
+def output_exceeded(stdout, limit: int) -> bool:
+    # The file is capped one byte above the limit, so growing past the limit means the solution wrote too much.
+    fd = stdout if isinstance(stdout, int) else stdout.fileno()
+    try:
+        return os.fstat(fd).st_size > limit
+    except OSError:
+        return False
+
+
+def discard_output(stdout) -> None:
+    # What a solution over the limit wrote is never compared, so it does not keep its disk space either.
+    fd = stdout if isinstance(stdout, int) else stdout.fileno()
+    try:
+        os.ftruncate(fd, 0)
+    except OSError:
+        pass
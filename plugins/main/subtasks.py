@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+# subtasks.py
+# Subtask scoring for EverJudge
+# @author: Ayanami_404<jiyizhuo2011@hotmail.com>
+# @maintainer: Project EverJudge
+# @license: BSD 3-Clause License
+# @version: 0.1.0
+# Copyright Project EverJudge 2025, All Rights Reserved.
+
+# Test cases are grouped into subtasks (TestCase.subtask refers to Subtask.number of the same problem).
+#   "min": the subtask is worth Subtask.score times its worst case; the first case scoring nothing
+#          decides it, so its remaining cases are skipped.
+#   "sum": every case adds TestCase.score times its own result; all of them run.
+# A subtask lists the subtasks it depends on; unless all of them got their full score it is skipped
+# and scores nothing. Cases outside of any subtask form an implicit "sum" subtask numbered 0.
+# Skipped cases are reported with no verdict. A case in several subtasks is judged once.
+
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .api import JudgeResult
+
+_logger = logging.getLogger("EverJudge Subtasks")
+
+SCORING_MODES = ("min", "sum")
+
+
+@dataclass
+class SubtaskSpec:
+    number: int
+    scoring: str = "min"
+    score: float = 0 # Of the whole subtask, used by "min".
+    cases: List[int] = field(default_factory=list) # Groups, in judging order.
+    case_scores: Dict[int, float] = field(default_factory=dict) # Used by "sum".
+    dependencies: List[int] = field(default_factory=list)
+
+    @property
+    def full_score(self) -> float:
+        if self.scoring == "sum":
+            return sum(self.case_scores.get(case, 1) for case in self.cases)
+        return self.score
+
+
+@dataclass
+class SubtaskResult:
+    number: int
+    score: float = 0
+    full_score: float = 0
+    skipped: bool = False
+    cases: Dict[int, Optional[JudgeResult]] = field(default_factory=dict) # None for skipped cases.
+
+    @property
+    def passed(self) -> bool:
+        return not self.skipped and self.score >= self.full_score
+
+
+def order_subtasks(subtasks: List[SubtaskSpec]) -> List[SubtaskSpec]:
+    # Prerequisites first, otherwise in the order given.
+    by_number = {subtask.number: subtask for subtask in subtasks}
+    ordered: List[SubtaskSpec] = []
+    state: Dict[int, int] = {} # 1 visiting, 2 done.
+
+    def visit(subtask: SubtaskSpec) -> None:
+        if state.get(subtask.number) == 2:
+            return
+        if state.get(subtask.number) == 1:
+            raise ValueError(f"Circular dependency at subtask {subtask.number}")
+        state[subtask.number] = 1
+        for number in subtask.dependencies:
+            if number not in by_number:
+                raise ValueError(f"Subtask {subtask.number} depends on unknown subtask {number}")
+            visit(by_number[number])
+        state[subtask.number] = 2
+        ordered.append(subtask)
+
+    for subtask in subtasks:
+        if subtask.scoring not in SCORING_MODES:
+            raise ValueError(f"Unsupported scoring of subtask {subtask.number}: {subtask.scoring}")
+        visit(subtask)
+    return ordered
+
+
+def run_subtasks(subtasks: List[SubtaskSpec], judge_case: Callable[[int], Tuple[JudgeResult, float]],
+                 progress: Optional[Callable[[int, JudgeResult], None]] = None) -> List[SubtaskResult]:
+    # judge_case(group) returns the case's verdict and the fraction of its score it earned.
+    results: Dict[int, SubtaskResult] = {}
+    judged: Dict[int, Tuple[JudgeResult, float]] = {}
+    skipped_cases = 0
+    for subtask in order_subtasks(subtasks):
+        result = results[subtask.number] = SubtaskResult(subtask.number, full_score=subtask.full_score)
+        failed = [number for number in subtask.dependencies if not results[number].passed]
+        if failed:
+            _logger.info(f"Skipping subtask {subtask.number}, prerequisites {failed} not passed")
+            result.skipped = True
+            result.cases = {case: None for case in subtask.cases}
+            skipped_cases += len(subtask.cases)
+            continue
+
+        worst = 1.0
+        for index, case in enumerate(subtask.cases):
+            if case in judged:
+                verdict, fraction = judged[case]
+            else:
+                verdict, fraction = judged[case] = judge_case(case)
+            result.cases[case] = verdict
+            if progress is not None:
+                try:
+                    progress(case, verdict)
+                except Exception as e:
+                    _logger.error(f"Error reporting progress for group {case}: {e}")
+
+            if subtask.scoring == "sum":
+                result.score += subtask.case_scores.get(case, 1) * fraction
+                continue
+            worst = min(worst, fraction)
+            if worst <= 0:
+                rest = subtask.cases[index + 1:]
+                result.cases.update({later: None for later in rest})
+                skipped_cases += len(rest)
+                break
+        if subtask.scoring == "min":
+            result.score = subtask.score * worst
+
+    if skipped_cases:
+        _logger.info(f"Skipped {skipped_cases} test cases that could no longer change the score")
+    return [results[subtask.number] for subtask in subtasks]
+
+
+def load_subtasks(problem, case_order: Optional[str] = None) -> List[SubtaskSpec]:
+    # Cases run in judge.case_order within each subtask, see ordering.py.
+    from .ordering import order_cases
+
+    specs: Dict[int, SubtaskSpec] = {}
+    for subtask in sorted(problem.subtasks, key=lambda s: s.number):
+        specs[subtask.number] = SubtaskSpec(subtask.number, subtask.scoring, subtask.score,
+                                            dependencies=subtask.dependency_numbers)
+    for case in order_cases(problem.test_cases, case_order):
+        number = case.subtask if case.subtask in specs else 0
+        if case.subtask is not None and number != case.subtask:
+            _logger.warning(f"Test case {case.test_number} of problem {problem.id} names unknown subtask {case.subtask}")
+        if number not in specs:
+            specs[0] = SubtaskSpec(0, "sum")
+        specs[number].cases.append(case.test_number)
+        specs[number].case_scores[case.test_number] = case.score
+    return list(specs.values())
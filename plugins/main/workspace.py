@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+# workspace.py
+# Per-judging working directories for EverJudge
+# @author: Ayanami_404<jiyizhuo2011@hotmail.com>
+# @maintainer: Project EverJudge
+# @license: BSD 3-Clause License
+# @version: 0.1.0
+# Copyright Project EverJudge 2025, All Rights Reserved.
+
+# Every judging compiles and runs inside a directory of its own, so two submissions of Main.java
+# (or two a.out) never meet. Only the source is put into it; test data is handed to the solution
+# through its standard streams and never copied.
+# Released workspaces are emptied by a background thread and kept for the next judging,
+# up to judge.workspace_pool_size of them, so a judging normally costs no mkdir or rmdir.
+# The directories live under judge.workspace_dir (<judge.temp_dir>/workspaces by default);
+# pointing it at a tmpfs such as /dev/shm keeps compiler output off the disk.
+
+import contextlib
+import itertools
+import logging
+import os
+import queue
+import shutil
+import threading
+from collections import deque
+from typing import Deque, Optional
+
+_logger = logging.getLogger("EverJudge Workspace")
+
+
+class Workspace(object):
+    def __init__(self, path: str):
+        self.path = path
+
+    def path_of(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def stage(self, source: str, name: Optional[str] = None) -> str:
+        # A hard link costs no copy; across file systems (a tmpfs workspace) the file is copied.
+        target = self.path_of(name or os.path.basename(source))
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copyfile(source, target)
+        return target
+
+    def write(self, name: str, data: bytes) -> str:
+        target = self.path_of(name)
+        with open(target, "wb") as f:
+            f.write(data)
+        return target
+
+    def clear(self) -> None:
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path)
+                else:
+                    os.unlink(entry.path)
+
+    def __repr__(self) -> str:
+        return f'<Workspace {self.path}>'
+
+
+class WorkspaceManager(object):
+    def __init__(self, root: str, pool_size: Optional[int] = None):
+        self._root = os.path.abspath(root)
+        self._pool_size = pool_size
+        self._idle: Deque[Workspace] = deque()
+        self._dirty: "queue.Queue[Workspace]" = queue.Queue()
+        self._counter = itertools.count()
+        self._prefix = f"ws-{os.getpid()}-"
+        self._lock = threading.Lock()
+        self._cleaner: Optional[threading.Thread] = None
+        os.makedirs(self._root, exist_ok=True)
+        self._remove_stale()
+
+    @property
+    def root(self) -> str:
+        return self._root
+
+    def pool_size(self) -> int:
+        if self._pool_size is not None:
+            return self._pool_size
+        from .config_loader import Config
+        return Config.get("judge.workspace_pool_size", 4)
+
+    def _remove_stale(self) -> None:
+        # Workspaces of judge processes that are gone; the pid is part of the directory name.
+        for name in os.listdir(self._root):
+            parts = name.split("-")
+            if len(parts) != 3 or parts[0] != "ws" or not parts[1].isdigit():
+                continue
+            pid = int(parts[1])
+            if pid != os.getpid() and not _process_alive(pid):
+                shutil.rmtree(os.path.join(self._root, name), ignore_errors=True)
+
+    def prefill(self, count: Optional[int] = None) -> None:
+        count = self.pool_size() if count is None else count
+        with self._lock:
+            while len(self._idle) < count:
+                self._idle.append(self._create())
+
+    def _create(self) -> Workspace:
+        path = os.path.join(self._root, f"{self._prefix}{next(self._counter)}")
+        os.makedirs(path)
+        return Workspace(path)
+
+    def acquire(self) -> Workspace:
+        with self._lock:
+            if self._idle:
+                return self._idle.popleft()
+        return self._create()
+
+    def release(self, workspace: Workspace) -> None:
+        self._dirty.put(workspace)
+        with self._lock:
+            if self._cleaner is None:
+                self._cleaner = threading.Thread(target=self._clean, name="EverJudge Workspace Cleaner", daemon=True)
+                self._cleaner.start()
+
+    @contextlib.contextmanager
+    def workspace(self):
+        workspace = self.acquire()
+        try:
+            yield workspace
+        finally:
+            self.release(workspace)
+
+    def _clean(self) -> None:
+        while True:
+            workspace = self._dirty.get()
+            try:
+                with self._lock:
+                    keep = len(self._idle) < self.pool_size()
+                if keep:
+                    workspace.clear()
+                    with self._lock:
+                        self._idle.append(workspace)
+                else:
+                    shutil.rmtree(workspace.path)
+            except Exception as e:
+                _logger.error(f"Error cleaning {workspace.path}, discarding it: {e}")
+                shutil.rmtree(workspace.path, ignore_errors=True)
+            finally:
+                self._dirty.task_done()
+
+    def wait_clean(self) -> None:
+        self._dirty.join()
+
+    def close(self) -> None:
+        self.wait_clean()
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for workspace in idle:
+            shutil.rmtree(workspace.path, ignore_errors=True)
+
+
+def _process_alive(pid: int) -> bool:
+    if os.name == "nt":
+        return True # os.kill() would terminate it there.
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True # It exists but belongs to someone else.
+    return True
+
+
+_manager: Optional[WorkspaceManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_workspace_manager() -> WorkspaceManager:
+    global _manager
+    if _manager is None:
+        from .config_loader import Config
+
+        with _manager_lock:
+            if _manager is None:
+                root = Config.get("judge.workspace_dir", "") or os.path.join(Config.get("judge.temp_dir", "./temp"), "workspaces")
+                _manager = WorkspaceManager(root)
+                _manager.prefill()
+    return _manager
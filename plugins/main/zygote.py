@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+# zygote.py
+# Preforking Python runner for EverJudge
+# @author: Ayanami_404<jiyizhuo2011@hotmail.com>
+# @maintainer: Project EverJudge
+# @license: BSD 3-Clause License
+# @version: 0.1.0
+# Copyright Project EverJudge 2025, All Rights Reserved.
+
+# With zygote = true in its [language.*] entry (python, or a language extending it), PythonProvider does not
+# start an interpreter per test case.
+# A zygote (zygote_server.py), started once per interpreter, has imported the usual standard library
+# modules already; it checks syntax with compile() in place of "python3 -m py_compile", and forks a
+# child per run that gets the limits and executes the cached code object. The fork skips the interpreter
+# startup and the imports, which is most of the time a small test case takes.
+#
+# With judge.sandbox_enabled the zygote itself is confined like a submission (namespaces, uid, seccomp),
+# so every child is too. Memory is then limited with RLIMIT_AS per child; a sandbox with a cgroup
+# accounts memory per run, which a shared zygote cannot do, so it keeps starting interpreters.
+
+import json
+import logging
+import os
+import shlex
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from .sandbox import RunStats
+from .streams import StderrReader
+
+_logger = logging.getLogger("EverJudge Zygote")
+
+_SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "zygote_server.py")
+
+_SIGXCPU = -24
+
+
+class ZygoteError(Exception):
+    pass
+
+
+class _Call(object):
+    def __init__(self):
+        self.done = threading.Event()
+        self.reply: Optional[dict] = None
+
+
+class ZygoteRun(object):
+    # Handle of one run; kill() is what LanguageProvider.cancel() calls.
+    def __init__(self, zygote: 'PythonZygote', request_id: int):
+        self._zygote = zygote
+        self.request_id = request_id
+
+    def kill(self) -> None:
+        self._zygote.kill(self.request_id)
+
+
+class PythonZygote(object):
+    def __init__(self, python_cmd: str, sandbox=None):
+        self.python_cmd = python_cmd
+        self._sandbox = sandbox
+        self._conn: Optional[socket.socket] = None
+        self._process: Optional[subprocess.Popen] = None
+        self._calls: Dict[int, _Call] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _start(self) -> None:
+        if self._process is not None:
+            self._process.poll() # Reap the one that exited.
+        with open(_SERVER, "r", encoding="utf-8") as f:
+            # Passed as -c, so a zygote dropped to another uid needs no access to the judge's files.
+            server = f.read()
+        ours, theirs = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        try:
+            args = [*shlex.split(self.python_cmd), "-c", server]
+            if self._sandbox is not None:
+                self._process = self._sandbox.popen(args, stdin=theirs.fileno())
+            else:
+                self._process = subprocess.Popen(args, stdin=theirs.fileno(), start_new_session=True)
+        except Exception:
+            ours.close()
+            raise
+        finally:
+            theirs.close()
+        self._conn = ours
+        threading.Thread(target=self._read, args=(ours,), name="EverJudge Zygote Reader", daemon=True).start()
+        _logger.info(f"Started a Python zygote for {self.python_cmd} (pid {self._process.pid})")
+
+    def _read(self, conn: socket.socket) -> None:
+        while True:
+            try:
+                data = conn.recv(65536)
+            except OSError:
+                data = b""
+            if not data:
+                break
+            reply = json.loads(data)
+            with self._lock:
+                call = self._calls.pop(reply["id"], None)
+            if call is not None:
+                call.reply = reply
+                call.done.set()
+
+        with self._lock:
+            if self._conn is conn:
+                self._conn = None
+                _logger.warning(f"Python zygote for {self.python_cmd} exited")
+            calls, self._calls = self._calls, {}
+        for call in calls.values():
+            call.done.set() # With no reply, which the waiter reports.
+        conn.close()
+
+    def _send(self, request: dict, fds=()) -> Tuple[int, _Call]:
+        call = _Call()
+        with self._lock:
+            if self._conn is None:
+                self._start()
+            self._next_id += 1
+            request["id"] = self._next_id
+            self._calls[request["id"]] = call
+            try:
+                socket.send_fds(self._conn, [json.dumps(request).encode("utf-8")], list(fds))
+            except OSError as e:
+                del self._calls[request["id"]]
+                raise ZygoteError(f"Python zygote unreachable: {e}")
+            return request["id"], call
+
+    def kill(self, request_id: int) -> None:
+        try:
+            with self._lock:
+                if self._conn is not None:
+                    self._conn.send(json.dumps({"op": "kill", "id": request_id}).encode("utf-8"))
+        except OSError:
+            pass
+
+    def check(self, path: str, timeout: float = 10) -> Tuple[bool, str]:
+        _, call = self._send({"op": "check", "path": os.path.abspath(path)})
+        if not call.done.wait(timeout) or call.reply is None:
+            raise ZygoteError("Python zygote did not answer")
+        return call.reply["ok"], call.reply["message"]
+
+    def spawn(self, path: str, stdin, stdout, timeout: float, cwd: Optional[str] = None,
+              memory_limit: Optional[int] = None, output_limit: Optional[int] = None) -> Tuple[ZygoteRun, Callable[[], Tuple[subprocess.CompletedProcess, RunStats]]]:
+        # Returns the run's handle and a function waiting for its (CompletedProcess, RunStats).
+        stderr = StderrReader()
+        try:
+            fds = [f if isinstance(f, int) else f.fileno() for f in (stdin, stdout, stderr)]
+            began = time.perf_counter()
+            request_id, call = self._send({
+                "op": "run",
+                "path": os.path.abspath(path),
+                "cwd": os.path.abspath(cwd or os.getcwd()),
+                "cpu": max(1, int(timeout + 0.999)),
+                "memory": memory_limit * 1024 * 1024 if memory_limit else None,
+                "output": output_limit,
+            }, fds)
+        except Exception:
+            stderr.close()
+            raise
+        stderr.start()
+        run = ZygoteRun(self, request_id)
+        timed_out = threading.Event()
+
+        def on_timeout() -> None:
+            timed_out.set()
+            run.kill()
+
+        timer = threading.Timer(timeout, on_timeout)
+        timer.daemon = True
+        timer.start()
+
+        def wait() -> Tuple[subprocess.CompletedProcess, RunStats]:
+            try:
+                call.done.wait()
+                timer.cancel()
+                if call.reply is None:
+                    raise ZygoteError("Python zygote exited during a run")
+                wall_time = time.perf_counter() - began
+            finally:
+                errors = stderr.close()
+            reply = call.reply
+            cpu_time = reply["cpu"]
+            stats = RunStats(wall_time, cpu_time, reply["maxrss"], False,
+                             timed_out.is_set() or reply["exit"] == _SIGXCPU or cpu_time > timeout)
+            return subprocess.CompletedProcess([self.python_cmd, path], reply["exit"], None, errors), stats
+        return run, wait
+
+    def close(self) -> None:
+        with self._lock:
+            conn, self._conn = self._conn, None
+            process, self._process = self._process, None
+        if conn is not None:
+            conn.close() # The zygote exits on EOF.
+        if process is not None:
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+
+_zygotes: Dict[str, PythonZygote] = {}
+_zygotes_lock = threading.Lock()
+
+
+def get_python_zygote(python_cmd: str) -> Optional[PythonZygote]:
+    # PythonProvider only asks with the zygote enabled for its language.
+    from .sandbox import get_sandbox
+
+    if not sys.platform.startswith("linux"):
+        return None
+    sandbox = get_sandbox()
+    if sandbox is not None and sandbox.has_cgroups:
+        return None
+    with _zygotes_lock:
+        zygote = _zygotes.get(python_cmd)
+        if zygote is None:
+            zygote = _zygotes[python_cmd] = PythonZygote(python_cmd, sandbox)
+    return zygote
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+# zygote_server.py
+# Preforking Python runner, the process side
+# @author: Ayanami_404<jiyizhuo2011@hotmail.com>
+# @maintainer: Project EverJudge
+# @license: BSD 3-Clause License
+# @version: 0.1.0
+# Copyright Project EverJudge 2025, All Rights Reserved.
+
+# Run by zygote.py under the submissions' interpreter, never imported by the judge; it must get by with the
+# standard library alone. Its stdin is a SOCK_SEQPACKET socket to the judge, one JSON request per packet:
+#   {"op": "check", "id", "path"}          compile the source, answer {"id", "ok", "message"}
+#   {"op": "run", "id", "path", "cwd", "cpu", "memory", "output"} + the child's stdin, stdout and stderr as SCM_RIGHTS,
+#                                          fork and run it, answer {"id", "exit", "cpu", "maxrss"} once it ends
+#   {"op": "kill", "id"}                   kill a run and everything it started
+# It exits when the judge closes the socket.
+
+import gc
+import hashlib
+import json
+import os
+import resource
+import selectors
+import signal
+import socket
+import sys
+import traceback
+import types
+
+# Imported once here instead of by every solution.
+import array, bisect, collections, copy, decimal, fractions, functools, heapq, io, itertools, math, operator, \
+    random, re, statistics, string, typing # noqa: E401,F401
+
+_CODE_CACHE_SIZE = 16
+_MAX_FDS = 3
+
+_code_cache = {}
+
+
+def _compile(path):
+    with open(path, "rb") as f:
+        source = f.read()
+    key = hashlib.sha256(source).digest()
+    code = _code_cache.get(key)
+    if code is None:
+        code = compile(source, path, "exec", dont_inherit=True)
+        if len(_code_cache) >= _CODE_CACHE_SIZE:
+            _code_cache.pop(next(iter(_code_cache)))
+        _code_cache[key] = code
+    return code
+
+
+def _child(request, code, fds):
+    # Becomes the solution: what a fresh "python3 <path>" would look like from the inside.
+    os.setsid()
+    for signum in (signal.SIGPIPE, signal.SIGCHLD, signal.SIGINT, signal.SIGXFSZ):
+        signal.signal(signum, signal.SIG_DFL)
+    signal.set_wakeup_fd(-1)
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    cpu = request["cpu"]
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+    if request.get("output"):
+        resource.setrlimit(resource.RLIMIT_FSIZE, (request["output"] + 1, request["output"] + 1))
+    if request.get("memory"):
+        resource.setrlimit(resource.RLIMIT_AS, (request["memory"], request["memory"]))
+    for target, fd in enumerate(fds):
+        os.dup2(fd, target)
+    os.closerange(3, os.sysconf("SC_OPEN_MAX"))
+    os.chdir(request["cwd"])
+
+    sys.stdin = open(0, "r", encoding=sys.stdin.encoding, errors=sys.stdin.errors, closefd=False)
+    sys.stdout = open(1, "w", encoding=sys.stdout.encoding, errors=sys.stdout.errors, closefd=False)
+    sys.stderr = open(2, "w", encoding=sys.stderr.encoding, errors="backslashreplace", closefd=False, buffering=1)
+    sys.argv = [request["path"]]
+    sys.path[0] = os.path.dirname(request["path"])
+    random.seed() # Otherwise every run would draw the same numbers.
+    main = types.ModuleType("__main__")
+    main.__file__ = request["path"]
+    main.__builtins__ = __builtins__
+    sys.modules["__main__"] = main
+    gc.enable()
+
+    status = 0
+    try:
+        exec(code, main.__dict__)
+    except SystemExit as e:
+        if e.code is None:
+            status = 0
+        elif isinstance(e.code, int):
+            status = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            status = 1
+    except BaseException:
+        traceback.print_exc()
+        status = 1
+    try:
+        sys.stdout.flush()
+    except BrokenPipeError:
+        pass
+    except BaseException:
+        traceback.print_exc()
+        status = status or 120
+    try:
+        sys.stderr.flush()
+    except BaseException:
+        pass
+    os._exit(status & 0xff)
+
+
+def _send(conn, message):
+    conn.send(json.dumps(message).encode("utf-8"))
+
+
+def main():
+    conn = socket.socket(fileno=os.dup(0))
+    os.close(0)
+    os.open(os.devnull, os.O_RDONLY) # Keep 0 taken so no descriptor from the judge lands there by accident.
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, signal.SIG_IGN)
+
+    wakeup_r, wakeup_w = os.pipe()
+    os.set_blocking(wakeup_r, False)
+    os.set_blocking(wakeup_w, False)
+    signal.set_wakeup_fd(wakeup_w)
+    signal.signal(signal.SIGCHLD, lambda *_: None)
+
+    running = {} # pid -> request id
+    pids = {} # request id -> pid
+    selector = selectors.DefaultSelector()
+    selector.register(conn, selectors.EVENT_READ)
+    selector.register(wakeup_r, selectors.EVENT_READ)
+    # Forks copy-on-write; a collection in the zygote would touch every object and unshare its pages.
+    gc.collect()
+    gc.freeze()
+    gc.disable()
+
+    while True:
+        for key, _ in selector.select():
+            if key.fileobj is wakeup_r:
+                try:
+                    while os.read(wakeup_r, 4096):
+                        pass
+                except BlockingIOError:
+                    pass
+                while True:
+                    try:
+                        pid, status, usage = os.wait4(-1, os.WNOHANG)
+                    except ChildProcessError:
+                        break
+                    if pid == 0:
+                        break
+                    request_id = running.pop(pid, None)
+                    if request_id is None:
+                        continue # Not a run of ours.
+                    pids.pop(request_id, None)
+                    _send(conn, {"id": request_id, "exit": os.waitstatus_to_exitcode(status),
+                                 "cpu": usage.ru_utime + usage.ru_stime, "maxrss": usage.ru_maxrss * 1024})
+                continue
+
+            data, fds, _, _ = socket.recv_fds(conn, 65536, _MAX_FDS)
+            if not data:
+                for pid in running:
+                    try:
+                        os.killpg(pid, signal.SIGKILL)
+                    except OSError:
+                        pass
+                return
+            request = json.loads(data)
+            op = request["op"]
+            if op == "kill":
+                pid = pids.get(request["id"])
+                if pid is not None:
+                    try:
+                        os.killpg(pid, signal.SIGKILL)
+                    except OSError:
+                        pass
+                continue
+
+            try:
+                code = _compile(request["path"])
+            except SyntaxError:
+                message = "".join(traceback.format_exception_only(*sys.exc_info()[:2]))
+                code = None
+            except Exception as e:
+                message = f"{type(e).__name__}: {e}"
+                code = None
+            if op == "check":
+                _send(conn, {"id": request["id"], "ok": code is not None, "message": "" if code else message})
+                continue
+
+            if code is None:
+                os.write(fds[2], message.encode("utf-8", errors="replace"))
+                for fd in fds:
+                    os.close(fd)
+                _send(conn, {"id": request["id"], "exit": 1, "cpu": 0.0, "maxrss": 0})
+                continue
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    selector.close()
+                    conn.close()
+                    _child(request, code, fds)
+                finally:
+                    os._exit(121)
+            for fd in fds:
+                os.close(fd)
+            running[pid] = request["id"]
+            pids[request["id"]] = pid
+
+
+if __name__ == "__main__":
+    main()
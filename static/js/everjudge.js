@@ -0,0 +1,44 @@
+// 移动端菜单切换逻辑
+const mobileMenuBtn = document.getElementById('mobile-menu-btn');
+const mobileMenu = document.getElementById('mobile-menu');
+
+if (mobileMenuBtn && mobileMenu) {
+    mobileMenuBtn.addEventListener('click', () => {
+        mobileMenu.classList.toggle('hidden');
+
+        // 切换图标
+        const icon = mobileMenuBtn.querySelector('i');
+        if (mobileMenu.classList.contains('hidden')) {
+            icon.classList.remove('fa-xmark');
+            icon.classList.add('fa-bars');
+        } else {
+            icon.classList.remove('fa-bars');
+            icon.classList.add('fa-xmark');
+        }
+    });
+}
+
+// 简单的 Flash 消息自动消失逻辑 (如果将来通过 JS 动态添加消息)
+document.addEventListener('DOMContentLoaded', () => {
+    const flashMessages = document.querySelectorAll('#flash-messages > div');
+    flashMessages.forEach(msg => {
+        // 添加关闭按钮逻辑
+        const closeBtn = msg.querySelector('button');
+        if (closeBtn) {
+            closeBtn.addEventListener('click', () => {
+                msg.style.opacity = '0';
+                msg.style.transform = 'translateY(-10px)';
+                setTimeout(() => msg.remove(), 300);
+            });
+        }
+
+        // 5秒后自动消失
+        setTimeout(() => {
+            if (msg.parentElement) {
+                msg.style.transition = 'all 0.5s ease';
+                msg.style.opacity = '0';
+                setTimeout(() => msg.remove(), 500);
+            }
+        }, 5000);
+    });
+});
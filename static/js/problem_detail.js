@@ -0,0 +1,11 @@
+$(document).ready(function() {
+    // 复制样例输入/输出
+    $('.copy-btn').on('click', function() {
+        const textToCopy = $(this).data('copy');
+        navigator.clipboard.writeText(textToCopy).then(function() {
+            alert('已复制到剪贴板！');
+        }).catch(function(err) {
+            console.error('复制失败:', err);
+        });
+    });
+});
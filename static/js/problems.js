@@ -0,0 +1,93 @@
+(function() {
+const pagination = document.currentScript.dataset;
+
+$(document).ready(function() {
+    let currentPage = parseInt(pagination.currentPage, 10);
+    let totalPages = parseInt(pagination.totalPages, 10);
+    let searchTimeout;
+
+    // 搜索输入防抖
+    $('#search-input').on('input', function() {
+        clearTimeout(searchTimeout);
+        searchTimeout = setTimeout(function() {
+            performSearch();
+        }, 300);
+    });
+
+    // 筛选条件变化
+    $('#difficulty-filter, #set-filter, #show-solved, #sort-by').on('change', function() {
+        performSearch();
+    });
+
+    // 快速标签点击
+    $('.quick-tag').on('click', function() {
+        const tag = $(this).data('tag');
+        const currentSearch = $('#search-input').val();
+        
+        if (currentSearch.includes(tag)) {
+            $('#search-input').val(currentSearch.replace(tag, '').trim());
+        } else {
+            $('#search-input').val(currentSearch ? currentSearch + ' ' + tag : tag);
+        }
+        
+        $(this).toggleClass('bg-brand text-white');
+        performSearch();
+    });
+
+    // 分页点击
+    $('.page-btn').on('click', function() {
+        const page = $(this).data('page');
+        goToPage(page);
+    });
+
+    $('#prev-page').on('click', function() {
+        if (currentPage > 1) {
+            goToPage(currentPage - 1);
+        }
+    });
+
+    $('#next-page').on('click', function() {
+        if (currentPage < totalPages) {
+            goToPage(currentPage + 1);
+        }
+    });
+
+    // 执行搜索
+    function performSearch() {
+        const search = $('#search-input').val();
+        const difficulty = $('#difficulty-filter').val();
+        const set = $('#set-filter').val();
+        const showSolved = $('#show-solved').is(':checked');
+        const sortBy = $('#sort-by').val();
+
+        const params = new URLSearchParams();
+        if (search) params.append('search', search);
+        if (difficulty) params.append('difficulty', difficulty);
+        if (set) params.append('set', set);
+        if (showSolved) params.append('solved', 'true');
+        if (sortBy) params.append('sort', sortBy);
+        params.append('page', '1');
+
+        window.location.href = '/problems?' + params.toString();
+    }
+
+    // 跳转页面
+    function goToPage(page) {
+        const search = $('#search-input').val();
+        const difficulty = $('#difficulty-filter').val();
+        const set = $('#set-filter').val();
+        const showSolved = $('#show-solved').is(':checked');
+        const sortBy = $('#sort-by').val();
+
+        const params = new URLSearchParams();
+        if (search) params.append('search', search);
+        if (difficulty) params.append('difficulty', difficulty);
+        if (set) params.append('set', set);
+        if (showSolved) params.append('solved', 'true');
+        if (sortBy) params.append('sort', sortBy);
+        params.append('page', page);
+
+        window.location.href = '/problems?' + params.toString();
+    }
+});
+})();
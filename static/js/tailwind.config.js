@@ -0,0 +1,22 @@
+tailwind.config = {
+    theme: {
+        extend: {
+            colors: {
+                brand: {
+                    DEFAULT: '#39C5BB', // 用户指定的主色
+                    light: '#6DDCD4',   // 浅色变体，用于 hover
+                    dark: '#2BA39B',    // 深色变体，用于 active/pressed
+                    bg: '#F0FDFA',      // 极浅的背景色，用于强调区块
+                },
+                surface: '#FFFFFF',
+            },
+            fontFamily: {
+                sans: ['Inter', 'system-ui', '-apple-system', 'BlinkMacSystemFont', 'Segoe UI', 'Roboto', 'sans-serif'],
+            },
+            boxShadow: {
+                'soft': '0 4px 20px -2px rgba(57, 197, 187, 0.15)',
+                'glass': '0 8px 32px 0 rgba(31, 38, 135, 0.07)',
+            }
+        }
+    }
+}